@@ -1,24 +1,227 @@
-from flask import Flask, jsonify
-import json
 import os
+import sys
+import json
+import time
+import atexit
+
+from flask import Flask, Response, jsonify, abort, g, request
 from flask_cors import CORS
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from cache import ResultCache
+from live import CourseWatcher, LiveCatalog
+from plan import PlanError
+from profiling import Profiler, phase
+from query import COLUMNS, FACETS
+from requirements import RequirementError
+from snapshots import Snapshots
+from term_index import parse_term, term_label
+from whatif import WhatIfClosed, expand
+
 app = Flask(__name__)
 CORS(app)
 
+# PROFILE=mem or PROFILE=cpu profiles startup and each endpoint (one phase per
+# route); the summary is printed and written under c-data/profiles on exit.
+profiler = Profiler.from_env(label="app")
+if profiler:
+    atexit.register(lambda: print(profiler.finish(), file=sys.stderr))
+
+# Built once at startup (with enrich.py's data attached, so /api/courses serves
+# it as-is) and updated in place of whole versions when course files change.
+# Each request reads live.current once and answers from that version.
+with phase(profiler, "startup"):
+    live = LiveCatalog()
+print(live.summary)
+watcher = CourseWatcher(live)
+if os.environ.get("COURSES_WATCH", "1") != "0":
+    watcher.start()
+snapshots = Snapshots()
+# Faceted queries and eligibility answers, shared between identical requests
+# (concurrent ones wait for a single computation) until the TTL runs out or
+# live.current moves to a new version.
+results = ResultCache(maxsize=int(os.environ.get("RESULT_CACHE_SIZE", 2048)),
+                      ttl=float(os.environ.get("RESULT_CACHE_TTL", 300)))
+
+@app.before_request
+def _profile_begin():
+    if profiler:
+        g.profile_run = profiler.begin(f"{request.method} {request.url_rule or request.path}")
+
+@app.after_request
+def _profile_end(response):
+    # A streamed body is generated after this returns: end its phase on close
+    run = g.pop("profile_run", None)
+    if run and response.is_streamed:
+        response.call_on_close(lambda: profiler.end(run))
+    elif run:
+        profiler.end(run)
+    return response
+
+def _dumps(record: dict) -> bytes:
+    return orjson.dumps(record) if orjson else json.dumps(record, separators=(",", ":")).encode()
+
 @app.route('/api/courses')
 def get_courses():
-    # Build absolute path to courses directory
-    base_dir = os.path.dirname(__file__)
-    courses_dir = os.path.abspath(os.path.join(base_dir, 'scripts/c-data/courses'))
-    courses = []
-    if not os.path.exists(courses_dir):
-        return jsonify([])  # Return empty if not found
-    for filename in os.listdir(courses_dir):
-        if filename.endswith('.json'):
-            with open(os.path.join(courses_dir, filename), 'r', encoding='utf-8') as f:
-                courses.append(json.load(f))
-    return jsonify(courses)
+    # Streamed one record at a time instead of one jsonify() of the whole
+    # catalog: ?format=ndjson (or Accept: application/x-ndjson) sends a course
+    # per line, otherwise the same bytes form one JSON array.
+    ndjson = request.args.get("format") == "ndjson" or \
+        request.accept_mimetypes.best == "application/x-ndjson"
+    records = list(live.current.courses.values())  # the list, not the records, is copied
+
+    def ndjson_lines():
+        for record in records:
+            yield _dumps(record) + b"\n"
+
+    def json_array():
+        yield b"["
+        for i, record in enumerate(records):
+            yield (b"," if i else b"") + _dumps(record)
+        yield b"]"
+
+    if ndjson:
+        return Response(ndjson_lines(), mimetype="application/x-ndjson")
+    return Response(json_array(), mimetype="application/json")
+
+@app.route('/api/courses/query')
+def query_courses():
+    # ?subject=COMPSCI,MATH&credits=3-4&gpa=3.0-&sort=-gpa&limit=20&offset=0&facets=subject,level
+    def values(name):
+        return [v for arg in request.args.getlist(name) for v in arg.split(",") if v.strip()]
+    started = time.perf_counter()
+    state = live.current
+    inputs = dict(
+        filters={f: set(values(f)) for f in FACETS},
+        ranges={c: request.args[c] for c in COLUMNS if request.args.get(c)},
+        sort=request.args.get("sort"),
+        limit=max(0, min(request.args.get("limit", 20, type=int), 200)),
+        offset=max(request.args.get("offset", 0, type=int), 0),
+        facet_counts=values("facets"),
+    )
+    try:
+        result, status = results.get("query", inputs, lambda: state.search.query(**inputs), state.version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify({**result, "took_ms": round((time.perf_counter() - started) * 1000, 3)})
+    response.headers["X-Cache"] = status
+    return response
+
+@app.route('/api/terms')
+def get_terms():
+    return jsonify(live.current.term_index.terms())
+
+@app.route('/api/terms/<term>/courses')
+def get_term_courses(term):
+    # accepts "1252" as well as "Fall 2024" / "fall-2024"
+    try:
+        code = parse_term(term)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"term": code, "name": term_label(code), "courses": live.current.term_index.courses_in(code)})
+
+@app.route('/api/courses/<course_id>/offerings')
+def get_course_offerings(course_id):
+    # cross-listed codes share one stored course, indexed under its catalog id
+    offering = live.current.term_index.offering(live.current.graph.resolve(course_id))
+    if offering is None:
+        abort(404)
+    return jsonify(offering)
+
+@app.route('/api/courses/<course_id>/eligibility')
+def get_course_eligibility(course_id):
+    # fewest terms of prerequisites before course_id and the cheapest chain;
+    # ?completed=COMPSCI_200,MATH_221 starts from those instead of nothing
+    completed = {c for arg in request.args.getlist("completed") for c in arg.split(",") if c.strip()}
+    state = live.current
+    cid = state.graph.resolve(course_id)
+    result, status = results.get("eligibility", (cid, completed), lambda: state.pathways.query(cid, completed),
+                                 state.version)
+    if result is None:
+        abort(404)
+    response = jsonify(result)
+    response.headers["X-Cache"] = status
+    return response
+
+@app.route('/api/plan/validate', methods=['POST'])
+def validate_plan():
+    # full plan -> new plan_id; {"plan_id", "edits": [...]} -> incremental re-check
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    try:
+        return jsonify(live.current.plans.validate(payload))
+    except PlanError as e:
+        return jsonify({"error": str(e)}), 400
+    except KeyError:
+        return jsonify({"error": "unknown plan_id; send the full plan again"}), 404
+
+@app.route('/api/plan/whatif', methods=['POST'])
+def whatif_plans():
+    # {"scenarios": [...]} or {"base": {...}, "variants": [...]}, optional "requirements";
+    # answers NDJSON, one line per scenario as it finishes
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    try:
+        scenarios = expand(payload)
+    except PlanError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        outcomes = live.current.whatif.run(scenarios, payload.get("requirements"))
+    except WhatIfClosed:
+        # a reload replaced the state between reading live.current and run(); use the new one
+        outcomes = live.current.whatif.run(scenarios, payload.get("requirements"))
+    lines = (json.dumps(r, separators=(",", ":")) + "\n" for r in outcomes)
+    return Response(lines, mimetype="application/x-ndjson")
+
+@app.route('/api/requirements')
+def list_requirements():
+    return jsonify(live.current.requirements.available())
+
+@app.route('/api/progress', methods=['POST'])
+def degree_progress():
+    # {"requirements": "compsci_bs" or {...groups...}, "history": ["COMP SCI 300", {"code", "credits", "grade"}]}
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    requirements = live.current.requirements
+    try:
+        return jsonify(requirements.progress(payload.get("requirements"), payload.get("history") or []))
+    except RequirementError as e:
+        return jsonify({"error": str(e)}), 400
+    except KeyError:
+        return jsonify({"error": f"unknown requirement set; one of {sorted(requirements.sets)}"}), 404
+
+@app.route('/api/catalog')
+def catalog_version():
+    # the version being served; bumps each time changed course files are re-read
+    return jsonify({**live.current.info(), "watch": watcher.mode, "cache": results.stats()})
+
+@app.route('/api/snapshots')
+def list_snapshots():
+    return jsonify([{k: v for k, v in snapshots.meta(n).items() if k != "changes"} for n in snapshots.list()])
+
+@app.route('/api/snapshots/<int:a>/diff/<int:b>')
+def diff_snapshots(a, b):
+    try:
+        return jsonify(snapshots.diff(a, b, request.args.get("fields") == "true"))
+    except KeyError:
+        abort(404)
+
+@app.route('/api/snapshots/<int:version>/courses/<course_id>')
+def get_snapshot_course(version, course_id):
+    try:
+        record = snapshots.record(version, course_id.upper())
+    except KeyError:
+        abort(404)
+    if record is None:
+        abort(404)
+    return jsonify(record)
 
 if __name__ == "__main__":
-    app.run(port=5000)
\ No newline at end of file
+    app.run(port=5000)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+bundle.py – static catalog bundle for the frontend
+
+Builds files a CDN or any static host can serve, so roadmap visitors don't
+make the backend serialize the catalog:
+
+  <SUBJECT>.<hash>.json.gz   the slim course cards of one subject (the fields
+                             the roadmap page shows), gzip-compressed
+  index.<hash>.json.gz       prefix search index over every listed code and
+                             title word, pointing at the subject shard to load
+  manifest.json              subject -> {file, hash, courses, bytes}, plus the
+                             index file and the retired files; the only file
+                             that isn't immutable
+
+Shard names carry their content hash, so they can be cached forever and the
+manifest alone decides what is current.  A rebuild compares each subject's
+hash with the previous manifest and only writes (and only invalidates) the
+shards whose courses changed; gzip runs with mtime=0 so identical content
+gives identical bytes.
+
+The frontend keeps the manifest it loaded for the whole session, so a
+superseded file isn't deleted right away: it is listed under "retired" with
+the time it stopped being current and deleted by the first build after
+--grace hours.  Any other *.json.gz in the directory (left by an interrupted
+or older build) is retired the same way.
+
+Usage:
+  python bundle.py                                   # -> ../frontend/public/catalog
+  python bundle.py --out /srv/static/catalog --force --grace 48
+"""
+from __future__ import annotations
+import re
+import gzip
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+from catalog import COURSES_DIR, credit_range
+from enrich import load_enrichment
+from ingest import ingest
+
+BUNDLE_DIR = Path(__file__).resolve().parent.parent / "frontend" / "public" / "catalog"
+MIN_WORD = 3
+GRACE_HOURS = 24     # how long superseded files stay for tabs holding an older manifest
+
+
+def _encode(obj: object) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _code(subject: str, number: object) -> str:
+    return f"{subject} {number}"
+
+
+def slim(record: dict, extra: dict | None = None) -> dict:
+    """The course card the roadmap page renders (same shape as its mapCourse())."""
+    ref = record["course_reference"]
+    credits = credit_range(record)
+    extra = extra or {}
+    mad, rmp = extra.get("madGrades") or {}, extra.get("rmp") or {}
+    prereqs = record.get("prerequisites") or {}
+    refs = [*(prereqs.get("course_references") or ()), *(prereqs.get("text_references") or ())]
+    return {
+        "code": _code(ref["subjects"][0], ref["course_number"]),
+        "also": [_code(s, ref["course_number"]) for s in ref["subjects"][1:]],
+        "name": record.get("course_title") or "",
+        "description": record.get("description") or "",
+        "credits": credits[0] if credits else None,
+        "prerequisites": list(dict.fromkeys(_code(r["subjects"][0], r["course_number"]) for r in refs if r.get("subjects"))),
+        "madGrades": {"avgGPA": mad.get("avgGPA"), "gpaRank": mad.get("gpaRank")},
+        "rmp": {"rating": rmp.get("rating"), "difficulty": rmp.get("difficulty"), "professor": rmp.get("professor")},
+    }
+
+
+def build_index(shards: dict[str, list[dict]]) -> dict:
+    """
+    {"subjects": [...], "codes": [[key, code, title, subject#], ...],
+     "words": [[word, [code#, ...]], ...]}
+
+    Both lists are sorted by their first element, so a prefix lookup is a
+    binary search followed by a scan; keys are lowercase without spaces
+    ("compsci57" finds COMPSCI 570-579).
+    """
+    subjects = sorted(shards)
+    codes: list[list] = []
+    for si, subject in enumerate(subjects):
+        for card in shards[subject]:
+            for code in [card["code"], *card["also"]]:
+                codes.append([code.replace(" ", "").lower(), code, card["name"], si])
+    codes.sort()
+    words: dict[str, set[int]] = {}
+    for i, (_, _, title, _) in enumerate(codes):
+        for word in set(re.findall(r"[a-z0-9]+", title.lower())):
+            if len(word) >= MIN_WORD:
+                words.setdefault(word, set()).add(i)
+    return {
+        "subjects": subjects,
+        "codes": codes,
+        "words": [[w, sorted(ids)] for w, ids in sorted(words.items())],
+    }
+
+
+def _write(out: Path, stem: str, data: bytes, force: bool = False) -> tuple[str, int]:
+    """Write stem.<hash>.json.gz unless it already exists (or force); the old file is left to _retire."""
+    name = f"{stem}.{_digest(data)}.json.gz"
+    path = out / name
+    size = path.stat().st_size if path.exists() else 0
+    if force or not size:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(gzip.compress(data, 9, mtime=0))
+        tmp.replace(path)
+        size = path.stat().st_size
+    return name, size
+
+
+def _retire(out: Path, current: set[str], retired: dict[str, int], grace: float) -> tuple[dict[str, int], list[str]]:
+    """
+    (files still retired -> when they were superseded, files deleted): every
+    shard that isn't current is retired, and deleted once grace seconds old.
+    """
+    now = int(time.time())
+    kept = {f: t for f, t in retired.items() if f not in current and (out / f).exists()}
+    for path in out.glob("*.json.gz"):
+        if path.name not in current:
+            kept.setdefault(path.name, now)
+    deleted = sorted(f for f, t in kept.items() if now - t >= grace)
+    for f in deleted:
+        (out / f).unlink(missing_ok=True)
+        del kept[f]
+    return dict(sorted(kept.items())), deleted
+
+
+def build(courses_dir: Path = COURSES_DIR, out: Path = BUNDLE_DIR, force: bool = False,
+          grace_hours: float = GRACE_HOURS) -> dict:
+    """
+    Build or refresh the bundle in out; returns the manifest plus what was
+    written, the subjects removed and the retired files deleted.  force
+    rewrites every shard; previous files are still retired, not leaked.
+    """
+    t0 = time.monotonic()
+    catalog = ingest(courses_dir).courses
+    enrichment = load_enrichment()
+
+    shards: dict[str, list[dict]] = {}
+    for cid in sorted(catalog):
+        record = catalog[cid]
+        shards.setdefault(record["course_reference"]["subjects"][0], []).append(slim(record, enrichment.get(cid)))
+
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / "manifest.json"
+    previous = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    before = previous.get("subjects") or {}
+
+    subjects: dict[str, dict] = {}
+    written = []
+    for subject, cards in sorted(shards.items()):
+        data = _encode(cards)
+        digest = _digest(data)
+        old = before.get(subject)
+        if not force and old and old["hash"] == digest and (out / old["file"]).exists():
+            subjects[subject] = old
+            continue
+        name, size = _write(out, subject, data, force)
+        subjects[subject] = {"file": name, "hash": digest, "courses": len(cards), "bytes": size}
+        written.append(subject)
+    removed = sorted(set(before) - set(subjects))
+
+    old_index = previous.get("index") or {}
+    index_data = _encode(build_index(shards))
+    if not force and old_index.get("hash") == _digest(index_data) and (out / old_index["file"]).exists():
+        index = old_index
+    else:
+        name, size = _write(out, "index", index_data, force)
+        index = {"file": name, "hash": _digest(index_data), "bytes": size}
+
+    current = {s["file"] for s in subjects.values()} | {index["file"]}
+    retired, deleted = _retire(out, current, previous.get("retired") or {}, grace_hours * 3600)
+
+    manifest = {
+        "version": 1,
+        "courses": sum(s["courses"] for s in subjects.values()),
+        "index": index,
+        "subjects": subjects,
+        "retired": retired,
+    }
+    if manifest != {k: previous.get(k) for k in manifest} or force:
+        manifest["built"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        tmp.replace(manifest_path)
+    else:
+        manifest["built"] = previous.get("built")
+    return {**manifest, "written": written, "removed": removed, "deleted": deleted, "seconds": time.monotonic() - t0}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="bundle.py", description="Build the static catalog bundle")
+    p.add_argument("--dir", type=Path, default=COURSES_DIR, help="courses directory")
+    p.add_argument("--out", type=Path, default=BUNDLE_DIR, help=f"output directory (default {BUNDLE_DIR})")
+    p.add_argument("--force", action="store_true", help="rewrite every shard")
+    p.add_argument("--grace", type=float, default=GRACE_HOURS,
+                   help=f"hours superseded files are kept for open pages (default {GRACE_HOURS})")
+    args = p.parse_args()
+
+    result = build(args.dir, args.out, args.force, args.grace)
+    total = sum(s["bytes"] for s in result["subjects"].values()) + result["index"]["bytes"]
+    print(f"{result['courses']} courses in {len(result['subjects'])} subject shards, "
+          f"{total / 1024:.0f} KB compressed, in {result['seconds']:.2f} s")
+    print(f"Rewrote {len(result['written'])} shard(s)"
+          + (f": {', '.join(result['written'][:10])}{' ...' if len(result['written']) > 10 else ''}" if result["written"] else "")
+          + (f"; removed {', '.join(result['removed'])}" if result["removed"] else ""))
+    if result["retired"] or result["deleted"]:
+        print(f"{len(result['retired'])} superseded file(s) kept for open pages, "
+              f"{len(result['deleted'])} deleted after {args.grace:g} h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+cache.py – shared result cache for computed endpoints
+
+When registration opens, many clients ask for the same faceted query or the
+same eligibility answer at once.  ResultCache sits in front of those
+computations:
+
+  key        namespace + inputs canonicalized to JSON (dict keys sorted,
+             sets sorted) and hashed, so equal inputs share an entry however
+             the client ordered them
+  coalesce   a request whose key is already being computed waits for that
+             computation instead of starting its own (singleflight); its
+             error, if any, is raised to every waiter and isn't cached
+  store      an LRU of at most maxsize results, each kept for ttl seconds
+
+Results belong to a catalog version (CatalogState.version, which only
+grows): a request for a newer version drops every entry, and a computation
+that finishes after the version moved on hands its result to its waiters
+without storing it.
+
+Cached values are shared between requests, so callers must not mutate them.
+"""
+from __future__ import annotations
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+HIT, MISS, COALESCED = "hit", "miss", "coalesced"
+
+
+def _canonical(obj: object) -> object:
+    if isinstance(obj, (set, frozenset)):
+        return sorted(_canonical(v) for v in obj)
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def cache_key(namespace: str, inputs: object) -> str:
+    data = json.dumps(_canonical(inputs), sort_keys=True, separators=(",", ":"), default=str)
+    return f"{namespace}:{hashlib.sha256(data.encode()).hexdigest()}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 2048, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version: int | None = None
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()   # key -> (expires, value)
+        self._flights: dict[tuple[int | None, str], _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = 0
+        self.evictions = self.expirations = self.invalidations = self.errors = 0
+
+    def get(self, namespace: str, inputs: object, compute: Callable[[], T], version: int | None = None) -> tuple[T, str]:
+        """(result, "hit" | "miss" | "coalesced") for compute() under these inputs and version."""
+        key = cache_key(namespace, inputs)
+        with self._lock:
+            self._advance(version)
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], HIT
+                del self._entries[key]
+                self.expirations += 1
+            flight = self._flights.get((version, key))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(version, key)] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, COALESCED
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        else:
+            with self._lock:
+                if version == self.version:
+                    self._entries[key] = (self.clock() + self.ttl, flight.value)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return flight.value, MISS
+        finally:
+            with self._lock:
+                del self._flights[(version, key)]
+            flight.done.set()
+
+    def _advance(self, version: int | None) -> None:
+        # caller holds the lock; versions only move forward, so a late
+        # request for an older version neither reads nor drops newer entries
+        if version == self.version or (self.version is not None and version < self.version):
+            return
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+            }
@@ -0,0 +1,76 @@
+"""
+catalog.py – in-memory course catalog built from scripts/c-data/courses
+
+The downloader (scripts/uw_course_api.py) writes one JSON file per course
+code.  Everything the API serves beyond the raw file dump is derived from
+these records once at startup instead of rescanning the directory per request.
+"""
+from __future__ import annotations
+import json
+from pathlib import Path
+
+COURSES_DIR = Path(__file__).resolve().parent / "scripts" / "c-data" / "courses"
+SUBJECTS_FILE = COURSES_DIR.parent / "names" / "subjects.json"
+
+
+def course_id(record: dict) -> str:
+    """COMPSCI_577-style id for a course record (first listed subject)."""
+    ref = record["course_reference"]
+    return f"{ref['subjects'][0]}_{ref['course_number']}"
+
+
+def credit_range(record: dict) -> tuple[int, int] | None:
+    """(min, max) credits from the most recent term that lists them."""
+    for _, entry in sorted((record.get("term_data") or {}).items(), reverse=True):
+        credits = ((entry or {}).get("enrollment_data") or {}).get("credit_count")
+        if credits:
+            return credits[0], credits[-1]
+    return None
+
+
+def is_course(record: object) -> bool:
+    """Skip bookkeeping files (info_log.json, progress.json) in the courses dir."""
+    return isinstance(record, dict) and "course_reference" in record
+
+
+def course_files(courses_dir: Path = COURSES_DIR) -> list[Path]:
+    if not courses_dir.exists():
+        return []
+    return sorted(courses_dir.glob("*.json"))
+
+
+def unique_course_files(courses_dir: Path = COURSES_DIR) -> list[tuple[list[str], Path]]:
+    """
+    One (codes, path) entry per distinct course body.
+
+    The downloader stores a cross-listed course once and hard-links each of
+    its codes to it, so files sharing an inode are the same course and only
+    need to be read once.  Plain per-code files are each their own entry.
+    """
+    groups: dict[tuple[int, int], list[Path]] = {}
+    for p in course_files(courses_dir):
+        st = p.stat()
+        groups.setdefault((st.st_dev, st.st_ino), []).append(p)
+    return [([p.stem for p in paths], paths[0]) for paths in groups.values()]
+
+
+def pick_id(codes: list[str], record: dict) -> str:
+    """The canonical code among a course's linked files (its first subject)."""
+    cid = course_id(record)
+    return cid if cid in codes else codes[0]
+
+
+def load_courses(courses_dir: Path = COURSES_DIR) -> dict[str, dict]:
+    """
+    Read every distinct course into {code: record}.
+
+    The code is the file stem the downloader fetched it under, so it stays
+    unique even when a cross-listed course is saved once per subject; linked
+    cross-listings are read once and keyed by their canonical code.
+    """
+    courses: dict[str, dict] = {}
+    for codes, p in unique_course_files(courses_dir):
+        record = json.loads(p.read_text(encoding="utf-8"))
+        if is_course(record):
+            courses[pick_id(codes, record)] = record
+    return courses
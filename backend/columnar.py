@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+columnar.py – long-format Arrow/Parquet tables of per-term course data
+
+Flattens every course's term_data into two tables, one row per course and
+term:
+
+  grades      terms with grade_data: the term's instructors and the count of
+              each grade bucket (a, ab, b, ..., total)
+  offerings   terms with enrollment_data: credits, school, instructors and
+              the offering flags (general education, ethnic studies, whether
+              grades / enrollment were reported, typically offered)
+
+Grade counts are per course and term, not per instructor, so instructors
+are a list column and the counts stay summable.
+
+Course files are read one at a time and rows leave in row groups of
+--row-group rows, so memory holds one row group per table plus the
+dictionaries.  String columns (course, subject, term, instructor, school,
+...) are dictionary-encoded with one dictionary per column for the whole
+file, which only ever grows: Arrow files append delta dictionaries, Parquet
+stores it per column chunk.
+
+Arrow IPC files are written uncompressed, so pyarrow.memory_map() +
+pyarrow.ipc.open_file() read them zero-copy; Parquet files are
+zstd-compressed for tools that read Parquet.
+
+Usage:
+  python columnar.py                            # parquet into c-data/exports
+  python columnar.py --format arrow --out /tmp/exports
+"""
+from __future__ import annotations
+import time
+import argparse
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from catalog import COURSES_DIR, is_course, pick_id, unique_course_files
+from ingest import loads
+from term_index import decode_term
+
+EXPORTS_DIR = COURSES_DIR.parent / "exports"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_ROW_GROUP = 65_536
+GRADE_BUCKETS = ("a", "ab", "b", "bc", "c", "d", "f", "satisfactory", "unsatisfactory", "credit",
+                 "no_credit", "passed", "incomplete", "no_work", "not_reported", "other", "total")
+
+_STR = pa.dictionary(pa.int32(), pa.string())
+_KEY = [
+    ("course", _STR), ("subject", _STR), ("number", pa.int16()),
+    ("term", _STR), ("year", pa.int16()), ("season", _STR),
+]
+SCHEMAS = {
+    "grades": pa.schema(_KEY + [("instructors", pa.list_(_STR))]
+                        + [(b, pa.int32()) for b in GRADE_BUCKETS]),
+    "offerings": pa.schema(_KEY + [
+        ("credits_min", pa.int8()), ("credits_max", pa.int8()),
+        ("school", _STR), ("instructors", pa.list_(_STR)),
+        ("general_education", pa.bool_()), ("ethnic_studies", pa.bool_()),
+        ("has_grades", pa.bool_()), ("has_enrollment", pa.bool_()),
+        ("typically_offered", _STR), ("last_taught_term", _STR),
+    ]),
+}
+
+
+def rows(cid: str, record: dict):
+    """("grades" | "offerings", row) for each term of one course."""
+    ref = record["course_reference"]
+    key = {"course": cid, "subject": ref["subjects"][0], "number": ref["course_number"]}
+    for term, entry in sorted((record.get("term_data") or {}).items()):
+        grades = (entry or {}).get("grade_data")
+        enrollment = (entry or {}).get("enrollment_data")
+        if not (grades or enrollment):
+            continue
+        try:
+            year, season = decode_term(term)
+        except ValueError:
+            continue
+        base = {**key, "term": term, "year": year, "season": season}
+        if grades:
+            yield "grades", {**base, "instructors": grades.get("instructors") or [],
+                             **{b: grades.get(b) for b in GRADE_BUCKETS}}
+        if enrollment:
+            credits = enrollment.get("credit_count") or [None]
+            yield "offerings", {
+                **base,
+                "credits_min": credits[0],
+                "credits_max": credits[-1],
+                "school": (enrollment.get("school") or {}).get("abbreviation"),
+                "instructors": list(enrollment.get("instructors") or ()),
+                "general_education": enrollment.get("general_education"),
+                "ethnic_studies": enrollment.get("ethnics_studies"),
+                "has_grades": bool(grades),
+                "has_enrollment": True,
+                "typically_offered": enrollment.get("typically_offered"),
+                "last_taught_term": enrollment.get("last_taught_term"),
+            }
+
+
+class _Dictionary:
+    """A column's dictionary for the whole file; batches only append to it."""
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def encode(self, values: list) -> pa.DictionaryArray:
+        ids = []
+        for v in values:
+            if v is None:
+                ids.append(None)
+                continue
+            i = self.index.get(v)
+            if i is None:
+                i = self.index[v] = len(self.values)
+                self.values.append(v)
+            ids.append(i)
+        return pa.DictionaryArray.from_arrays(pa.array(ids, pa.int32()), pa.array(self.values, pa.string()))
+
+
+class TableWriter:
+    """Buffers rows column-wise and writes a row group (record batch) every row_group rows."""
+
+    def __init__(self, path: Path, schema: pa.Schema, fmt: str, row_group: int = DEFAULT_ROW_GROUP):
+        self.path = path
+        self.schema = schema
+        self.row_group = row_group
+        self.tmp = path.with_suffix(path.suffix + ".tmp")
+        if fmt == "arrow":
+            self.sink = pa.OSFile(str(self.tmp), "wb")
+            options = ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self.writer = ipc.new_file(self.sink, schema, options=options)
+        else:
+            self.sink = None
+            self.writer = pq.ParquetWriter(str(self.tmp), schema, compression="zstd")
+        self.columns: dict[str, list] = {f.name: [] for f in schema}
+        self.dictionaries = {f.name: _Dictionary() for f in schema
+                             if pa.types.is_dictionary(f.type) or pa.types.is_list(f.type)}
+        self.rows = 0
+        self.batches = 0
+
+    def add(self, row: dict) -> None:
+        for name, values in self.columns.items():
+            values.append(row.get(name))
+        if len(self.columns["course"]) >= self.row_group:
+            self.flush()
+
+    def _array(self, field: pa.Field, values: list) -> pa.Array:
+        if pa.types.is_list(field.type):
+            offsets = [0]
+            for v in values:
+                offsets.append(offsets[-1] + len(v))
+            flat = self.dictionaries[field.name].encode([x for v in values for x in v])
+            return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), flat)
+        if pa.types.is_dictionary(field.type):
+            return self.dictionaries[field.name].encode(values)
+        return pa.array(values, field.type)
+
+    def flush(self) -> None:
+        n = len(self.columns["course"])
+        if not n:
+            return
+        arrays = [self._array(f, self.columns[f.name]) for f in self.schema]
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self.rows += n
+        self.batches += 1
+        for values in self.columns.values():
+            values.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+        self.tmp.replace(self.path)
+
+
+def export(courses_dir: Path = COURSES_DIR, out: Path = EXPORTS_DIR, fmt: str = "parquet",
+           row_group: int = DEFAULT_ROW_GROUP) -> dict:
+    """Write <out>/grades.<fmt> and <out>/offerings.<fmt>; returns per-table stats."""
+    t0 = time.monotonic()
+    out.mkdir(parents=True, exist_ok=True)
+    writers = {name: TableWriter(out / f"{name}{FORMATS[fmt]}", schema, fmt, row_group)
+               for name, schema in SCHEMAS.items()}
+    courses = 0
+    try:
+        for codes, path in unique_course_files(courses_dir):
+            record = loads(path.read_bytes())
+            if not is_course(record):
+                continue
+            courses += 1
+            for table, row in rows(pick_id(codes, record), record):
+                writers[table].add(row)
+    finally:
+        for w in writers.values():
+            w.close()
+    return {
+        "courses": courses,
+        "seconds": time.monotonic() - t0,
+        "tables": {name: {"path": str(w.path), "rows": w.rows, "row_groups": w.batches,
+                          "bytes": w.path.stat().st_size} for name, w in writers.items()},
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="columnar.py", description="Export per-term course data as Arrow/Parquet")
+    p.add_argument("--dir", type=Path, default=COURSES_DIR, help="courses directory")
+    p.add_argument("--out", type=Path, default=EXPORTS_DIR, help=f"output directory (default {EXPORTS_DIR})")
+    p.add_argument("--format", choices=FORMATS, default="parquet")
+    p.add_argument("--row-group", type=int, default=DEFAULT_ROW_GROUP, help="rows per row group")
+    args = p.parse_args()
+    print_result(export(args.dir, args.out, args.format, max(1, args.row_group)))
+
+
+def print_result(result: dict) -> None:
+    print(f"Exported {result['courses']} courses in {result['seconds']:.2f} s")
+    for name, t in result["tables"].items():
+        print(f"  {name:<10} {t['rows']:>8} rows in {t['row_groups']} row group(s), "
+              f"{t['bytes'] / 1024:.0f} KB -> {t['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+enrich.py – join MadGrades grades and RateMyProfessors ratings onto the catalog
+
+Produces the values behind the roadmap's madGrades.avgGPA / gpaRank and
+rmp.rating / difficulty / professor slots.  Difficulty is RateMyProfessors'
+avgDifficulty (1-5), averaged over the course's recent instructors by their
+number of ratings; gpaRank (0-10, lowest GPA -> 10) is only the course's
+place among catalog GPAs.  Each input is hashed once into a dict keyed by
+course reference or normalized instructor name, so the join is one lookup per
+course; the result is written as a snapshot that app.py attaches at startup.
+
+Usage:
+  python enrich.py                                   # default input locations
+  python enrich.py --grades d_data/madgrades_course_grades.csv \\
+                   --mg-courses d_data/madgrades_courses.csv \\
+                   --rmp ratemyprofessors_uwmadison_data.jsonl
+"""
+from __future__ import annotations
+import re
+import csv
+import json
+import argparse
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Iterator
+
+from catalog import COURSES_DIR, load_courses
+
+EXPORTS_DIR = Path(__file__).resolve().parent / "scripts" / "unused_scripts"
+ENRICHED_FILE = COURSES_DIR.parent / "enriched" / "enrichment.json"
+DEFAULT_GRADES = EXPORTS_DIR / "d_data" / "madgrades_course_grades.csv"
+DEFAULT_MG_COURSES = EXPORTS_DIR / "d_data" / "madgrades_courses.csv"
+DEFAULT_RMP = EXPORTS_DIR / "ratemyprofessors_uwmadison_data.jsonl"
+
+GRADE_POINTS = {"a": 4.0, "ab": 3.5, "b": 3.0, "bc": 2.5, "c": 2.0, "d": 1.0, "f": 0.0}
+RECENT_TERMS = 3      # instructors from this many latest terms count toward rmp
+_NON_ALNUM = re.compile(r"[^0-9A-Za-z]+")
+
+# -------------------------------------------------------------------
+# Keys
+# -------------------------------------------------------------------
+def subject_key(subject: str) -> str:
+    """'COMP SCI' and 'COMPSCI' -> 'COMPSCI'; 'ANAT&PHY' -> 'ANATPHY'"""
+    return _NON_ALNUM.sub("", subject).upper()
+
+def name_key(name: str) -> str:
+    """
+    'Dieter van Melkebeek', 'DIETER VAN MELKEBEEK' and RMP's
+    firstName='Dieter' lastName='van Melkebeek' all -> 'dieter melkebeek'.
+    Middle names and particles are dropped: first and last token only.
+    """
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    tokens = _NON_ALNUM.sub(" ", ascii_name).lower().split()
+    if not tokens:
+        return ""
+    return f"{tokens[0]} {tokens[-1]}"
+
+# -------------------------------------------------------------------
+# Inputs
+# -------------------------------------------------------------------
+def read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    """Rows from a .csv, .jsonl or .parquet export; nothing if the file is missing."""
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        parts = sorted(path.parent.glob(f"{path.stem}.part*.parquet")) or [path]
+        for part in parts:
+            if part.exists():
+                yield from pq.read_table(part).to_pylist()
+        return
+    if not path.exists():
+        return
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def _count(row: dict, grade: str) -> float:
+    # madgrades exports use aCount/abCount..., the catalog uses a/ab...
+    v = row.get(f"{grade}Count", row.get(grade))
+    try:
+        return float(v or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def gpa(counts: dict) -> float | None:
+    graded = sum(_count(counts, g) for g in GRADE_POINTS)
+    if not graded:
+        return None
+    return sum(_count(counts, g) * pts for g, pts in GRADE_POINTS.items()) / graded
+
+def madgrades_index(grades_path: Path, mg_courses_path: Path) -> dict[tuple[str, int], dict[str, float]]:
+    """(subject key, number) -> summed grade counts across every exported term."""
+    ref_by_id: dict[str, list[tuple[str, int]]] = {}
+    for c in read_rows(mg_courses_path):
+        subjects = c.get("subjects")
+        if isinstance(subjects, str):
+            subjects = json.loads(subjects) if subjects.startswith("[") else [subjects]
+        try:
+            number = int(c.get("number"))
+        except (TypeError, ValueError):
+            continue
+        refs = []
+        for s in subjects or []:
+            abbr = (s.get("abbreviation") or s.get("code")) if isinstance(s, dict) else s
+            if abbr:
+                refs.append((subject_key(str(abbr)), number))
+        ref_by_id[str(c.get("id", c.get("uuid")))] = refs
+
+    totals: dict[tuple[str, int], dict[str, float]] = {}
+    for row in read_rows(grades_path):
+        for ref in ref_by_id.get(str(row.get("course_id")), ()):
+            acc = totals.setdefault(ref, dict.fromkeys(GRADE_POINTS, 0.0))
+            for g in GRADE_POINTS:
+                acc[g] += _count(row, g)
+    return totals
+
+def rmp_index(rmp_path: Path) -> dict[str, dict]:
+    """name key -> professor record; on collisions the one with more ratings wins."""
+    profs: dict[str, dict] = {}
+    for p in read_rows(rmp_path):
+        key = name_key(f"{p.get('firstName', '')} {p.get('lastName', '')}")
+        if not key or not p.get("numRatings"):
+            continue
+        if key not in profs or p["numRatings"] >= profs[key]["numRatings"]:
+            profs[key] = {
+                "name": f"{p['firstName']} {p['lastName']}",
+                "avgRating": p.get("avgRating"),
+                "avgDifficulty": p.get("avgDifficulty"),
+                "numRatings": p["numRatings"],
+            }
+    return profs
+
+# -------------------------------------------------------------------
+# Join
+# -------------------------------------------------------------------
+def recent_instructors(record: dict, n: int = RECENT_TERMS) -> list[str]:
+    names: dict[str, None] = {}
+    terms = [t for t in sorted((record.get("term_data") or {}).items(), reverse=True) if t[1]]
+    for _, entry in terms[:n]:
+        for src in (entry.get("enrollment_data") or {}, entry.get("grade_data") or {}):
+            for name in src.get("instructors") or ():
+                if name:
+                    names.setdefault(name)
+    return list(names)
+
+def enrich(
+    courses: dict[str, dict],
+    grades: dict[tuple[str, int], dict[str, float]],
+    profs: dict[str, dict],
+) -> dict[str, dict]:
+    """course id -> {"madGrades": {...}, "rmp": {...}}"""
+    out: dict[str, dict] = {}
+    for cid, record in courses.items():
+        ref = record["course_reference"]
+        number = ref["course_number"]
+        counts = None
+        source = None
+        for s in ref["subjects"]:
+            if (key := (subject_key(s), number)) in grades:
+                counts, source = grades[key], "madgrades"
+                break
+        if counts is None and record.get("cumulative_grade_data"):
+            counts, source = record["cumulative_grade_data"], "catalog"
+        avg = gpa(counts) if counts else None
+
+        matched = [profs[k] for k in map(name_key, recent_instructors(record)) if k in profs]
+        rated = sum(p["numRatings"] for p in matched)
+        judged = [p for p in matched if p["avgDifficulty"] is not None]
+        judged_n = sum(p["numRatings"] for p in judged)
+        top = max(matched, key=lambda p: (p["avgRating"] or 0, p["numRatings"]), default=None)
+        out[cid] = {
+            "madGrades": {
+                "avgGPA": round(avg, 2) if avg is not None else None,
+                "gpaRank": None,
+                "source": source if avg is not None else None,
+            },
+            "rmp": {
+                "rating": round(sum((p["avgRating"] or 0) * p["numRatings"] for p in matched) / rated, 2) if rated else None,
+                "difficulty": round(sum(p["avgDifficulty"] * p["numRatings"] for p in judged) / judged_n, 2) if judged_n else None,
+                "professor": top["name"] if top else None,
+                "numRatings": rated,
+            },
+        }
+
+    # gpaRank 0-10 is the course's GPA rank across the catalog: lowest GPA -> 10
+    gpas = sorted(e["madGrades"]["avgGPA"] for e in out.values() if e["madGrades"]["avgGPA"] is not None)
+    for e in out.values():
+        g = e["madGrades"]["avgGPA"]
+        if g is not None and len(gpas) > 1:
+            e["madGrades"]["gpaRank"] = round(10 * (1 - bisect_left(gpas, g) / (len(gpas) - 1)), 1)
+    return out
+
+def load_enrichment(path: Path = ENRICHED_FILE) -> dict[str, dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="enrich.py", description="Join grades and RMP ratings onto the catalog")
+    p.add_argument("--courses", type=Path, default=COURSES_DIR, help="courses directory")
+    p.add_argument("--grades", type=Path, default=DEFAULT_GRADES, help="madgrades_export grade rows")
+    p.add_argument("--mg-courses", type=Path, default=DEFAULT_MG_COURSES, help="madgrades_export course list")
+    p.add_argument("--rmp", type=Path, default=DEFAULT_RMP, help="RMP scraper JSONL")
+    p.add_argument("--out", type=Path, default=ENRICHED_FILE)
+    args = p.parse_args()
+
+    courses = load_courses(args.courses)
+    grades = madgrades_index(args.grades, args.mg_courses)
+    profs = rmp_index(args.rmp)
+    result = enrich(courses, grades, profs)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, separators=(",", ":")), encoding="utf-8")
+    with_gpa = sum(1 for e in result.values() if e["madGrades"]["avgGPA"] is not None)
+    with_rmp = sum(1 for e in result.values() if e["rmp"]["rating"] is not None)
+    print(f"Enriched {len(result)} courses ({with_gpa} with GPA, {with_rmp} with RMP) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
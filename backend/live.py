@@ -0,0 +1,351 @@
+"""
+live.py – the served catalog, kept current while the server runs
+
+Everything the API reads (catalog, term index, search engine, prerequisite
+graph, pathways, plan and requirement engines) lives in one immutable
+CatalogState.  LiveCatalog.current points at the newest state; a request
+reads that reference once and uses the same version to the end, so a reload
+never blocks or half-updates a reader.
+
+When course files change, only those files are parsed again and the next
+state is derived from the current one:
+
+  term index, search engine   delta updates (TermIndex.apply, QueryEngine.apply)
+  prerequisite graph          changed courses recompiled (PrereqGraph.apply)
+  pathways                    the changed courses' dependents solved again
+  plans, requirements         rebuilt over the new graph; both are cheap, and
+                              open plans carry over, re-checked on their next edit
+
+CourseWatcher notices the changes: Linux inotify on the courses directory,
+or, where that is unavailable, a periodic rescan comparing (inode, mtime,
+size) per file.  Events are debounced so a download burst becomes one new
+version instead of hundreds.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+
+from catalog import COURSES_DIR, SUBJECTS_FILE, course_id, is_course, pick_id
+from enrich import load_enrichment
+from ingest import ingest, loads
+from pathways import Pathways
+from plan import PlanValidator
+from prereqs import PrereqGraph, resolve_text_leaves
+from query import QueryEngine
+from requirements import RequirementsEngine
+from term_index import TermIndex
+from whatif import WhatIf
+
+logger = logging.getLogger(__name__)
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+Signature = tuple[int, int, int]      # (inode, mtime_ns, size)
+
+
+def is_course_stem(stem: str) -> bool:
+    """COMPSCI_577-style file stems; skips info_log, progress, *.tmp and the like."""
+    subject, _, number = stem.rpartition("_")
+    return bool(subject) and number.isdigit()
+
+
+def scan(courses_dir: Path) -> dict[str, Signature]:
+    """stem -> (inode, mtime_ns, size) of every course file."""
+    files = {}
+    try:
+        entries = os.scandir(courses_dir)
+    except FileNotFoundError:
+        return files
+    with entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".json" and is_course_stem(stem) and entry.is_file():
+                st = entry.stat()
+                files[stem] = (st.st_ino, st.st_mtime_ns, st.st_size)
+    return files
+
+
+# -------------------------------------------------------------------
+# Versions
+# -------------------------------------------------------------------
+class CatalogState:
+    """One version of the catalog and everything derived from it; never modified."""
+
+    def __init__(self, version: int, courses: dict[str, dict], term_index: TermIndex, graph: PrereqGraph,
+                 search: QueryEngine, previous: tuple["CatalogState", set[str]] | None = None, changed: int = 0):
+        """previous: the last version and the ids graph recompiled since."""
+        self.version = version
+        self.courses = courses
+        self.term_index = term_index
+        self.graph = graph
+        self.search = search
+        self.plans = PlanValidator(courses, term_index, graph=graph, previous=previous and previous[0].plans)
+        self.requirements = RequirementsEngine(courses, graph)
+        self.whatif = WhatIf(courses, graph, term_index)
+        credits = self.requirements.credits
+        if previous:
+            self.pathways = previous[0].pathways.apply(graph, previous[1], credits)
+        else:
+            self.pathways = Pathways(graph, credits)
+        self.changed = changed
+        self.updated = time.time()
+
+    @classmethod
+    def build(cls, courses: dict[str, dict], term_index: TermIndex, version: int = 1) -> "CatalogState":
+        graph = PrereqGraph(courses)
+        return cls(version, courses, term_index, graph, QueryEngine(courses, term_index))
+
+    def apply(self, changes: dict[str, dict | None], subjects: dict[str, str]) -> "CatalogState":
+        """The next version, with the given courses replaced (None: removed)."""
+        courses = dict(self.courses)
+        for cid, record in changes.items():
+            if record is None:
+                courses.pop(cid, None)
+            else:
+                courses[cid] = record
+        if not courses.keys() <= self.courses.keys():
+            courses = dict(sorted(courses.items()))     # keep the ingest order
+        resolve_text_leaves(courses, subjects, only={cid for cid, r in changes.items() if r is not None})
+
+        term_index = self.term_index.apply(changes)
+        graph, recompiled = self.graph.apply(courses, set(changes))
+        search = self.search.apply(changes, term_index)
+        return CatalogState(self.version + 1, courses, term_index, graph, search,
+                            (self, recompiled), len(changes))
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "courses": len(self.courses),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.updated)),
+            "changed": self.changed,
+        }
+
+
+class LiveCatalog:
+    """
+    Holds the current CatalogState and the file bookkeeping needed to turn
+    changed file names into changed courses.  Cross-listed codes are hard
+    links to one file, so files are grouped by inode the way ingest groups
+    them, and a course is removed only when its last file is.
+    """
+
+    def __init__(self, courses_dir: Path = COURSES_DIR):
+        self.courses_dir = courses_dir
+        # scanned before the ingest: anything written meanwhile shows up as a change later
+        self.files = scan(courses_dir)
+        result = ingest(courses_dir)
+        self.summary = result.summary()
+        self.enrichment = load_enrichment()
+        self.subjects = json.loads(SUBJECTS_FILE.read_text(encoding="utf-8")) if SUBJECTS_FILE.exists() else {}
+        courses = result.courses
+        for cid, extra in self.enrichment.items():
+            if cid in courses:
+                courses[cid]["enrichment"] = extra
+
+        self._owner: dict[str, str] = {}            # file stem -> course id it was read as
+        self._stems: dict[str, set[str]] = {}       # course id -> file stems
+        by_inode: dict[int, list[str]] = {}
+        for stem, sig in self.files.items():
+            by_inode.setdefault(sig[0], []).append(stem)
+        for stems in by_inode.values():
+            stems.sort()
+            cid = next((s for s in stems if s in courses and course_id(courses[s]) == s),
+                       next((s for s in stems if s in courses), None))
+            if cid is not None:
+                for stem in stems:
+                    self._own(stem, cid)
+
+        self.current = CatalogState.build(courses, result.term_index)
+        self._lock = threading.Lock()
+
+    def _own(self, stem: str, cid: str | None) -> str | None:
+        """Point stem at cid (None: forget it); returns the course it belonged to before."""
+        old = self._owner.pop(stem, None)
+        if old is not None:
+            self._stems[old].discard(stem)
+        if cid is not None:
+            self._owner[stem] = cid
+            self._stems.setdefault(cid, set()).add(stem)
+        return old
+
+    def _read(self, stems: set[str]) -> dict[str, dict | None]:
+        """Re-read the given file stems into {course id: record or None (removed)}."""
+        changes: dict[str, dict | None] = {}
+        orphans: set[str] = set()
+        for stem in sorted(stems):
+            path = self.courses_dir / f"{stem}.json"
+            try:
+                st = path.stat()
+                record = loads(path.read_bytes())
+            except FileNotFoundError:
+                self.files.pop(stem, None)
+                orphans.add(self._own(stem, None))
+                continue
+            except (OSError, ValueError) as e:
+                # half-written or unreadable: the write that finishes it brings another event
+                logger.warning(f"Skipping {path.name}: {e}")
+                continue
+            self.files[stem] = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if not is_course(record):
+                orphans.add(self._own(stem, None))
+                continue
+            # its hard links: files of the course it was, or of the course it names
+            related = {stem, *self._stems.get(self._owner.get(stem), ()), *self._stems.get(course_id(record), ())}
+            group = sorted(s for s in related if self.files.get(s, (None,))[0] == st.st_ino)
+            cid = pick_id(group, record)
+            for s in group:
+                orphans.add(self._own(s, cid))
+            extra = self.enrichment.get(cid)
+            if extra:
+                record["enrichment"] = extra
+            changes[cid] = record
+        for cid in orphans - {None}:
+            if not self._stems.get(cid) and cid not in changes:
+                self._stems.pop(cid, None)
+                if cid in self.current.courses:
+                    changes[cid] = None
+        return changes
+
+    def reload(self, stems: set[str]) -> CatalogState | None:
+        """Re-read the given files and publish a new version if any course changed."""
+        with self._lock:
+            t0 = time.monotonic()
+            changes = self._read(stems)
+            if not changes:
+                return None
+            old = self.current
+            self.current = old.apply(changes, self.subjects)
+        logger.info(f"Catalog version {self.current.version}: {len(changes)} course(s) changed "
+                    f"in {time.monotonic() - t0:.3f} s")
+        # readers that still hold the old state finish on it; only its idle worker pool goes
+        old.whatif.close()
+        return self.current
+
+    def resync(self) -> CatalogState | None:
+        """Rescan the directory and reload every file whose (inode, mtime, size) differs."""
+        now = scan(self.courses_dir)
+        stems = {s for s in now.keys() | self.files.keys() if now.get(s) != self.files.get(s)}
+        return self.reload(stems) if stems else None
+
+
+# -------------------------------------------------------------------
+# Watching
+# -------------------------------------------------------------------
+def _inotify(path: Path) -> int | None:
+    """A non-blocking inotify fd watching path, or None where inotify isn't available."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _events(data: bytes):
+    """(mask, name) for each inotify_event in a read() buffer."""
+    pos = 0
+    while pos + _EVENT.size <= len(data):
+        _, mask, _, size = _EVENT.unpack_from(data, pos)
+        pos += _EVENT.size
+        yield mask, data[pos:pos + size].rstrip(b"\0").decode(errors="replace")
+        pos += size
+
+
+class CourseWatcher(threading.Thread):
+    """
+    Feeds file changes in live.courses_dir to live.reload().  Changes are
+    collected until debounce seconds pass without another one (at most
+    max_delay seconds), then reloaded together.  Without inotify, or if the
+    watch is lost, the directory is rescanned every interval seconds.
+    """
+
+    def __init__(self, live: LiveCatalog, interval: float = 5.0, debounce: float = 0.5,
+                 max_delay: float = 5.0, use_inotify: bool = True):
+        super().__init__(name="course-watcher", daemon=True)
+        self.live = live
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.use_inotify = use_inotify
+        self.mode = "stopped"
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self) -> None:
+        fd = _inotify(self.live.courses_dir) if self.use_inotify else None
+        if fd is not None:
+            self.mode = "inotify"
+            try:
+                self._watch(fd)
+            finally:
+                os.close(fd)
+        if not self._stopping.is_set():
+            self.mode = "poll"
+            self._poll()
+        self.mode = "stopped"
+
+    def _apply(self, fn, *args) -> None:
+        try:
+            fn(*args)
+        except Exception:
+            # a bad file must not kill the watcher; the current version keeps serving
+            logger.exception("Catalog reload failed")
+
+    def _poll(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self._apply(self.live.resync)
+
+    def _watch(self, fd: int) -> None:
+        pending: set[str] = set()
+        first = last = 0.0
+        while not self._stopping.is_set():
+            timeout = min(self.debounce, self.interval) if pending else self.interval
+            ready, _, _ = select.select([fd], [], [], timeout)
+            now = time.monotonic()
+            if ready:
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b""
+                for mask, name in _events(data):
+                    if mask & IN_Q_OVERFLOW:
+                        self._apply(self.live.resync)    # events were dropped: compare everything
+                        continue
+                    if mask & (IN_IGNORED | IN_DELETE_SELF):
+                        logger.warning(f"Lost the inotify watch on {self.live.courses_dir}; polling instead")
+                        return
+                    stem, ext = os.path.splitext(name)
+                    if ext == ".json" and is_course_stem(stem):
+                        if not pending:
+                            first = now
+                        pending.add(stem)
+                        last = now
+            if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                stems, pending = pending, set()
+                self._apply(self.live.reload, stems)
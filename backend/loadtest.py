@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+loadtest.py – replay a mix of roadmap traffic against the backend
+
+Request kinds (weights set with --mix):
+  list     GET  /api/courses?format=ndjson        full catalog, body read to the end
+  search   GET  /api/courses/query?...            random subject/level/sort filters
+  lookup   GET  /api/courses/<id>/offerings       random course
+  plan     POST /api/plan/validate                random 3-term plan
+
+Closed loop by default (each of -c workers sends as fast as answers come
+back); --rate switches to an open loop paced at that many requests/s across
+all workers.  The open loop's schedule is fixed in advance and latency is
+timed from each request's scheduled send, so a server that falls behind
+shows its queueing delay instead of slowing the schedule down.  Results are printed and saved as JSON so runs against
+different server modes or catalog sizes can be compared with --compare.
+
+Usage:
+  python loadtest.py --start -c 16 -d 30                  # start app.py, 16 workers, 30 s
+  python loadtest.py --url http://127.0.0.1:5000 --rate 200 --mix search=5,lookup=4,plan=1
+  python loadtest.py --start --server-cmd "gunicorn -w 4 -b 127.0.0.1:5000 app:app" --label gunicorn
+  python loadtest.py --compare results/a.json results/b.json
+"""
+from __future__ import annotations
+import sys
+import json
+import time
+import random
+import shlex
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+from catalog import COURSES_DIR, course_files
+
+RESULTS_DIR = COURSES_DIR.parent / "loadtest"
+DEFAULT_MIX = {"list": 1, "search": 40, "lookup": 40, "plan": 19}
+SEARCH_SORTS = ("-gpa", "gpa", "-enrollment", "number", None)
+PLAN_TERMS = ("Fall 2025", "Spring 2026", "Fall 2026")
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown request kind '{kind}'")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_ms: list[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))]
+
+
+# -------------------------------------------------------------------
+# Traffic
+# -------------------------------------------------------------------
+class Traffic:
+    """Builds random requests from the local course ids."""
+
+    def __init__(self, base: str, seed: int | None = None):
+        self.base = base.rstrip("/")
+        self.ids = [p.stem for p in course_files() if p.stem.rpartition("_")[2].isdigit()]
+        self.subjects = sorted({cid.rsplit("_", 1)[0] for cid in self.ids})
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def make(self, kind: str) -> tuple[str, str, dict | None]:
+        with self._lock:   # random.Random isn't meant to be shared unlocked
+            rng = self.rng
+            if kind == "list":
+                return "GET", f"{self.base}/api/courses?format=ndjson", None
+            if kind == "search":
+                params = [f"subject={rng.choice(self.subjects)}"]
+                if rng.random() < 0.5:
+                    params.append(f"level={rng.choice((100, 200, 300, 400, 500))}")
+                if (sort := rng.choice(SEARCH_SORTS)):
+                    params.append(f"sort={sort}")
+                params.append("facets=level,credits")
+                return "GET", f"{self.base}/api/courses/query?{'&'.join(params)}", None
+            if kind == "lookup":
+                return "GET", f"{self.base}/api/courses/{rng.choice(self.ids)}/offerings", None
+            plan = {t: rng.sample(self.ids, 4) for t in PLAN_TERMS}
+            return "POST", f"{self.base}/api/plan/validate", {"completed": rng.sample(self.ids, 6), "planned": plan}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.statuses: dict[str, int] = {}
+        self.per_second: dict[int, int] = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, ms: float, status: int | str, nbytes: int, t: float) -> None:
+        with self._lock:
+            self.samples.setdefault(kind, []).append(ms)
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if not (isinstance(status, int) and status < 400):
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            self.per_second[int(t)] = self.per_second.get(int(t), 0) + 1
+            self.bytes += nbytes
+
+    def summary(self, seconds: float) -> dict:
+        kinds = {}
+        everything: list[float] = []
+        for kind, ms in self.samples.items():
+            ms = sorted(ms)
+            everything.extend(ms)
+            kinds[kind] = self._stats(ms, self.errors.get(kind, 0), seconds)
+        everything.sort()
+        return {
+            "total": self._stats(everything, sum(self.errors.values()), seconds),
+            "kinds": kinds,
+            "statuses": self.statuses,
+            "bytes": self.bytes,
+            "throughput_per_second": [self.per_second[k] for k in sorted(self.per_second)],
+        }
+
+    @staticmethod
+    def _stats(ms: list[float], errors: int, seconds: float) -> dict:
+        n = len(ms)
+        return {
+            "requests": n,
+            "errors": errors,
+            "error_rate": round(errors / n, 4) if n else 0.0,
+            "rps": round(n / seconds, 1) if seconds else 0.0,
+            "p50": round(percentile(ms, 0.50), 2),
+            "p90": round(percentile(ms, 0.90), 2),
+            "p95": round(percentile(ms, 0.95), 2),
+            "p99": round(percentile(ms, 0.99), 2),
+            "max": round(ms[-1], 2) if ms else 0.0,
+        }
+
+
+# -------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------
+def run(traffic: Traffic, mix: dict[str, float], concurrency: int, duration: float,
+        rate: float | None = None, total: int | None = None, timeout: float = 60) -> tuple[Recorder, float]:
+    kinds, weights = zip(*mix.items())
+    recorder = Recorder()
+    stop = time.monotonic() + duration
+    lock = threading.Lock()
+    state = {"sent": 0, "next": time.monotonic()}
+    interval = 1.0 / rate if rate else 0.0
+
+    def claim() -> float | None:
+        """Take the next request slot (honours -n, --duration and --rate); its scheduled send time."""
+        with lock:
+            if (total is not None and state["sent"] >= total) or time.monotonic() >= stop or state["next"] >= stop:
+                return None
+            state["sent"] += 1
+            slot = state["next"]
+            state["next"] = slot + interval    # fixed schedule: a late send doesn't push the next one back
+        if (delay := slot - time.monotonic()) > 0:
+            time.sleep(delay)
+        return slot
+
+    def worker(pick: Callable[[], str]) -> None:
+        session = requests.Session()
+        while (slot := claim()) is not None:
+            kind = pick()
+            method, url, body = traffic.make(kind)
+            t0 = slot if rate else time.monotonic()
+            try:
+                r = session.request(method, url, json=body, timeout=timeout)
+                nbytes, status = len(r.content), r.status_code
+            except requests.RequestException as e:
+                nbytes, status = 0, type(e).__name__
+            recorder.add(kind, (time.monotonic() - t0) * 1000, status, nbytes, time.time())
+
+    picks = [random.Random(traffic.rng.random()) for _ in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(lambda r=r: r.choices(kinds, weights)[0],), daemon=True)
+               for r in picks]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder, time.monotonic() - t0
+
+
+def start_server(cmd: str, url: str, wait: float = 120) -> subprocess.Popen:
+    proc = subprocess.Popen(shlex.split(cmd), cwd=Path(__file__).resolve().parent,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"Server exited with code {proc.returncode}: {cmd}")
+        try:
+            if requests.get(f"{url}/api/terms", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    sys.exit(f"Server did not answer at {url} within {wait:.0f} s")
+
+
+# -------------------------------------------------------------------
+# Reports
+# -------------------------------------------------------------------
+def print_summary(summary: dict) -> None:
+    cols = ("requests", "rps", "error_rate", "p50", "p90", "p95", "p99", "max")
+    print(f"{'kind':<8}" + "".join(f"{c:>11}" for c in cols))
+    for kind, s in sorted(summary["kinds"].items()) + [("total", summary["total"])]:
+        print(f"{kind:<8}" + "".join(f"{s[c]:>11}" for c in cols))
+    print(f"statuses: {summary['statuses']}")
+
+
+def compare(paths: list[Path]) -> None:
+    runs = [json.loads(p.read_text(encoding="utf-8")) for p in paths]
+    print(f"{'':<14}" + "".join(f"{r['config']['label'] or p.stem:>20}" for r, p in zip(runs, paths)))
+    kinds = sorted({k for r in runs for k in r["summary"]["kinds"]}) + ["total"]
+    for kind in kinds:
+        for metric in ("rps", "p50", "p95", "p99", "error_rate"):
+            vals = []
+            for r in runs:
+                s = r["summary"]["total"] if kind == "total" else r["summary"]["kinds"].get(kind)
+                vals.append(s[metric] if s else "-")
+            print(f"{kind + ' ' + metric:<14}" + "".join(f"{v:>20}" for v in vals))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="loadtest.py", description="Load-test the backend API")
+    p.add_argument("--url", default="http://127.0.0.1:5000")
+    p.add_argument("--start", action="store_true", help="start the server first and stop it afterwards")
+    p.add_argument("--server-cmd", default=f"{shlex.quote(sys.executable)} app.py", help="command for --start")
+    p.add_argument("-c", "--concurrency", type=int, default=8, help="worker threads (default 8)")
+    p.add_argument("-d", "--duration", type=float, default=30, help="seconds (default 30)")
+    p.add_argument("-n", "--requests", type=int, help="stop after this many requests")
+    p.add_argument("--rate", type=float, help="open loop: total requests per second")
+    p.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. list=1,search=40,lookup=40,plan=19")
+    p.add_argument("--seed", type=int, help="seed for reproducible traffic")
+    p.add_argument("--label", default="", help="name for this run (server mode, catalog size, ...)")
+    p.add_argument("--out", type=Path, help=f"result file (default {RESULTS_DIR}/<time>-<label>.json)")
+    p.add_argument("--compare", nargs="+", type=Path, metavar="RESULT", help="compare saved results and exit")
+    args = p.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    server = start_server(args.server_cmd, args.url) if args.start else None
+    try:
+        traffic = Traffic(args.url, args.seed)
+        print(f"{args.concurrency} workers, mix {args.mix}, "
+              f"{'rate ' + str(args.rate) + '/s' if args.rate else 'closed loop'}, {args.duration:.0f} s")
+        recorder, seconds = run(traffic, args.mix, args.concurrency, args.duration, args.rate, args.requests)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    summary = recorder.summary(seconds)
+    print_summary(summary)
+    out = args.out or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}{'-' + args.label if args.label else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    config["courses"] = len(traffic.ids)
+    out.write_text(json.dumps({"config": config, "seconds": round(seconds, 2), "summary": summary},
+                              indent=2, default=str), encoding="utf-8")
+    print(f"Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+pathways.py – minimum terms to eligibility and cheapest prerequisite chains
+
+For every course, a dynamic program over the compiled prerequisite ASTs
+(prereqs.PrereqGraph) computes how many terms a student starting from
+nothing needs before they can take it, plus the set of courses on the
+cheapest way there:
+
+  course leaf   the best of its listed ids, each needing its own terms + 1
+  OR            the branch with the fewest terms (then the fewest courses)
+  AND           the slowest child's terms, the union of the children's chains
+
+Prerequisite graphs have cycles (COMPSCI_300 lists "placement into COMP SCI
+300"; cross-listed alternatives point at each other), so the values are a
+fixpoint: every course starts unreachable and passes relax it until nothing
+improves.  Text conditions cost no terms but are an escape hatch: an OR takes
+a text-only branch ("graduate/professional standing", consent) only when none
+of its branches can be met with courses, and any answer that leans on text is
+reported as conditional.  A course that isn't in the catalog (retired, or
+never downloaded) is the same kind of escape hatch: it can't be planned, so
+it only counts when no catalog course in its place can be met.  Which courses
+can be met at all is settled first, so an OR never settles on its escape
+hatch while a course branch it will be able to use just hasn't been relaxed
+yet (the answer would then depend on the order courses are visited in).
+
+A query seeded with completed courses only re-relaxes the courses that are
+both prerequisites of the target and dependents of something completed.
+After a catalog change, apply() likewise only solves the changed courses and
+everything that depends on them again.
+"""
+from __future__ import annotations
+from collections import deque
+
+from prereqs import Node, PrereqGraph
+
+INF = 1 << 30
+Value = tuple[int, frozenset, bool]      # (terms until completed, courses taken to get there, conditional)
+UNREACHABLE: Value = (INF, frozenset(), False)
+NOTHING: Value = (0, frozenset(), False)
+
+
+def _better(a: tuple, b: tuple) -> bool:
+    return (a[0], len(a[1]), a[2]) < (b[0], len(b[1]), b[2])
+
+
+class Pathways:
+    def __init__(self, graph: PrereqGraph, credits: dict[str, tuple[int, int]] | None = None):
+        self.graph = graph
+        self.credits = credits or {}
+        # process low course numbers first: prerequisites usually are, so most
+        # values settle in the first pass
+        self.order = sorted(graph.ast, key=lambda c: (c.rpartition("_")[2].zfill(4), c))
+        self.reach: set[str] = set()
+        self.values = self._solve(self.order, {}, None, self.reach)
+
+    def apply(self, graph: PrereqGraph, changed: set[str],
+              credits: dict[str, tuple[int, int]] | None = None) -> "Pathways":
+        """
+        Pathways over graph, the result of self.graph.apply() with changed
+        recompiled.  Values can get worse as well as better after an edit,
+        so the changed courses and every dependent (in either graph) restart
+        unreachable; values outside that cone can't depend on it and are
+        kept.
+        """
+        new = Pathways.__new__(Pathways)
+        new.graph = graph
+        new.credits = self.credits if credits is None else credits
+        new.order = sorted(graph.ast, key=lambda c: (c.rpartition("_")[2].zfill(4), c))
+        cone = self._descendants(changed) | new._descendants(changed)
+        values = {c: v for c, v in self.values.items() if c in graph.ast and c not in cone}
+        new.reach = {c for c in self.reach if c in graph.ast and c not in cone}
+        work = [c for c in new.order if c in cone]
+        new.values = new._solve(work, values, None, new.reach)
+        return new
+
+    # ---------------------------------------------------------------
+    # DP
+    # ---------------------------------------------------------------
+    def _done(self, cid: str, values: dict[str, Value], fallback: dict[str, Value] | None) -> Value:
+        v = values.get(cid)
+        if v is None and fallback is not None:
+            v = fallback.get(cid)
+        return UNREACHABLE if v is None else v
+
+    def _reachable(self, node: Node, reach: set[str]) -> bool:
+        """Whether node can be met once every course in reach can be taken."""
+        kind = node[0]
+        if kind == "COURSE":
+            # a course missing from the catalog is an escape hatch, met like a text condition
+            return any(c in reach or c not in self.graph.ast for c in node[1])
+        if kind == "TEXT":
+            return True
+        if kind == "AND":
+            return all(self._reachable(c, reach) for c in node[1])
+        return any(self._reachable(c, reach) for c in node[1])
+
+    def _eval(self, node: Node, values: dict[str, Value], fallback: dict[str, Value] | None,
+              reach: set[str]) -> tuple:
+        """(terms, chain, conditional, text only) for a prerequisite node."""
+        kind = node[0]
+        if kind == "COURSE":
+            best = UNREACHABLE
+            known = [c for c in node[1] if c in self.graph.ast]
+            for cid in sorted(known):       # sorted: ties resolve the same every run
+                v = self._done(cid, values, fallback)
+                if _better(v, best):
+                    best = v
+            if best[0] < INF or len(known) == len(node[1]) or any(c in reach for c in known):
+                return (*best, False)
+            # only courses outside the catalog can meet it: conditional, and
+            # an OR prefers any branch it can meet with catalog courses
+            return 1, frozenset(), True, True
+        if kind == "TEXT":
+            return 0, frozenset(), True, True
+        if kind == "AND":
+            terms, chain, conditional, text_only = 0, frozenset(), False, True
+            for child in node[1]:
+                v = self._eval(child, values, fallback, reach)
+                if v[0] >= INF:
+                    return (*UNREACHABLE, False)
+                terms = max(terms, v[0])
+                chain |= v[1]
+                conditional |= v[2]
+                text_only &= v[3]
+            return terms, chain, conditional, text_only
+        best = escape = (*UNREACHABLE, False)
+        pending = False
+        for child in node[1]:
+            v = self._eval(child, values, fallback, reach)
+            if v[3]:
+                if _better(v, escape):
+                    escape = v
+            elif _better(v, best):
+                best = v
+            elif v[0] >= INF and not pending:
+                pending = self._reachable(child, reach)
+        if best[0] < INF:
+            return best
+        # a course branch that can be met but isn't relaxed yet: wait for it
+        return (*UNREACHABLE, False) if pending else escape
+
+    def _solve(self, work: list[str], values: dict[str, Value], fallback: dict[str, Value] | None,
+               reach: set[str]) -> dict[str, Value]:
+        """
+        Relax the courses in work, starting unreachable, until no value
+        improves.  values holds overrides (completed courses) and results;
+        anything else is read from fallback, a solution that is still valid
+        outside work.  reach holds the reachable courses outside work and
+        gains those in it.
+        """
+        changed = True
+        while changed:
+            changed = False
+            for cid in work:
+                if cid not in reach and self._reachable(self.graph.ast[cid], reach):
+                    reach.add(cid)
+                    changed = True
+
+        for cid in work:
+            values.setdefault(cid, UNREACHABLE)
+        changed = True
+        while changed:
+            changed = False
+            for cid in work:
+                terms, chain, conditional, _ = self._eval(self.graph.ast[cid], values, fallback, reach)
+                if terms >= INF:
+                    continue
+                v = (terms + 1, chain | {cid}, conditional)
+                if _better(v, values[cid]):
+                    values[cid] = v
+                    changed = True
+
+        # terms are final now, but a chain kept from an earlier pass may not be
+        # the one the final values give (unions of chains aren't monotone);
+        # settle each from its prerequisites, which all need fewer terms
+        for cid in sorted(work, key=lambda c: values[c][0]):
+            if values[cid][0] < INF:
+                terms, chain, conditional, _ = self._eval(self.graph.ast[cid], values, fallback, reach)
+                values[cid] = (terms + 1, chain | {cid}, conditional)
+        return values
+
+    # ---------------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------------
+    def _ancestors(self, cid: str) -> set[str]:
+        seen = {cid}
+        queue = deque([cid])
+        while queue:
+            for ref in self.graph.refs.get(queue.popleft(), ()):
+                if ref not in seen and ref in self.graph.ast:
+                    seen.add(ref)
+                    queue.append(ref)
+        return seen
+
+    def _descendants(self, roots: set[str]) -> set[str]:
+        seen = set(roots)
+        queue = deque(roots)
+        while queue:
+            for dep in self.graph.dependents.get(queue.popleft(), ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+        return seen
+
+    def _report(self, cid: str, value: Value, levels: dict[str, Value]) -> dict:
+        terms, chain, conditional = value
+        if terms >= INF:
+            return {"course": cid, "reachable": False}
+        prereqs = sorted(chain - {cid}, key=lambda c: (levels.get(c, (1,))[0], c))
+        # the chain as a schedule: each course in the term right after its own prerequisites
+        schedule: list[list[str]] = [[] for _ in range(terms - 1)]
+        for c in prereqs:
+            schedule[min(levels.get(c, (1,))[0], terms - 1) - 1].append(c)
+        return {
+            "course": cid,
+            "reachable": True,
+            "conditional": conditional,
+            "terms_before": terms - 1,          # terms of prerequisites before it can be taken
+            "chain": prereqs,
+            "chain_credits": sum(self.credits.get(c, (0, 0))[0] for c in prereqs),
+            "schedule": schedule,
+        }
+
+    def eligibility(self, cid: str) -> dict | None:
+        """Precomputed answer for a student with no courses."""
+        if cid not in self.graph.ast:
+            return None
+        return self._report(cid, self.values[cid], self.values)
+
+    def query(self, cid: str, completed: set[str]) -> dict | None:
+        """
+        eligibility() for a student who has completed some courses.  Only the
+        target's prerequisites that depend on a completed course are relaxed
+        again; everything else keeps its precomputed value.
+        """
+        if cid not in self.graph.ast:
+            return None
+        completed = {self.graph.resolve(c) for c in completed}
+        if not completed:
+            return self.eligibility(cid)
+        if cid in completed:
+            return {"course": cid, "reachable": True, "completed": True}
+        affected = (self._ancestors(cid) & self._descendants(completed)) - completed
+        work = [c for c in self.order if c in affected]
+        values = self._solve(work, {c: NOTHING for c in completed}, self.values, self.reach | completed)
+        report = self._report(cid, values.get(cid) or self.values[cid], {**self.values, **values})
+        report["relaxed"] = len(work)
+        return report
@@ -0,0 +1,280 @@
+"""
+plan.py – server-side validation of a student's course plan
+
+A plan is an ordered list of terms, each with the courses planned for it,
+plus the courses already completed.  Validation checks every planned course's
+prerequisites against what is taken in earlier terms and sums credits per
+term.  The resulting PlanState is cached under an id so an edit ("move X from
+A to B") only re-checks X and the planned courses whose prerequisites
+mention X, instead of the whole plan.
+"""
+from __future__ import annotations
+import copy
+import uuid
+import threading
+from collections import OrderedDict
+
+from catalog import credit_range
+from prereqs import PrereqGraph
+from term_index import TermIndex, decode_term, parse_term
+
+DEFAULT_MAX_CREDITS = 18
+COMPLETED = -1          # rank of completed courses: before every planned term
+EDIT_OPS = {"move": ("from", "to"), "add": ("to",), "remove": ("from",)}   # op -> its term keys
+
+
+class PlanError(ValueError):
+    """Malformed plan or edit; reported to the client as a 400."""
+
+
+def _code(entry: object) -> str:
+    # the roadmap sends course objects ({"code": ..., ...}), scripts send strings
+    if isinstance(entry, dict):
+        entry = entry.get("code") or entry.get("course")
+    if not isinstance(entry, str) or not entry.strip():
+        raise PlanError(f"Invalid course entry: {entry!r}")
+    return entry
+
+
+def _courses_by_term(value: object) -> list[tuple[str, list]]:
+    """Accept {"Fall 2025": [...]} or [{"term": "Fall 2025", "courses": [...]}]."""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return list(value.items())
+    if isinstance(value, list) and all(isinstance(t, dict) and "term" in t for t in value):
+        return [(t["term"], t.get("courses") or []) for t in value]
+    if isinstance(value, list):
+        return [("", value)]
+    raise PlanError("Expected a term -> courses mapping or a list of terms")
+
+
+class PlanState:
+    def __init__(self, graph: PrereqGraph, credits: dict[str, tuple[int, int]],
+                 terms: TermIndex | None = None, max_credits: int = DEFAULT_MAX_CREDITS):
+        self.graph = graph
+        self.credits = credits
+        self.term_index = terms
+        self.max_credits = max_credits
+        self.terms: list[tuple[str, str | None]] = []   # (label, term code), in order
+        self.term_courses: list[list[str]] = []
+        self.rank: dict[str, int] = {}                  # course id -> term position
+        self.results: dict[tuple[str, int], dict] = {}   # (course id, term position) -> check
+        self.version = 0
+
+    # ---------------------------------------------------------------
+    # Building
+    # ---------------------------------------------------------------
+    @classmethod
+    def from_payload(cls, payload: dict, graph: PrereqGraph, credits: dict[str, tuple[int, int]],
+                     terms: TermIndex | None = None) -> "PlanState":
+        try:
+            max_credits = int(payload.get("max_credits") or DEFAULT_MAX_CREDITS)
+        except (TypeError, ValueError):
+            raise PlanError(f"Invalid max_credits: {payload.get('max_credits')!r}") from None
+        state = cls(graph, credits, terms, max_credits)
+        for _, courses in _courses_by_term(payload.get("completed")):
+            for c in courses:
+                state.rank[graph.resolve(_code(c))] = COMPLETED
+
+        planned = []
+        for label, courses in _courses_by_term(payload.get("planned") or payload.get("terms")):
+            try:
+                code = parse_term(label)
+            except ValueError:
+                code = None
+            planned.append((label, code, courses))
+        # terms with a recognizable name go in calendar order, others keep their position
+        if all(code for _, code, _ in planned):
+            planned.sort(key=lambda t: t[1])
+
+        state.terms = [(label, code) for label, code, _ in planned]
+        state.term_courses = [[] for _ in planned]
+        for i, (_, _, courses) in enumerate(planned):
+            for c in courses:
+                state.term_courses[i].append(graph.resolve(_code(c)))
+        state.full_check()
+        return state
+
+    def copy(self) -> "PlanState":
+        """A copy that edits can be applied to without touching this state."""
+        new = copy.copy(self)
+        new.term_courses = [list(courses) for courses in self.term_courses]
+        new.rank = dict(self.rank)
+        new.results = dict(self.results)
+        return new
+
+    def term_position(self, label: str) -> int:
+        for i, (name, code) in enumerate(self.terms):
+            if name == label:
+                return i
+        try:
+            code = parse_term(label)
+        except ValueError:
+            code = None
+        for i, (_, c) in enumerate(self.terms):
+            if code and c == code:
+                return i
+        raise PlanError(f"Unknown term '{label}'")
+
+    # ---------------------------------------------------------------
+    # Checking
+    # ---------------------------------------------------------------
+    def _reindex(self) -> None:
+        self.rank = {cid: r for cid, r in self.rank.items() if r == COMPLETED}
+        for i, courses in enumerate(self.term_courses):
+            for cid in courses:
+                self.rank.setdefault(cid, i)
+
+    def check_course(self, cid: str, pos: int) -> dict:
+        label, code = self.terms[pos]
+        result: dict = {"course": cid, "term": label}
+        if cid not in self.graph.ast:
+            result["status"] = "unknown_course"
+            return result
+        if self.rank.get(cid) == COMPLETED:
+            result["status"] = "already_completed"
+            return result
+        if self.rank.get(cid) != pos:
+            result["status"] = "duplicate"
+            return result
+        result.update(self.graph.check(cid, self.rank, pos))
+        if code and self.term_index:
+            offering = self.term_index.offering(cid)
+            season = offering and offering["seasons"].get(decode_term(code)[1])
+            if season and season["possible"] and not season["offered"]:
+                result["not_offered_in_season"] = True
+        return result
+
+    def full_check(self) -> None:
+        self._reindex()
+        self.results = {}
+        for pos, courses in enumerate(self.term_courses):
+            for cid in courses:
+                self.results[(cid, pos)] = self.check_course(cid, pos)
+
+    def recheck(self, cids: set[str]) -> None:
+        """Re-evaluate only the given courses and everything planned that depends on them."""
+        cone = set(cids)
+        for cid in cids:
+            cone |= self.graph.dependents.get(cid, set())
+        for pos, courses in enumerate(self.term_courses):
+            for cid in courses:
+                if cid in cone:
+                    self.results[(cid, pos)] = self.check_course(cid, pos)
+
+    # ---------------------------------------------------------------
+    # Edits
+    # ---------------------------------------------------------------
+    def apply(self, edit: dict) -> None:
+        """
+        One of:
+          {"op": "move", "course": X, "from": A, "to": B}
+          {"op": "add", "course": X, "to": B}
+          {"op": "remove", "course": X, "from": A}
+        """
+        if not isinstance(edit, dict):
+            raise PlanError(f"Invalid edit: {edit!r}")
+        op = edit.get("op", "move")
+        if op not in EDIT_OPS:
+            raise PlanError(f"Unknown edit op '{op}'")
+        for key in EDIT_OPS[op]:
+            if not isinstance(edit.get(key), str):
+                raise PlanError(f"A '{op}' edit needs a \"{key}\" term")
+        cid = self.graph.resolve(_code(edit.get("course")))
+        src = self.term_position(edit["from"]) if op in ("move", "remove") else None
+        dst = self.term_position(edit["to"]) if op in ("move", "add") else None
+
+        if src is not None:
+            if cid not in self.term_courses[src]:
+                raise PlanError(f"{cid} is not planned in {self.terms[src][0]}")
+            self.term_courses[src].remove(cid)
+            self.results.pop((cid, src), None)
+        if dst is not None:
+            self.term_courses[dst].append(cid)
+
+        # the course's own rank changes; a duplicate elsewhere may now become the first copy
+        if self.rank.get(cid) != COMPLETED:
+            self.rank.pop(cid, None)
+            for pos, courses in enumerate(self.term_courses):
+                if cid in courses:
+                    self.rank[cid] = pos
+                    break
+        self.version += 1
+        self.recheck({cid})
+
+    # ---------------------------------------------------------------
+    # Report
+    # ---------------------------------------------------------------
+    def term_credits(self, pos: int) -> dict:
+        lo = hi = 0
+        for cid in self.term_courses[pos]:
+            c = self.credits.get(cid)
+            if c:
+                lo += c[0]
+                hi += c[1]
+        return {"min": lo, "max": hi, "overload": lo > self.max_credits}
+
+    def report(self) -> dict:
+        terms = []
+        violations = []
+        for pos, (label, code) in enumerate(self.terms):
+            courses = [self.results[(cid, pos)] for cid in self.term_courses[pos]]
+            credits = self.term_credits(pos)
+            terms.append({"term": label, "code": code, "credits": credits, "courses": courses})
+            violations.extend(c for c in courses if c["status"] not in ("ok", "conditional"))
+            if credits["overload"]:
+                violations.append({"term": label, "status": "credit_overload",
+                                   "credits": credits["min"], "max_credits": self.max_credits})
+        return {
+            "version": self.version,
+            "valid": not violations,
+            "terms": terms,
+            "violations": violations,
+            "total_credits": {
+                "min": sum(t["credits"]["min"] for t in terms),
+                "max": sum(t["credits"]["max"] for t in terms),
+            },
+        }
+
+
+class PlanValidator:
+    """Owns the catalog-wide graph and an LRU of live plan states keyed by plan id."""
+
+    def __init__(self, courses: dict[str, dict], terms: TermIndex | None = None, max_plans: int = 1024,
+                 graph: PrereqGraph | None = None, previous: "PlanValidator | None" = None):
+        """previous: the validator of an older catalog version, whose plans this one takes over."""
+        self.graph = graph or PrereqGraph(courses)
+        self.credits = {cid: c for cid, rec in courses.items() if (c := credit_range(rec))}
+        self.terms = terms
+        self.max_plans = max_plans
+        self._plans: OrderedDict[str, PlanState] = previous._plans if previous else OrderedDict()
+        self._lock = previous._lock if previous else threading.Lock()
+
+    def validate(self, payload: dict) -> dict:
+        if "plan_id" in payload:
+            return self.edit(payload["plan_id"], payload.get("edits") or [payload.get("edit") or payload])
+        state = PlanState.from_payload(payload, self.graph, self.credits, self.terms)
+        plan_id = uuid.uuid4().hex
+        with self._lock:
+            self._plans[plan_id] = state
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return {"plan_id": plan_id, **state.report()}
+
+    def edit(self, plan_id: str, edits: list[dict]) -> dict:
+        with self._lock:
+            state = self._plans.get(plan_id)
+            if state is None:
+                raise KeyError(plan_id)
+            self._plans.move_to_end(plan_id)
+            # edits go to a copy, swapped in only if all of them apply
+            state = state.copy()
+            if state.graph is not self.graph:
+                # made against another catalog version: check it all again first
+                state.graph, state.credits, state.term_index = self.graph, self.credits, self.terms
+                state.full_check()
+            for e in edits:
+                state.apply(e)
+            self._plans[plan_id] = state
+            return {"plan_id": plan_id, **state.report()}
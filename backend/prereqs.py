@@ -0,0 +1,324 @@
+"""
+prereqs.py – compiled prerequisite ASTs and the course dependency graph
+
+prerequisites.abstract_syntax_tree mixes {"operator", "children"} nodes,
+{course_number, subjects} course references and free-text leaves
+("Consent of instructor", "Junior standing").  Each AST is compiled once into
+tuples whose course leaves are frozensets of catalog ids, so evaluating a
+course against a student's history is a few set lookups.
+
+Compiled node forms:
+  ("AND", (child, ...))   ("OR", (child, ...))
+  ("COURSE", frozenset(ids), label)
+  ("TEXT", text)           condition we can't check from course history
+
+Some text leaves are course references in disguise ("COMP SCI 367",
+"302" after a list of COMP SCI courses, "E ASIAN 102 prior to Fall 2019").
+TextLeafResolver rewrites those into course references once, at ingest, and
+stores the result as prerequisites.resolved_ast, which the graph prefers.
+"""
+from __future__ import annotations
+import re
+
+# text leaves that carry no requirement at all
+_NEUTRAL_TEXT = {"", ".", "none"}
+_CODE = re.compile(r"^\s*([A-Za-z&][A-Za-z&\s]*?)\s*[_\s]?\s*(\d{1,4})\s*$")
+# "COMP SCI 367", "367", "E ASIAN 102 prior to Fall 2019", "POLI SCI 103 taken prior to fall 2017."
+_TEXT_REF = re.compile(
+    r"^\s*(?:(?P<subject>[A-Za-z&][A-Za-z&.\s]*?)[\s_]+)?(?P<number>\d{2,3})"
+    r"(?:\s+(?:taken\s+)?(?:prior\s+to|before)\s+(?:fall|spring|summer)\s+\d{4})?\s*\.?\s*$",
+    re.IGNORECASE,
+)
+
+Node = tuple
+TRUE: Node = ("AND", ())
+
+def normalize_code(code: str) -> str:
+    """'compsci 577', 'COMP SCI 577', 'COMPSCI_577' -> 'COMPSCI_577'"""
+    m = _CODE.match(code)
+    if not m:
+        return code.strip().upper()
+    subject = re.sub(r"\s+", "", m.group(1)).upper()
+    return f"{subject}_{int(m.group(2))}"
+
+def ref_codes(ref: dict) -> list[str]:
+    return [f"{s}_{ref['course_number']}" for s in ref.get("subjects") or ()]
+
+
+class PrereqGraph:
+    """
+    Catalog-wide prerequisite structure, built once:
+      alias       every SUBJ_num a course is listed under -> catalog id
+      ast         catalog id -> compiled prerequisite node
+      dependents  catalog id -> ids whose prerequisites mention it
+    """
+
+    def __init__(self, courses: dict[str, dict]):
+        self.alias: dict[str, str] = {}
+        for cid, record in courses.items():
+            for code in ref_codes(record["course_reference"]):
+                self.alias.setdefault(code, cid)
+        # a file's own stem always wins over a cross-listing alias
+        for cid in courses:
+            self.alias[cid] = cid
+
+        self.ast: dict[str, Node] = {}
+        self.refs: dict[str, frozenset[str]] = {}
+        self.dependents: dict[str, set[str]] = {}
+        for cid, record in courses.items():
+            self._add(cid, record)
+
+    def _add(self, cid: str, record: dict, shared: bool = False) -> None:
+        """Compile cid; shared: dependents sets may belong to another graph too, replace them."""
+        prereqs = record.get("prerequisites") or {}
+        raw = prereqs.get("resolved_ast") or prereqs.get("abstract_syntax_tree")
+        node = self.compile(raw)
+        self.ast[cid] = node
+        self.refs[cid] = frozenset(course_leaves(node))
+        for dep in self.refs[cid]:
+            if shared:
+                self.dependents[dep] = self.dependents.get(dep, set()) | {cid}
+            else:
+                self.dependents.setdefault(dep, set()).add(cid)
+
+    def _drop(self, cid: str) -> None:
+        """Forget cid's compiled AST; like _add(shared=True), replaces dependents sets."""
+        for dep in self.refs.pop(cid, ()):
+            dependents = self.dependents[dep] = self.dependents[dep] - {cid}
+            if not dependents:
+                del self.dependents[dep]
+        self.ast.pop(cid, None)
+
+    def apply(self, courses: dict[str, dict], changed: set[str]) -> tuple["PrereqGraph", set[str]]:
+        """
+        The graph for courses (the whole new catalog) after the ids in changed
+        were added, replaced or removed; this graph is left as it was.
+
+        Only the changed courses are compiled again, plus the courses whose
+        prerequisites name a code that now points at a different catalog id.
+        Returns the new graph and every id whose compiled AST was rebuilt or
+        removed.
+        """
+        new = PrereqGraph.__new__(PrereqGraph)
+        new.alias = {}
+        for cid, record in courses.items():
+            for code in ref_codes(record["course_reference"]):
+                new.alias.setdefault(code, cid)
+        for cid in courses:
+            new.alias[cid] = cid
+        moved = {code for code in self.alias.keys() | new.alias.keys() if self.alias.get(code) != new.alias.get(code)}
+        recompile = set(changed)
+        for code in moved:
+            for target in (code, self.alias.get(code)):
+                recompile |= self.dependents.get(target, set())
+
+        new.ast = dict(self.ast)
+        new.refs = dict(self.refs)
+        new.dependents = dict(self.dependents)   # the sets are shared: _drop/_add replace them
+        for cid in recompile:
+            new._drop(cid)
+            if cid in courses:
+                new._add(cid, courses[cid], shared=True)
+        return new, recompile
+
+    def resolve(self, code: str) -> str:
+        """Catalog id for any listed form of a course; unknown codes come back normalized."""
+        code = normalize_code(code)
+        return self.alias.get(code, code)
+
+    def compile(self, raw: object) -> Node:
+        if raw is None:
+            return TRUE
+        if isinstance(raw, str):
+            return TRUE if raw.strip().lower() in _NEUTRAL_TEXT else ("TEXT", raw.strip())
+        if "operator" in raw:
+            children = tuple(c for c in map(self.compile, raw.get("children") or ()) if c != TRUE)
+            if not children:
+                return TRUE
+            if len(children) == 1:
+                return children[0]
+            return (raw["operator"].upper(), children)
+        codes = ref_codes(raw)
+        ids = frozenset(self.alias.get(c, c) for c in codes)
+        label = codes[0] if codes else str(raw)
+        return ("COURSE", ids, label)
+
+    def check(self, cid: str, rank: dict[str, int], before: int) -> dict:
+        """
+        Evaluate cid's prerequisites given rank[id] = term index a course is
+        taken in (completed courses: -1); only ranks < before count.
+
+        status is "ok", "conditional" (satisfiable only through text
+        conditions such as consent or standing) or "unmet".
+        """
+        node = self.ast.get(cid, TRUE)
+        if evaluate(node, rank, before, False):
+            return {"status": "ok"}
+        if evaluate(node, rank, before, True):
+            return {"status": "conditional", "conditions": conditions(node, rank, before)}
+        return {"status": "unmet", "missing": missing(node, rank, before)}
+
+
+def _compact(subject: str) -> str:
+    return re.sub(r"[\s.]+", "", subject).upper()
+
+
+class TextLeafResolver:
+    """
+    Turns free-text prerequisite leaves that name a course into
+    {"course_number", "subjects", "text"} references.
+
+    The alias table maps every compacted display form of a subject (code,
+    "COMP SCI" -> COMPSCI, full name) to its code, from subjects.json and the
+    subjects the catalog itself lists.  A bare number takes its subject from
+    the list it sits in ("COMP SCI 200, 220, 302"): one of the subjects of
+    the course before it (or of its siblings, if it comes first), preferring
+    one the course exists under, then the most common in the list.  Results
+    are cached per (text, candidate subjects), so each distinct leaf is
+    matched once.
+    """
+
+    def __init__(self, subjects: dict[str, str], catalog_subjects=(), codes=()):
+        self.alias: dict[str, str] = {}
+        for code, name in subjects.items():
+            self.alias.setdefault(_compact(name), code)
+        for code in [*subjects, *catalog_subjects]:
+            self.alias[_compact(code)] = code
+        self.codes = frozenset(codes)
+        self._cache: dict[tuple[str, tuple[str, ...]], dict | None] = {}
+
+    def match(self, text: str, context: tuple[str, ...] = ()) -> dict | None:
+        key = (text, context)
+        if key not in self._cache:
+            self._cache[key] = self._match(text, context)
+        return self._cache[key]
+
+    def _match(self, text: str, context: tuple[str, ...]) -> dict | None:
+        m = _TEXT_REF.match(text)
+        if not m:
+            return None
+        number = int(m["number"])
+        if m["subject"]:
+            subject = self.alias.get(_compact(m["subject"]))
+        else:
+            subject = next((s for s in context if f"{s}_{number}" in self.codes), context[0] if context else None)
+        if subject is None:
+            return None
+        return {"course_number": number, "subjects": [subject], "text": text.strip()}
+
+    def resolve(self, raw: object, found: list[dict] | None = None) -> object:
+        """
+        raw with course-like text leaves replaced by references; each
+        replacement is also appended to found.  Unchanged subtrees are
+        returned as-is.
+        """
+        if not isinstance(raw, dict) or "operator" not in raw:
+            if isinstance(raw, str):
+                ref = self.match(raw)
+                if ref is not None and found is not None:
+                    found.append(ref)
+                return ref or raw
+            return raw
+        children = []
+        siblings: dict[str, int] = {}
+        for child in raw.get("children") or ():
+            if isinstance(child, dict):
+                for subject in child.get("subjects") or ():
+                    siblings[subject] = siblings.get(subject, 0) + 1
+        ranked = sorted(siblings, key=lambda s: -siblings[s])
+        previous: list[str] = []
+        changed = False
+        for child in raw.get("children") or ():
+            context = tuple(sorted(previous, key=lambda s: -siblings.get(s, 0))) if previous else tuple(ranked)
+            new = self.match(child, context) if isinstance(child, str) else None
+            if new is None:
+                new = child if isinstance(child, str) else self.resolve(child, found)
+            elif found is not None:
+                found.append(new)
+            if isinstance(new, dict) and new.get("subjects"):
+                previous = new["subjects"]
+            changed |= new is not child
+            children.append(new)
+        return {**raw, "children": children} if changed else raw
+
+
+def resolve_text_leaves(courses: dict[str, dict], subjects: dict[str, str], only=None) -> int:
+    """
+    Store prerequisites.resolved_ast (and the references found, as
+    prerequisites.text_references) on every course whose AST has course-like
+    text leaves, or only on the ids in only (freshly re-read records).
+    Returns the number of leaves resolved.
+    """
+    refs = [r["course_reference"] for r in courses.values()]
+    resolver = TextLeafResolver(subjects, {s for ref in refs for s in ref["subjects"]},
+                                {code for ref in refs for code in ref_codes(ref)})
+    total = 0
+    for cid, record in courses.items():
+        if only is not None and cid not in only:
+            continue
+        prereqs = record.get("prerequisites")
+        if not prereqs or not prereqs.get("abstract_syntax_tree"):
+            continue
+        found: list[dict] = []
+        resolved = resolver.resolve(prereqs["abstract_syntax_tree"], found)
+        if found:
+            prereqs["resolved_ast"] = resolved
+            prereqs["text_references"] = [{"course_number": r["course_number"], "subjects": r["subjects"]}
+                                          for r in found]
+            total += len(found)
+    return total
+
+
+def course_leaves(node: Node):
+    kind = node[0]
+    if kind == "COURSE":
+        yield from node[1]
+    elif kind in ("AND", "OR"):
+        for child in node[1]:
+            yield from course_leaves(child)
+
+def _taken(ids: frozenset[str], rank: dict[str, int], before: int) -> bool:
+    for i in ids:
+        if rank.get(i, before) < before:
+            return True
+    return False
+
+def evaluate(node: Node, rank: dict[str, int], before: int, text_ok: bool) -> bool:
+    kind = node[0]
+    if kind == "COURSE":
+        return _taken(node[1], rank, before)
+    if kind == "TEXT":
+        return text_ok
+    # plain loops: this is the hot path of every plan/eligibility check
+    if kind == "AND":
+        for c in node[1]:
+            if not evaluate(c, rank, before, text_ok):
+                return False
+        return True
+    for c in node[1]:
+        if evaluate(c, rank, before, text_ok):
+            return True
+    return False
+
+def missing(node: Node, rank: dict[str, int], before: int) -> list[str]:
+    """Smallest set of course labels that would satisfy node (cheapest OR branch)."""
+    kind = node[0]
+    if kind == "COURSE":
+        return [] if _taken(node[1], rank, before) else [node[2]]
+    if kind == "TEXT":
+        return []
+    parts = [missing(c, rank, before) for c in node[1]]
+    if kind == "AND":
+        return list(dict.fromkeys(x for p in parts for x in p))
+    return min(parts, key=len)
+
+def conditions(node: Node, rank: dict[str, int], before: int) -> list[str]:
+    """Text conditions on the branches that are not already satisfied by courses."""
+    if evaluate(node, rank, before, False):
+        return []
+    kind = node[0]
+    if kind == "TEXT":
+        return [node[1]]
+    if kind == "COURSE":
+        return []
+    return list(dict.fromkeys(x for c in node[1] for x in conditions(c, rank, before)))
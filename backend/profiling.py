@@ -0,0 +1,302 @@
+"""
+profiling.py – opt-in memory and CPU profiling, by phase
+
+A Profiler splits a run into named phases (CLI stages such as "course list"
+and "download", or one phase per API endpoint) and records for each:
+
+  mem   tracemalloc: bytes allocated and not freed, peak traced bytes and
+        RSS, plus the top allocation sites (a snapshot at the end of the
+        phase compared with one at its start, by source line).  Snapshots
+        are dumped for tracemalloc.Snapshot.load().
+  cpu   a cProfile per phase (<phase>.prof, for pstats or snakeviz) and a
+        sampling profiler over every thread (samples.folded, collapsed
+        stacks for flamegraph.pl or speedscope), because cProfile only sees
+        the thread that enabled it and the downloads run on worker threads.
+
+A phase that runs many times (an endpoint) is aggregated: runs, total time,
+largest peak; only its first run is snapshotted, and its cProfile stats are
+summed.  Threads without a phase of their own (pool workers) count toward
+the newest open phase.  finish() writes summary.json next to the profiles
+and returns a table comparing the phases.
+
+tracemalloc's peak is process-wide and every phase start resets it, so the
+peak seen when a phase starts or ends is credited to every open phase, on
+any thread: an outer phase's peak includes its nested and concurrent ones.
+Phases are for stages, not per-item work on pool threads; short phases
+opened thousands of times cost more than they measure.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from catalog import COURSES_DIR
+
+MODES = ("mem", "cpu")
+PROFILE_DIR = COURSES_DIR.parent / "profiles"
+_IGNORED = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+
+
+def _rss() -> int:
+    """Resident set size in bytes; 0 where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _mb(n: float, sign: bool = False) -> str:
+    return f"{n / 2**20:{'+' if sign else ''}.1f} MB"
+
+
+def _where(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class PhaseStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.seconds = 0.0
+        self.allocated = 0      # traced bytes at the end minus at the start, summed over runs
+        self.peak = 0           # largest traced peak of any run
+        self.rss = 0            # RSS at the end of the last run
+        self.rss_delta = 0
+        self.sites: list[dict] = []
+        self.samples = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class Profiler:
+    def __init__(self, mode: str, out_dir: Path = PROFILE_DIR, label: str = "run",
+                 top: int = 10, interval: float = 0.005, frames: int = 1):
+        if mode not in MODES:
+            raise ValueError(f"profile mode must be one of {', '.join(MODES)}")
+        self.mode = mode
+        self.dir = out_dir / f"{datetime.now():%Y%m%d-%H%M%S}-{label}-{mode}"
+        self.top = top
+        self.interval = interval
+        self.frames = frames
+        self.phases: dict[str, PhaseStats] = {}
+        self._stacks: dict[int, list[dict]] = {}     # thread id -> open phase runs, innermost last
+        self._open: list[dict] = []                  # every open run, newest last
+        self._stats: dict[str, pstats.Stats] = {}
+        self._folded: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._finished: str | None = None
+
+    @classmethod
+    def from_env(cls, var: str = "PROFILE", **kwargs) -> "Profiler | None":
+        """A started Profiler when $var is mem or cpu, else None."""
+        mode = os.environ.get(var, "").strip().lower()
+        return cls(mode, **kwargs).start() if mode else None
+
+    def start(self) -> "Profiler":
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if self.mode == "mem" and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        if self.mode == "cpu":
+            self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        return self
+
+    # ---------------------------------------------------------------
+    # Phases
+    # ---------------------------------------------------------------
+    @contextmanager
+    def phase(self, name: str):
+        run = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(run)
+
+    def begin(self, name: str) -> dict:
+        """Open a phase on this thread; pass the result to end(), on the same thread."""
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        run = {"name": name, "t0": time.perf_counter(), "rss0": _rss()}
+        if self.mode == "cpu":
+            if stack and stack[-1]["profile"]:
+                stack[-1]["profile"].disable()
+            run["profile"] = cProfile.Profile()
+            try:
+                run["profile"].enable()
+            except ValueError:
+                # Python 3.12+ allows one active cProfile per process: a phase
+                # overlapping another thread's is left to the sampler
+                run["profile"] = None
+        with self._lock:
+            if self.mode == "mem":
+                current, peak = tracemalloc.get_traced_memory()
+                self._fold(peak)      # reset_peak() below would lose the open phases' peak
+                tracemalloc.reset_peak()
+                run.update(mem0=current, peak=current)
+            first = name not in self.phases
+            self.phases.setdefault(name, PhaseStats(name))    # listed in the order phases start
+            self._open.append(run)
+        if first and self.mode == "mem":
+            run["snapshot"] = self._snapshot()
+        stack.append(run)
+        return run
+
+    def end(self, run: dict) -> None:
+        stack = self._stacks[threading.get_ident()]
+        stack.remove(run)
+        seconds = time.perf_counter() - run["t0"]
+        allocated = peak = 0
+        with self._lock:
+            self._open.remove(run)
+            if self.mode == "mem":
+                current, peak = tracemalloc.get_traced_memory()
+                self._fold(peak)      # every open run has been open since the last reset
+                peak = max(peak, run["peak"])
+                allocated = current - run["mem0"]
+        sites: list[dict] = []
+        if "snapshot" in run:
+            after = self._snapshot()
+            after.dump(str(self.dir / f"{self._file(run['name'])}.snapshot"))
+            sites = [{"site": str(d.traceback), "bytes": d.size_diff, "blocks": d.count_diff}
+                     for d in after.compare_to(run["snapshot"], "lineno")[:self.top]]
+        elif self.mode == "cpu" and run["profile"]:
+            run["profile"].disable()
+        rss = _rss()
+        with self._lock:
+            stats = self.phases[run["name"]]
+            stats.runs += 1
+            stats.seconds += seconds
+            stats.allocated += allocated
+            stats.peak = max(stats.peak, peak)
+            stats.rss, stats.rss_delta = rss, stats.rss_delta + rss - run["rss0"]
+            if sites:
+                stats.sites = sites
+            if self.mode == "cpu" and run["profile"]:
+                if run["name"] in self._stats:
+                    self._stats[run["name"]].add(run["profile"])
+                else:
+                    self._stats[run["name"]] = pstats.Stats(run["profile"])
+        if self.mode == "cpu" and stack and stack[-1]["profile"]:
+            stack[-1]["profile"].enable()      # after the bookkeeping above, which isn't the phase's
+
+    def _fold(self, peak: int) -> None:
+        # caller holds the lock
+        for run in self._open:
+            run["peak"] = max(run["peak"], peak)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED])
+
+    @staticmethod
+    def _file(name: str) -> str:
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in name).strip("_") or "phase"
+
+    # ---------------------------------------------------------------
+    # Sampling
+    # ---------------------------------------------------------------
+    def _phase_of(self, tid: int) -> str:
+        stack = self._stacks.get(tid)
+        if stack:
+            return stack[-1]["name"]
+        return self._open[-1]["name"] if self._open else "(no phase)"
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for tid, frame in frames.items():
+                    if tid == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_where(frame))
+                        frame = frame.f_back
+                    phase = self._phase_of(tid)
+                    key = ";".join([phase, *reversed(stack)])
+                    self._folded[key] = self._folded.get(key, 0) + 1
+                    if phase in self.phases:
+                        self.phases[phase].samples += 1
+
+    def _hottest(self, phase: str) -> list[tuple[str, int]]:
+        """Functions seen on top of the stack most often in phase's samples."""
+        leaves: dict[str, int] = {}
+        for key, n in self._folded.items():
+            parts = key.split(";")
+            if parts[0] == phase and len(parts) > 1:
+                leaves[parts[-1]] = leaves.get(parts[-1], 0) + n
+        return sorted(leaves.items(), key=lambda kv: -kv[1])[:self.top]
+
+    # ---------------------------------------------------------------
+    # Report
+    # ---------------------------------------------------------------
+    def finish(self) -> str:
+        """Stop profiling, write the profiles and summary.json; returns the summary table."""
+        if self._finished is not None:
+            return self._finished
+        self._stopping.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self.mode == "mem" and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        for name, stats in self._stats.items():
+            stats.dump_stats(str(self.dir / f"{self._file(name)}.prof"))
+        if self._folded:
+            with open(self.dir / "samples.folded", "w", encoding="utf-8") as f:
+                for key, n in sorted(self._folded.items()):
+                    f.write(f"{key} {n}\n")
+        summary = {"mode": self.mode, "phases": [p.as_dict() for p in self.phases.values()]}
+        if self.mode == "cpu":
+            for p in summary["phases"]:
+                p["hottest"] = self._hottest(p["name"])
+        (self.dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        self._finished = self._report()
+        return self._finished
+
+    def _report(self) -> str:
+        lines = [f"Profile ({self.mode}) written to {self.dir}"]
+        if self.mode == "mem":
+            lines.append(f"{'phase':<28}{'runs':>6}{'seconds':>10}{'allocated':>13}{'peak':>11}{'rss':>11}{'rss +/-':>11}")
+            for p in self.phases.values():
+                lines.append(f"{p.name[:27]:<28}{p.runs:>6}{p.seconds:>10.2f}{_mb(p.allocated, True):>13}"
+                             f"{_mb(p.peak):>11}{_mb(p.rss):>11}{_mb(p.rss_delta, True):>11}")
+            for p in self.phases.values():
+                if p.sites:
+                    lines.append(f"\n{p.name}: top allocation sites (first run)")
+                    lines += [f"  {_mb(s['bytes'], True):>11} {s['blocks']:>+9} blocks  {s['site']}" for s in p.sites]
+            return "\n".join(lines)
+
+        total = sum(p.samples for p in self.phases.values()) or 1
+        lines.append(f"{'phase':<28}{'runs':>6}{'seconds':>10}{'samples':>9}{'share':>8}")
+        for p in self.phases.values():
+            lines.append(f"{p.name[:27]:<28}{p.runs:>6}{p.seconds:>10.2f}{p.samples:>9}{p.samples / total:>8.1%}")
+        for p in self.phases.values():
+            hottest = self._hottest(p.name)
+            if hottest:
+                lines.append(f"\n{p.name}: hottest functions, all threads ({p.samples} samples)")
+                lines += [f"  {n / max(p.samples, 1):>6.1%}  {where}" for where, n in hottest]
+            if p.name in self._stats:
+                # pstats rows: (file, line, function) -> (calls, ncalls, tottime, cumtime, callers)
+                rows = sorted(self._stats[p.name].stats.items(), key=lambda kv: -kv[1][3])[:self.top]
+                lines.append(f"{p.name}: cumulative time, phase thread (cProfile)")
+                lines += [f"  {ct:>8.3f} s {nc:>9}  {fn} ({os.path.basename(file)}:{line})"
+                          for (file, line, fn), (_, nc, _, ct, _) in rows]
+        return "\n".join(lines)
+
+
+def phase(profiler: Profiler | None, name: str):
+    """profiler.phase(name), or a no-op when profiling is off."""
+    return profiler.phase(name) if profiler is not None else nullcontext()
@@ -0,0 +1,312 @@
+"""
+query.py – bitmap-indexed faceted filter and sort over the catalog
+
+Every course gets a document number (its position in the catalog).  Each
+facet value keeps a bitmap of the documents that carry it, stored as a
+Python int, so filtering is integer AND/OR and counting is int.bit_count().
+Numeric fields are kept as sorted columns with precomputed prefix bitmaps:
+range filters and top-k sorts only touch the documents near the answer.
+
+Facets (multiple values of one facet are OR'ed, facets are AND'ed):
+  subject, school, level (100, 200, ...), offered (fall/spring/summer),
+  gen_ed, ethnic_studies (true/false), credits (any credit count in range)
+Numeric range filters / sort keys:
+  gpa, enrollment (students in the latest graded term), number
+"""
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator
+
+from catalog import credit_range
+from enrich import gpa as grade_gpa
+from term_index import TermIndex
+
+FACETS = ("subject", "school", "level", "offered", "gen_ed", "ethnic_studies", "credits")
+COLUMNS = ("gpa", "enrollment", "number")
+BLOCK = 64
+
+
+def bitmap(docs: Iterable[int]) -> int:
+    m = 0
+    for d in docs:
+        m |= 1 << d
+    return m
+
+def iter_bits(m: int) -> Iterator[int]:
+    """Set bit positions in ascending order (str.find runs in C)."""
+    s = bin(m)[:1:-1]
+    i = s.find("1")
+    while i != -1:
+        yield i
+        i = s.find("1", i + 1)
+
+
+class SortedColumn:
+    """Documents ordered by value, with a bitmap of the first r ranks every BLOCK ranks."""
+
+    def __init__(self, values: dict[int, float]):
+        self.order = sorted(values, key=lambda d: (values[d], d))
+        self.values = [values[d] for d in self.order]
+        self.rank = {d: r for r, d in enumerate(self.order)}
+        self.valid = bitmap(self.order)
+        self._blocks = [0]
+        acc = 0
+        for start in range(0, len(self.order), BLOCK):
+            acc |= bitmap(self.order[start:start + BLOCK])
+            self._blocks.append(acc)
+
+    def prefix(self, r: int) -> int:
+        """Bitmap of the documents ranked < r."""
+        r = max(0, min(r, len(self.order)))
+        b = r // BLOCK
+        return self._blocks[b] | bitmap(self.order[b * BLOCK:r])
+
+    def between(self, lo: float | None, hi: float | None) -> int:
+        a = 0 if lo is None else bisect_left(self.values, lo)
+        b = len(self.values) if hi is None else bisect_right(self.values, hi)
+        return self.prefix(b) & ~self.prefix(a)
+
+    def top(self, mask: int, k: int, descending: bool) -> list[int]:
+        """
+        First k documents of mask in column order.  The window of ranks
+        considered doubles until it holds k matches, so a broad filter only
+        decodes a few blocks.  Documents without a value come last.
+        """
+        n = len(self.order)
+        window = max(BLOCK, -(-k // BLOCK) * BLOCK)
+        while True:
+            if descending:
+                cand = mask & self.valid & ~self.prefix(n - window)
+            else:
+                cand = mask & self.prefix(window)
+            if cand.bit_count() >= k or window >= n:
+                break
+            window *= 2
+        docs = sorted(iter_bits(cand), key=self.rank.__getitem__, reverse=descending)
+        if len(docs) < k:
+            rest = mask & ~self.valid
+            for d in iter_bits(rest):
+                docs.append(d)
+                if len(docs) >= k:
+                    break
+        return docs[:k]
+
+
+def _latest_enrollment(record: dict) -> dict:
+    for _, entry in sorted((record.get("term_data") or {}).items(), reverse=True):
+        if entry and entry.get("enrollment_data"):
+            return entry["enrollment_data"]
+    return {}
+
+def _latest_total(record: dict) -> int | None:
+    for _, entry in sorted((record.get("term_data") or {}).items(), reverse=True):
+        if entry and entry.get("grade_data"):
+            return entry["grade_data"].get("total")
+    return None
+
+def _range(value: str) -> tuple[float | None, float | None]:
+    """'3-4' -> (3, 4); '3-' -> (3, None); '3' -> (3, 3)"""
+    lo, sep, hi = value.partition("-")
+    if not sep:
+        return float(lo), float(lo)
+    return (float(lo) if lo else None, float(hi) if hi else None)
+
+
+def _document(cid: str, record: dict, terms: TermIndex | None) -> tuple[dict, dict, dict]:
+    """(facet -> values, column -> value, result row) for one course."""
+    ref = record["course_reference"]
+    enrollment = _latest_enrollment(record)
+    credits = credit_range(record)
+    enriched = (record.get("enrichment") or {}).get("madGrades") or {}
+    g = enriched.get("avgGPA")
+    if g is None and record.get("cumulative_grade_data"):
+        g = grade_gpa(record["cumulative_grade_data"])
+    total = _latest_total(record)
+    offering = terms.offering(cid) if terms else None
+
+    values = {
+        "subject": ref["subjects"],
+        "school": [(enrollment.get("school") or {}).get("abbreviation")],
+        "level": [str(ref["course_number"] // 100 * 100)],
+        "offered": offering["typically_offered"] if offering else [],
+        "gen_ed": [str(enrollment["general_education"]).lower()] if "general_education" in enrollment else [],
+        "ethnic_studies": [str(enrollment["ethnics_studies"]).lower()] if "ethnics_studies" in enrollment else [],
+        "credits": [str(c) for c in range(credits[0], credits[1] + 1)] if credits else [],
+    }
+    values = {f: [v for v in vals if v is not None] for f, vals in values.items()}
+    columns = {"gpa": g, "enrollment": total, "number": ref["course_number"]}
+    row = {
+        "id": cid,
+        "title": record.get("course_title"),
+        "subjects": ref["subjects"],
+        "number": ref["course_number"],
+        "credits": list(credits) if credits else None,
+        "gpa": round(g, 2) if g is not None else None,
+        "enrollment": total,
+    }
+    return values, {c: v for c, v in columns.items() if v is not None}, row
+
+
+class QueryEngine:
+    def __init__(self, courses: dict[str, dict], terms: TermIndex | None = None):
+        self.ids = list(courses)
+        self.doc_of = {cid: doc for doc, cid in enumerate(self.ids)}
+        self.all = (1 << len(self.ids)) - 1
+        self.facets: dict[str, dict[str, int]] = {f: {} for f in FACETS}
+        self.rows: list[dict | None] = []
+        # per document facet values and per column raw values, kept for apply()
+        self._values: list[dict | None] = []
+        self._columns: dict[str, dict[int, float]] = {c: {} for c in COLUMNS}
+
+        postings: dict[str, dict[str, list[int]]] = {f: {} for f in FACETS}
+        for doc, (cid, record) in enumerate(courses.items()):
+            values, columns, row = _document(cid, record, terms)
+            for facet, vals in values.items():
+                for v in vals:
+                    postings[facet].setdefault(v, []).append(doc)
+            for c, v in columns.items():
+                self._columns[c][doc] = v
+            self.rows.append(row)
+            self._values.append(values)
+
+        for facet, by_value in postings.items():
+            self.facets[facet] = {v: bitmap(docs) for v, docs in sorted(by_value.items())}
+        self.columns = {c: SortedColumn(v) for c, v in self._columns.items()}
+
+    def apply(self, changes: dict[str, dict | None], terms: TermIndex | None = None) -> "QueryEngine":
+        """
+        A new engine with the given courses replaced (None: removed); this one
+        keeps answering unchanged.  A changed course keeps its document
+        number, a new one is appended, a removed one leaves a hole that
+        self.all no longer covers.  Only touched bitmaps are recomputed and
+        only columns with a changed value are re-sorted.
+        """
+        new = QueryEngine.__new__(QueryEngine)
+        new.ids = self.ids[:]
+        new.doc_of = dict(self.doc_of)
+        new.all = self.all
+        new.rows = self.rows[:]
+        new._values = self._values[:]
+        new.facets = {f: dict(by_value) for f, by_value in self.facets.items()}
+        new._columns = {c: dict(v) for c, v in self._columns.items()}
+        touched: set[str] = set()
+        added_values = False
+
+        for cid, record in changes.items():
+            doc = new.doc_of.get(cid)
+            if doc is not None:
+                bit = 1 << doc
+                for facet, vals in new._values[doc].items():
+                    for v in vals:
+                        new.facets[facet][v] &= ~bit
+                        if not new.facets[facet][v]:
+                            del new.facets[facet][v]
+                for c, col in new._columns.items():
+                    if col.pop(doc, None) is not None:
+                        touched.add(c)
+                new.all &= ~bit
+                new.rows[doc] = new._values[doc] = None
+            if record is None:
+                new.doc_of.pop(cid, None)
+                continue
+            if doc is None:
+                doc = new.doc_of[cid] = len(new.ids)
+                new.ids.append(cid)
+                new.rows.append(None)
+                new._values.append(None)
+            values, columns, row = _document(cid, record, terms)
+            bit = 1 << doc
+            for facet, vals in values.items():
+                for v in vals:
+                    added_values |= v not in new.facets[facet]
+                    new.facets[facet][v] = new.facets[facet].get(v, 0) | bit
+            for c, v in columns.items():
+                new._columns[c][doc] = v
+                touched.add(c)
+            new.all |= bit
+            new.rows[doc] = row
+            new._values[doc] = values
+
+        if added_values:
+            new.facets = {f: dict(sorted(by_value.items())) for f, by_value in new.facets.items()}
+        new.columns = {c: SortedColumn(new._columns[c]) if c in touched else self.columns[c] for c in COLUMNS}
+        return new
+
+    # ---------------------------------------------------------------
+    # Filtering
+    # ---------------------------------------------------------------
+    def _facet_mask(self, facet: str, values: list[str]) -> int:
+        if facet == "credits":
+            # credits=3-4 matches any course whose credit range overlaps 3..4
+            m = 0
+            for v in values:
+                lo, hi = _range(v)
+                for c, bm in self.facets["credits"].items():
+                    if (lo is None or int(c) >= lo) and (hi is None or int(c) <= hi):
+                        m |= bm
+            return m
+        # subjects and schools are stored upper case, seasons and booleans lower case
+        lower = facet in ("offered", "gen_ed", "ethnic_studies")
+        by_value = self.facets[facet]
+        m = 0
+        for v in values:
+            m |= by_value.get(v.strip().lower() if lower else v.strip().upper(), 0)
+        return m
+
+    def query(
+        self,
+        filters: dict[str, list[str]] | None = None,
+        ranges: dict[str, str] | None = None,
+        sort: str | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        facet_counts: Iterable[str] = (),
+    ) -> dict:
+        """
+        filters: facet -> accepted values; ranges: column -> 'lo-hi'.
+        sort: column name, '-' prefix for descending.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if v}
+        for f in filters:
+            if f not in self.facets:
+                raise ValueError(f"Unknown facet '{f}'")
+        masks = {f: self._facet_mask(f, v) for f, v in filters.items()}
+        base = self.all
+        for col, spec in (ranges or {}).items():
+            if col not in self.columns:
+                raise ValueError(f"Unknown numeric field '{col}'")
+            base &= self.columns[col].between(*_range(spec))
+
+        mask = base
+        for m in masks.values():
+            mask &= m
+
+        k = offset + limit
+        if sort:
+            col = sort.lstrip("-")
+            if col not in self.columns:
+                raise ValueError(f"Unknown sort field '{col}'")
+            docs = self.columns[col].top(mask, k, sort.startswith("-"))
+        else:
+            docs = []
+            for d in iter_bits(mask):
+                docs.append(d)
+                if len(docs) >= k:
+                    break
+
+        counts = {}
+        for f in facet_counts:
+            if f not in self.facets:
+                raise ValueError(f"Unknown facet '{f}'")
+            # counts for a facet ignore that facet's own selection (multi-select UI)
+            others = base
+            for g, m in masks.items():
+                if g != f:
+                    others &= m
+            counts[f] = {v: n for v, bm in self.facets[f].items() if (n := (others & bm).bit_count())}
+
+        return {
+            "total": mask.bit_count(),
+            "results": [self.rows[d] for d in docs[offset:k]],
+            "facets": counts,
+        }
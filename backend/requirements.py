@@ -0,0 +1,271 @@
+"""
+requirements.py – degree progress from declarative requirement groups
+
+A requirement set is JSON (see requirement_sets/) with a credit total and an
+ordered list of groups:
+
+  {"name": "...", "type": "n_of", "n": 2, "courses": ["MATH 221", ...], "exclude": [...]}
+      n of the listed courses that aren't excluded; without "n", all of them
+  {"name": "...", "type": "credits", "credits": 12,
+   "subjects": ["COMP SCI"], "min_level": 400, "max_level": 699,
+   "courses": [...], "exclude": [...]}
+      that many credits from matching courses
+
+A course counts toward the first group that can use it unless a group sets
+"shared": true.  Each set is compiled once into frozensets of catalog ids,
+and results are memoized by (set hash, history hash), so a dashboard asking
+for the same students again is a dict lookup.
+"""
+from __future__ import annotations
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from catalog import credit_range
+from prereqs import PrereqGraph
+
+REQUIREMENT_SETS_DIR = Path(__file__).resolve().parent / "requirement_sets"
+NOT_PASSED = {"F", "W", "NR", "I", "U"}    # grades that don't complete a course
+
+
+class RequirementError(ValueError):
+    """Malformed requirement set or history; reported to the client as a 400."""
+
+
+def _digest(obj: object) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def _subject(s: str) -> str:
+    return re.sub(r"\s+", "", s).upper()
+
+def _is_int(v: object) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+def _is_number(v: object) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def _split(cid: str) -> tuple[str, int] | None:
+    subject, _, number = cid.rpartition("_")
+    return (subject, int(number)) if subject and number.isdigit() else None
+
+
+class RequirementsEngine:
+    def __init__(self, courses: dict[str, dict], graph: PrereqGraph | None = None,
+                 sets_dir: Path = REQUIREMENT_SETS_DIR, max_results: int = 4096):
+        self.courses = courses
+        self.graph = graph or PrereqGraph(courses)
+        self.credits = {cid: c for cid, rec in courses.items() if (c := credit_range(rec))}
+        self.sets = {p.stem: json.loads(p.read_text(encoding="utf-8")) for p in sorted(sets_dir.glob("*.json"))}
+        self.max_results = max_results
+        self._compiled: dict[str, list[dict]] = {}
+        self._results: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def available(self) -> list[dict]:
+        return [{"id": k, "name": v.get("name", k), "total_credits": v.get("total_credits"),
+                 "groups": len(v.get("groups") or ())} for k, v in self.sets.items()]
+
+    # ---------------------------------------------------------------
+    # Compiling
+    # ---------------------------------------------------------------
+    def _codes(self, g: dict, key: str) -> list[str]:
+        codes = g.get(key) or []
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            raise RequirementError(f"Group '{g.get('name')}': {key} must be a list of course codes")
+        return [self.graph.resolve(c) for c in codes]
+
+    def _compile_group(self, g: object) -> dict:
+        if not isinstance(g, dict):
+            raise RequirementError(f"Invalid requirement group: {g!r}")
+        kind = g.get("type", "n_of")
+        exclude = frozenset(self._codes(g, "exclude"))
+        options = tuple(c for c in dict.fromkeys(self._codes(g, "courses")) if c not in exclude)
+        group = {"name": g.get("name", kind), "type": kind, "shared": bool(g.get("shared")), "exclude": exclude}
+        if kind == "n_of":
+            if not options:
+                raise RequirementError(f"Group '{group['name']}' lists no courses")
+            n = g.get("n")
+            if n is None:
+                n = len(options)
+            if not _is_int(n) or n < 1:
+                raise RequirementError(f"Group '{group['name']}': n must be a positive integer, not {n!r}")
+            group["options"] = options
+            group["n"] = n
+            return group
+        if kind != "credits":
+            raise RequirementError(f"Unknown group type '{kind}'")
+        subjects = g.get("subjects") or []
+        if not isinstance(subjects, list) or not all(isinstance(s, str) for s in subjects):
+            raise RequirementError(f"Group '{group['name']}': subjects must be a list of subject names")
+        credits, lo, hi = g.get("credits", 0), g.get("min_level"), g.get("max_level")
+        if not _is_number(credits) or credits < 0:
+            raise RequirementError(f"Group '{group['name']}': credits must be a non-negative number, not {credits!r}")
+        for level in (lo, hi):
+            if level is not None and not _is_int(level):
+                raise RequirementError(f"Group '{group['name']}': course levels must be integers, not {level!r}")
+        subjects = frozenset(_subject(s) for s in subjects)
+        group.update(credits=float(credits), subjects=subjects, min_level=lo, max_level=hi)
+        if not subjects and lo is None and hi is None:
+            group["eligible"] = frozenset(options)
+            return group
+        eligible = set(options)
+        for cid, record in self.courses.items():
+            ref = record["course_reference"]
+            if self._in_range(group, ref["subjects"], ref["course_number"]):
+                eligible.add(cid)
+        group["eligible"] = frozenset(eligible) - exclude
+        return group
+
+    @staticmethod
+    def _in_range(group: dict, subjects: list[str], number: int) -> bool:
+        if group["subjects"] and not group["subjects"].intersection(subjects):
+            return False
+        if group["min_level"] is not None and number < group["min_level"]:
+            return False
+        return group["max_level"] is None or number <= group["max_level"]
+
+    def compiled(self, requirements: str | dict) -> tuple[str, dict, list[dict]]:
+        """(spec hash, spec, compiled groups) for a set id or an inline spec."""
+        if isinstance(requirements, str):
+            if requirements not in self.sets:
+                raise KeyError(requirements)
+            spec = self.sets[requirements]
+        elif isinstance(requirements, dict):
+            spec = requirements
+        else:
+            raise RequirementError("requirements must be a set id or a requirement object")
+        key = _digest(spec)
+        groups = self._compiled.get(key)
+        if groups is None:
+            if not isinstance(spec.get("groups") or [], list):
+                raise RequirementError("groups must be a list of requirement groups")
+            total = spec.get("total_credits")
+            if total is not None and not _is_number(total):
+                raise RequirementError(f"total_credits must be a number, not {total!r}")
+            groups = [self._compile_group(g) for g in spec.get("groups") or ()]
+            with self._lock:
+                self._compiled[key] = groups
+        return key, spec, groups
+
+    # ---------------------------------------------------------------
+    # History
+    # ---------------------------------------------------------------
+    def _history(self, history: object) -> dict[str, dict]:
+        """cid -> {credits, grade}; later entries for the same course win (retakes)."""
+        if not isinstance(history, list):
+            raise RequirementError("history must be a list of courses")
+        taken: dict[str, dict] = {}
+        for entry in history:
+            if isinstance(entry, str):
+                entry = {"code": entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get("code"), str):
+                raise RequirementError(f"Invalid history entry: {entry!r}")
+            cid = self.graph.resolve(entry["code"])
+            grade = entry.get("grade")
+            if isinstance(grade, str) and grade.upper() in NOT_PASSED:
+                taken.pop(cid, None)
+                continue
+            credits = entry.get("credits")
+            if credits is None:
+                credits = self.credits.get(cid, (0, 0))[0]
+            try:
+                credits = float(credits)
+            except (TypeError, ValueError):
+                raise RequirementError(f"Invalid credits for {entry['code']}: {credits!r}") from None
+            taken.pop(cid, None)
+            taken[cid] = {"credits": credits, "grade": grade}
+        return taken
+
+    def _course(self, cid: str, taken: dict[str, dict]) -> dict:
+        record = self.courses.get(cid)
+        done = taken.get(cid)
+        credits = done["credits"] if done else self.credits.get(cid, (0, 0))[0]
+        return {
+            "code": cid,
+            "title": record.get("course_title") if record else None,
+            "credits": credits,
+            "completed": done is not None,
+            "grade": done["grade"] if done else None,
+        }
+
+    # ---------------------------------------------------------------
+    # Progress
+    # ---------------------------------------------------------------
+    def progress(self, requirements: str | dict, history: object) -> dict:
+        spec_key, spec, groups = self.compiled(requirements)
+        taken = self._history(history)
+        key = (spec_key, _digest(sorted((cid, t["credits"], str(t["grade"])) for cid, t in taken.items())))
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return {**hit, "cached": True}
+            self.misses += 1
+
+        result = self._evaluate(spec, groups, taken)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return {**result, "cached": False}
+
+    def _evaluate(self, spec: dict, groups: list[dict], taken: dict[str, dict]) -> dict:
+        # sorted, not history order: the memo key doesn't depend on order either
+        order = sorted(taken)
+        used: set[str] = set()
+        out = []
+        for g in groups:
+            free = [c for c in order if (g["shared"] or c not in used) and c not in g["exclude"]]
+            if g["type"] == "n_of":
+                free_set = set(free)
+                applied = [c for c in g["options"] if c in free_set][:g["n"]]
+                remaining = [c for c in g["options"] if c not in applied and c not in taken]
+                need = max(g["n"] - len(applied), 0)
+                # credits still needed: the cheapest remaining options
+                todo = sorted(self.credits.get(c, (0, 0))[0] for c in remaining)[:need]
+                done_credits = sum(taken[c]["credits"] for c in applied)
+                entry = {
+                    "required": g["n"],
+                    "completed": len(applied),
+                    "satisfied": len(applied) >= g["n"],
+                    "credits_required": done_credits + sum(todo),
+                    "credits_completed": done_credits,
+                    "courses": [self._course(c, taken) for c in applied]
+                               + [self._course(c, taken) for c in remaining],
+                }
+            else:
+                applied, total = [], 0.0
+                for c in free:
+                    if total >= g["credits"]:
+                        break
+                    parts = _split(c)
+                    if c in g["eligible"] or (c not in self.courses and parts and self._in_range(g, [parts[0]], parts[1])):
+                        applied.append(c)
+                        total += taken[c]["credits"]
+                entry = {
+                    "required": g["credits"],
+                    "completed": total,
+                    "satisfied": total >= g["credits"],
+                    "credits_required": g["credits"],
+                    "credits_completed": total,
+                    "courses": [self._course(c, taken) for c in applied],
+                }
+            if not g["shared"]:
+                used.update(applied)
+            out.append({"name": g["name"], "type": g["type"], **entry})
+
+        completed = sum(t["credits"] for t in taken.values())
+        required = spec.get("total_credits") or 0
+        return {
+            "name": spec.get("name"),
+            "credits": {"completed": completed, "required": required,
+                        "remaining": max(required - completed, 0)},
+            "satisfied": all(g["satisfied"] for g in out) and completed >= required,
+            "groups": out,
+            "unassigned": [c for c in order if c not in used],
+        }
@@ -1,49 +1,122 @@
-"""Scrape UW Course Search & Enroll for given term"""
-
+"""
+Scrape UW Course Search & Enroll for given term
+
+Usage:
+  python course_search_export.py                         # current term, 4 browsers
+  python course_search_export.py Fall 2025 -j 8
+  python course_search_export.py 1262 --subjects 266 600 --visible
+  python course_search_export.py --base-url http://127.0.0.1:8000/search   # local fixture page
+
+Subjects are shared between -j headless Chrome workers.  Each subject's rows
+are appended to d_data/course_search_<term>.csv as soon as it finishes and
+the subject is checkpointed next to the file, so an interrupted run skips the
+finished subjects when restarted (use --fresh to start over).
+
+Waits are conditions on the page rather than fixed sleeps: the subject
+dropdown's options, the first course card, a card's section rows after it is
+expanded and more cards after a scroll (both give up after --idle seconds;
+no new cards ends the subject).  A subject whose search shows the "no
+results" message is done with no rows; one where neither a card nor that
+message shows within --timeout fails and is left for the next run.
+"""
+from __future__ import annotations
+import os
+import re
+import argparse
+import contextlib
+import threading
 from pathlib import Path
-import sys, time, contextlib
 
-import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
+
+from madgrades_export import export_per_course, reset
 from term_utils import term_code
 
-# --- config & args ---
-DATA_DIR = Path("d_data"); DATA_DIR.mkdir(exist_ok=True)
-term_arg = sys.argv[1] if len(sys.argv) > 1 else None
-TERM      = term_code(term_arg)
-BASE_URL  = "https://public.enroll.wisc.edu/search"
+# --- config ---
+DATA_DIR = Path("d_data")
+BASE_URL = os.getenv("CSE_BASE_URL", "https://public.enroll.wisc.edu/search")
+
+CARD = "div.course-card"
+EMPTY = ".no-results"      # the search's "no results" message
+OPTION = ".cdk-overlay-pane mat-option"
+SUBMIT = "button[type=submit], button.k-button.k-primary"
+HEADER = re.compile(r"(.+?)\s+(\d+)\s*(.*)", re.S)
+
+
+def new_driver(driver_path: str, headless: bool = True) -> webdriver.Chrome:
+    opts = Options()
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.page_load_strategy = "eager"     # the waits below decide when the page is ready
+    return webdriver.Chrome(service=Service(driver_path), options=opts)
+
+
+class DriverPool:
+    """One Chrome per worker thread, created on first use and replaced if it dies."""
+
+    def __init__(self, driver_path: str, headless: bool = True):
+        self.driver_path = driver_path
+        self.headless = headless
+        self.local = threading.local()
+        self.drivers: list[webdriver.Chrome] = []
+        self.lock = threading.Lock()
+
+    def get(self) -> webdriver.Chrome:
+        drv = getattr(self.local, "driver", None)
+        if drv is None:
+            drv = self.local.driver = new_driver(self.driver_path, self.headless)
+            with self.lock:
+                self.drivers.append(drv)
+        return drv
+
+    def discard(self) -> None:
+        drv = getattr(self.local, "driver", None)
+        if drv is not None:
+            self.local.driver = None
+            with self.lock:
+                self.drivers.remove(drv)
+            with contextlib.suppress(Exception):
+                drv.quit()
 
+    def close(self) -> None:
+        with self.lock:
+            drivers, self.drivers = self.drivers, []
+        for drv in drivers:
+            with contextlib.suppress(Exception):
+                drv.quit()
 
 
-def get_subject_codes(driver: webdriver.Chrome) -> list[str]:
-    driver.get(f"{BASE_URL}?term={TERM}")
-    time.sleep(1)
+def get_subject_codes(driver: webdriver.Chrome, term: str, base_url: str = BASE_URL,
+                      timeout: float = 15) -> list[str]:
+    driver.get(f"{base_url}?term={term}")
 
-    mats = driver.find_elements(By.CSS_SELECTOR, "mat-select")
-    if len(mats) < 2:
-        raise RuntimeError(f"Expected ≥2 mat-selects, got {len(mats)}")
-    subj_dd = mats[1]
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: len(d.find_elements(By.CSS_SELECTOR, "mat-select")) >= 2)
+    except TimeoutException:
+        raise RuntimeError(f"Expected ≥2 mat-selects within {timeout:g}s")
+    subj_dd = driver.find_elements(By.CSS_SELECTOR, "mat-select")[1]
 
     # open subject dropdown
-    subj_dd.click()
+    WebDriverWait(driver, timeout).until(EC.element_to_be_clickable(subj_dd)).click()
 
     # wait for options to appear in the overlay
     try:
-        WebDriverWait(driver, 8).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".cdk-overlay-pane mat-option"))
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, OPTION))
         )
     except TimeoutException:
-        raise RuntimeError("Subject options never appeared – check selector `.cdk-overlay-pane mat-option`")
+        raise RuntimeError(f"Subject options never appeared – check selector `{OPTION}`")
 
     # scrape codes
-    opts = driver.find_elements(By.CSS_SELECTOR, ".cdk-overlay-pane mat-option")
+    opts = driver.find_elements(By.CSS_SELECTOR, OPTION)
     vals = []
     for o in opts:
         v = o.get_attribute("value")
@@ -63,76 +136,116 @@ def get_subject_codes(driver: webdriver.Chrome) -> list[str]:
     if not vals:
         raise RuntimeError("Found mat-options but no codes extracted – inspect option texts")
 
-    return vals
+    return list(dict.fromkeys(vals))
 
-def scrape_subject(driver: webdriver.Chrome, subj_code: str) -> list[dict[str, str]]:
+def _card_rows(driver: webdriver.Chrome, card, wait: float) -> list[dict[str, str]]:
+    hdr = card.find_element(By.CSS_SELECTOR, ".course-header").text
+    # subjects can be several words ("COMP SCI 300 Programming II")
+    m = HEADER.match(hdr.strip())
+    if m is None:
+        raise RuntimeError(f"Unexpected course header {hdr!r}")
+    sub, num, title = m.groups()
+    with contextlib.suppress(Exception):
+        card.find_element(By.CSS_SELECTOR, ".expand-icon").click()
+        # sections render after the click; a card without any just times out
+        WebDriverWait(driver, wait).until(lambda _: card.find_elements(By.CSS_SELECTOR, "tbody tr"))
+    out = []
+    for row in card.find_elements(By.CSS_SELECTOR, "tbody tr"):
+        cols = [td.text.strip() for td in row.find_elements(By.TAG_NAME, "td")]
+        if len(cols) < 6: continue
+        out.append({
+            "subject":         sub,
+            "catalog_number":  num,
+            "title":           title,
+            "section":         cols[0],
+            "mode":            cols[1],
+            "credits":         cols[2],
+            "meeting":         cols[3],
+            "instructor":      cols[4],
+            "enrollment":      cols[5],
+        })
+    return out
+
+def scrape_subject(driver: webdriver.Chrome, term: str, subj_code: str, base_url: str = BASE_URL,
+                   timeout: float = 10, idle: float = 3) -> list[dict[str, str]]:
     # build the URL
-    url = f"{BASE_URL}?term={TERM}&subject={subj_code}"
-    driver.get(url)
-    time.sleep(1)
+    driver.get(f"{base_url}?term={term}&subject={subj_code}")
 
-    # fire off the search
+    # fire off the search once the form is there, unless the page searched on load
     with contextlib.suppress(Exception):
-        btn = driver.find_element(By.CSS_SELECTOR, "button[type=submit], button.k-button.k-primary")
-        btn.click()
-
-    # wait up to 10s for course cards to show
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_element_located((By.CSS_SELECTOR, CARD)),
+            EC.element_to_be_clickable((By.CSS_SELECTOR, SUBMIT)),
+        ))
+        if not driver.find_elements(By.CSS_SELECTOR, CARD):
+            driver.find_element(By.CSS_SELECTOR, SUBMIT).click()
+
+    # wait for course cards, or the message that there are none
     try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.course-card"))
-        )
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_element_located((By.CSS_SELECTOR, CARD)),
+            EC.presence_of_element_located((By.CSS_SELECTOR, EMPTY)),
+        ))
     except TimeoutException:
-        print(f"WARNING: no courses found for subject {subj_code}")
+        # a slow page, not an empty subject: fail so the subject isn't checkpointed
+        raise RuntimeError(f"No course cards for subject {subj_code} within {timeout:g}s")
+    if not driver.find_elements(By.CSS_SELECTOR, CARD):
+        return []
 
-    out, seen, last_h = [], 0, 0
+    out, seen = [], 0
     while True:
-        cards = driver.find_elements(By.CSS_SELECTOR, "div.course-card")
-        new   = cards[seen:]
-        for c in new:
-            hdr = c.find_element(By.CSS_SELECTOR, ".course-header").text
-            sub, num, *t = hdr.split(maxsplit=2)
-            title = t[0] if t else ""
-            with contextlib.suppress(Exception):
-                c.find_element(By.CSS_SELECTOR, ".expand-icon").click()
-            for row in c.find_elements(By.CSS_SELECTOR, "tbody tr"):
-                cols = [td.text.strip() for td in row.find_elements(By.TAG_NAME, "td")]
-                if len(cols) < 6: continue
-                out.append({
-                    "subject":         sub,
-                    "catalog_number":  num,
-                    "title":           title,
-                    "section":         cols[0],
-                    "mode":            cols[1],
-                    "credits":         cols[2],
-                    "meeting":         cols[3],
-                    "instructor":      cols[4],
-                    "enrollment":      cols[5],
-                })
+        cards = driver.find_elements(By.CSS_SELECTOR, CARD)
+        for c in cards[seen:]:
+            out.extend(_card_rows(driver, c, idle))
         seen = len(cards)
+        # infinite scroll: the subject is done when no card arrives within `idle` seconds
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-        time.sleep(0.8)
-        h = driver.execute_script("return document.body.scrollHeight")
-        if h == last_h: break
-        last_h = h
+        try:
+            WebDriverWait(driver, idle).until(lambda d: len(d.find_elements(By.CSS_SELECTOR, CARD)) > seen)
+        except TimeoutException:
+            break
 
     return out
 
-def main():
-    opts    = Options();         opts.add_argument("--headless")
-    service = Service(ChromeDriverManager().install())
-    drv     = webdriver.Chrome(service=service, options=opts)
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="course_search_export.py", description=__doc__,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("term", nargs="*", help="e.g. Fall 2025 or 1262 (default: current term)")
+    p.add_argument("-j", "--workers", type=int, default=4, help="browsers scraping in parallel")
+    p.add_argument("--subjects", nargs="+", help="only these subject codes")
+    p.add_argument("--timeout", type=float, default=10, help="seconds to wait for page elements")
+    p.add_argument("--idle", type=float, default=3, help="seconds without new cards that end a subject")
+    p.add_argument("--base-url", default=BASE_URL, help="search page URL (env CSE_BASE_URL)")
+    p.add_argument("--visible", action="store_true", help="show the browsers instead of running headless")
+    p.add_argument("--fresh", action="store_true", help="discard previous output and checkpoint")
+    p.add_argument("--out", type=Path, default=DATA_DIR, help="output directory")
+    return p
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    term = term_code(" ".join(args.term) if args.term else None)
+    args.out.mkdir(parents=True, exist_ok=True)
+    stem = args.out / f"course_search_{term}"
+    if args.fresh:
+        reset(stem)
+
+    drivers = DriverPool(ChromeDriverManager().install(), headless=not args.visible)
+
+    def scrape(code: str) -> list[dict[str, str]]:
+        try:
+            return scrape_subject(drivers.get(), term, code, args.base_url, args.timeout, args.idle)
+        except WebDriverException:
+            drivers.discard()   # a crashed or wedged browser; the next subject gets a fresh one
+            raise
 
     try:
-        all_rows = []
-        for code in get_subject_codes(drv):
-            batch = scrape_subject(drv, code)
-            all_rows.extend(batch)
-            print(f"{code}: {len(all_rows)} rows so far")
-        out = DATA_DIR / f"course_search_{TERM}.csv"
-        pd.DataFrame(all_rows).to_csv(out, index=False)
-        print(f"Done! Wrote {len(all_rows)} rows to {out}")
+        codes = args.subjects or get_subject_codes(drivers.get(), term, args.base_url, args.timeout)
+        print(f"{len(codes)} subjects for term {term}, {args.workers} browser(s)")
+        n, path = export_per_course(codes, scrape, stem, "csv", workers=max(1, args.workers), desc="subjects")
+        print(f"Done! Wrote {n:,} rows to {path}")
     finally:
-        drv.quit()
+        drivers.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,55 @@
+# === http_utils.py ===
+"""Pooled sessions and a shared token-bucket rate limiter for the export scripts"""
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    """Token bucket shared by all worker threads: `rate` requests/s, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def pooled_session(
+    pool_size: int,
+    *,
+    headers: dict[str, str] | None = None,
+    retries: int = 5,
+    methods: tuple[str, ...] = ("GET",),
+) -> requests.Session:
+    """
+    One keep-alive session sized for `pool_size` concurrent requests; retries
+    429/5xx with exponential backoff and honours Retry-After.
+    """
+    s = requests.Session()
+    if headers:
+        s.headers.update(headers)
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=methods, respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
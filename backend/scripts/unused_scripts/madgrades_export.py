@@ -1,88 +1,350 @@
 """
-Export UW-Madison course catalogue and grade data from the MadGrades API.
+Export UW-Madison course catalogue, grade distributions and course details
+from the MadGrades API.
 
 Usage:
-  MG_TOKEN=yourtoken python madgrades_export.py           # full dump
-  python madgrades_export.py Spring 2025                  # filter to a single term
+  MG_TOKEN=yourtoken python madgrades_export.py            # catalogue + grades
+  python madgrades_export.py Spring 2025                   # grades for a single term
+  python madgrades_export.py --details --lists             # + course details, subjects, instructors
+  python madgrades_export.py --format jsonl -j 16 --rate 20
+
+Rows are streamed to d_data/ as each course finishes and finished course ids
+are checkpointed next to the output, so an interrupted run resumes where it
+stopped (use --fresh to start over).  Set MG_API_BASE to point at a local mock.
 """
 #madgrades_export.py
+from __future__ import annotations
 import os
 import sys
+import csv
+import json
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, Iterator
 
-import pandas as pd
-import requests
 from tqdm import tqdm
 
+from http_utils import RateLimiter, pooled_session
 from term_utils import term_code
 
-# — config & auth —
+# — config —
 DATA_DIR = Path("d_data")
-DATA_DIR.mkdir(exist_ok=True)
-
-API_BASE = "https://api.madgrades.com"
-TOKEN = os.getenv("MG_TOKEN")
-if not TOKEN:
-    print("ERROR: please set MG_TOKEN env var", file=sys.stderr)
-    sys.exit(1)
-HEADERS = {"Authorization": f"Token token={TOKEN}"}
-
-# optional term filter
-term_arg = sys.argv[1] if len(sys.argv) > 1 else None
-TERM_FILTER = term_code(term_arg) if term_arg else None
-
-def get_paginated(endpoint: str, *, per_page: int = 500):
-    """Yield all pages from a MadGrades endpoint."""
-    page = 1
-    while True:
-        resp = requests.get(
-            f"{API_BASE}{endpoint}",
-            params={"per_page": per_page, "page": page},
-            headers=HEADERS,
-            timeout=30,
-        )
+API_BASE = os.getenv("MG_API_BASE", "https://api.madgrades.com")
+FORMATS = ("csv", "jsonl", "parquet")
+
+Row = dict[str, Any]
+
+# grade rows have a fixed shape; declaring it keeps every row group (and every
+# part of a resumed parquet export) on one schema, even when a count is null
+# throughout the first row group
+GRADES = ("a", "ab", "b", "bc", "c", "d", "f", "s", "u", "cr", "n", "p", "i", "nw", "nr", "other")
+GRADE_COLUMNS = {"course_id": "string", "term": "int64", "total": "int64",
+                 **{f"{g}Count": "int64" for g in GRADES}}
+
+# — HTTP —
+class MadGradesClient:
+    """One pooled session; retries 429/5xx with backoff, honouring Retry-After."""
+
+    def __init__(self, token: str, base: str = API_BASE, *, pool_size: int = 8,
+                 rate: float = 10.0, timeout: float = 30):
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.session = pooled_session(pool_size, headers={"Authorization": f"Token token={token}"})
+
+    def get(self, endpoint: str, **params: Any) -> Any:
+        self.limiter.acquire()
+        resp = self.session.get(f"{self.base}{endpoint}", params=params or None, timeout=self.timeout)
         resp.raise_for_status()
-        batch = resp.json()
-        if not batch:
-            break
-        yield from batch
-        if len(batch) < per_page:
-            break
-        page += 1
-
-def main():
-    # 1) download course catalogue
+        return resp.json()
+
+    def paginate(self, endpoint: str, *, per_page: int = 500) -> Iterator[Row]:
+        """Yield all records from a paginated endpoint (plain list or {"results": [...]})."""
+        page = 1
+        while True:
+            data = self.get(endpoint, per_page=per_page, page=page)
+            if isinstance(data, dict) and "results" in data:
+                batch = data["results"]
+            elif isinstance(data, list):
+                batch = data
+            else:
+                raise RuntimeError(f"Unexpected format for {endpoint}: {type(data)}")
+            if not batch:
+                break
+            yield from batch
+            if len(batch) < per_page:
+                break
+            page += 1
+
+# — streaming output —
+def _flat(row: Row) -> Row:
+    """Nested values become JSON strings so every format gets scalar columns."""
+    return {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()}
+
+
+class CsvSink:
+    """Appends to an existing file, keeping its header; columns are the declared ones, else the first row's."""
+
+    def __init__(self, path: Path, columns: dict[str, str] | None = None):
+        self.path = path
+        header = list(columns) if columns else None
+        if path.exists() and path.stat().st_size:
+            with path.open(newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f), None)
+        self.f = path.open("a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.f, fieldnames=header, extrasaction="ignore") if header else None
+
+    def write(self, rows: list[Row]) -> bool:
+        if not rows:
+            return True
+        rows = [_flat(r) for r in rows]
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.f, fieldnames=list(rows[0]), extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.f.flush()
+        return True
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class JsonlSink:
+    def __init__(self, path: Path, columns: dict[str, str] | None = None):
+        self.path = path
+        self.f = path.open("a", encoding="utf-8")
+
+    def write(self, rows: list[Row]) -> bool:
+        for r in rows:
+            self.f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        self.f.flush()
+        return True
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class ParquetSink:
+    """
+    Buffers up to `row_group` rows per row group.  Parquet files can't be
+    appended to, so a resumed run writes the next numbered part file.
+
+    The schema is `columns` (name -> pyarrow type name) when given; keys a
+    row doesn't declare are dropped and missing ones are null.  Otherwise it
+    is inferred from the first row group, with all-null columns as strings.
+
+    write() on every sink returns whether all rows so far are on disk; course
+    ids are only checkpointed once that is true.
+    """
+
+    def __init__(self, path: Path, columns: dict[str, str] | None = None, row_group: int = 10_000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([(k, getattr(pa, t)()) for k, t in columns.items()]) if columns else None
+        part = 0
+        while (candidate := path.with_name(f"{path.stem}.part{part}{path.suffix}")).exists():
+            part += 1
+        self.path = candidate
+        self.row_group = row_group
+        self.buf: list[Row] = []
+        self.writer = None
+
+    def write(self, rows: list[Row]) -> bool:
+        self.buf.extend(_flat(r) for r in rows)
+        if len(self.buf) >= self.row_group:
+            self._flush()
+        return not self.buf
+
+    def _flush(self) -> None:
+        if not self.buf:
+            return
+        if self.schema is None:
+            inferred = self.pa.Table.from_pylist(self.buf).schema
+            self.schema = self.pa.schema([f.with_type(self.pa.string()) if self.pa.types.is_null(f.type) else f
+                                          for f in inferred])
+        table = self.pa.Table.from_pylist(self.buf, schema=self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.buf.clear()
+
+    def close(self) -> None:
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(stem: Path, fmt: str, columns: dict[str, str] | None = None) -> CsvSink | JsonlSink | ParquetSink:
+    path = stem.with_suffix(f".{fmt}")
+    if fmt == "csv":
+        return CsvSink(path, columns)
+    if fmt == "jsonl":
+        return JsonlSink(path, columns)
+    return ParquetSink(path, columns)
+
+
+class Checkpoint:
+    """Append-only list of finished course ids; written after the course's rows are flushed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            self.done = {line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()}
+        self.f = path.open("a", encoding="utf-8")
+
+    def mark(self, key: str) -> None:
+        self.done.add(key)
+        self.f.write(key + "\n")
+        self.f.flush()
+
+    def close(self) -> None:
+        self.f.close()
+
+# — export —
+def export_per_course(
+    keys: Iterable[str],
+    fetch: Callable[[str], list[Row]],
+    stem: Path,
+    fmt: str,
+    *,
+    workers: int = 8,
+    desc: str = "courses",
+    columns: dict[str, str] | None = None,
+) -> tuple[int, Path]:
+    """
+    Run fetch(key) for every key not already checkpointed, at most `workers`
+    at a time, streaming each result to the sink as soon as it completes.
+    `columns` declares the output schema (see ParquetSink).
+    Returns the number of rows written in this run and the file they went to.
+    """
+    ckpt = Checkpoint(stem.with_suffix(".checkpoint"))
+    todo = [k for k in keys if k not in ckpt.done]
+    if ckpt.done:
+        print(f"Resuming: {len(ckpt.done):,} done, {len(todo):,} left")
+    sink = open_sink(stem, fmt, columns)
+    written = 0
+    unsaved: list[str] = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=len(todo), unit="course", desc=desc) as bar:
+            it = iter(todo)
+            pending: dict = {}
+
+            def refill() -> None:
+                # keep the in-flight window bounded instead of queueing every course up front
+                while len(pending) < workers * 2:
+                    key = next(it, None)
+                    if key is None:
+                        return
+                    pending[pool.submit(fetch, key)] = key
+
+            refill()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    key = pending.pop(fut)
+                    try:
+                        rows = fut.result()
+                    except Exception as e:
+                        print(f"⚠️ failed {key}: {e}", file=sys.stderr)
+                    else:
+                        unsaved.append(key)
+                        if sink.write(rows):
+                            for k in unsaved:
+                                ckpt.mark(k)
+                            unsaved.clear()
+                        written += len(rows)
+                    bar.update(1)
+                refill()
+    finally:
+        sink.close()
+        for k in unsaved:
+            ckpt.mark(k)
+        ckpt.close()
+    return written, sink.path
+
+
+def reset(stem: Path) -> None:
+    for p in stem.parent.glob(f"{stem.name}.*"):
+        p.unlink()
+
+
+def dump_list(client: MadGradesClient, endpoint: str, stem: Path, fmt: str) -> list[Row]:
+    """Paginated list endpoints are small; (re)write them whole."""
+    reset(stem)
+    records = list(client.paginate(endpoint))
+    sink = open_sink(stem, fmt)
+    sink.write(records)
+    sink.close()
+    print(f"{len(records):,} records written to {sink.path}")
+    return records
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="madgrades_export.py", description=__doc__,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("term", nargs="*", help="only keep grades for this term, e.g. Spring 2025 or 1254")
+    p.add_argument("--format", choices=FORMATS, default="csv")
+    p.add_argument("-j", "--concurrency", type=int, default=8, help="parallel requests / pooled connections")
+    p.add_argument("--rate", type=float, default=10.0, help="max requests per second (0 = unlimited)")
+    p.add_argument("--details", action="store_true", help="also fetch /v1/courses/<uuid> details")
+    p.add_argument("--lists", action="store_true", help="also dump /v1/subjects and /v1/instructors")
+    p.add_argument("--fresh", action="store_true", help="discard previous output and checkpoints")
+    p.add_argument("--out", type=Path, default=DATA_DIR, help="output directory")
+    return p
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    token = os.getenv("MG_TOKEN")
+    if not token:
+        print("ERROR: please set MG_TOKEN env var", file=sys.stderr)
+        sys.exit(1)
+    term_filter = term_code(" ".join(args.term)) if args.term else None
+    args.out.mkdir(parents=True, exist_ok=True)
+    fmt = args.format
+
+    client = MadGradesClient(token, pool_size=args.concurrency, rate=args.rate)
+
+    # 1) course catalogue
     print("Downloading course catalogue")
-    courses = list(get_paginated("/courses"))
-    pd.DataFrame(courses).to_csv(DATA_DIR / "madgrades_courses.csv", index=False)
-    print(f"{len(courses):,} courses written to {DATA_DIR/'madgrades_courses.csv'}")
+    courses = dump_list(client, "/courses", args.out / "madgrades_courses", fmt)
 
-    # 2) download grade distributions
+    # 2) grade distributions, streamed per course
     print("Downloading grade distributions")
-    grade_rows: list[dict[str, int | str]] = []
-    for course in tqdm(courses, unit="course"):
-        cid = course["id"]
-        resp = requests.get(
-            f"{API_BASE}/course_grades",
-            params={"course_id": cid},
-            headers=HEADERS,
-            timeout=30,
-        )
-        resp.raise_for_status()
-        for term in resp.json():
-            tc = str(term["term"])
-            if TERM_FILTER and tc != TERM_FILTER:
+
+    def grades(cid: str) -> list[Row]:
+        rows = []
+        for term in client.get("/course_grades", course_id=cid):
+            if term_filter and str(term["term"]) != term_filter:
                 continue
-            row = {"course_id": cid}
-            row.update(term)
-            grade_rows.append(row)
+            rows.append({"course_id": cid, **term})
+        return rows
+
+    grades_stem = args.out / ("madgrades_course_grades" + (f"_{term_filter}" if term_filter else ""))
+    if args.fresh:
+        reset(grades_stem)
+    n, path = export_per_course((str(c["id"]) for c in courses), grades, grades_stem, fmt,
+                                workers=args.concurrency, desc="grades", columns=GRADE_COLUMNS)
+    print(f"Completed – {n:,} grade rows written to {path}")
+
+    # 3) subjects / instructors
+    if args.lists:
+        dump_list(client, "/v1/subjects", args.out / "madgrades_subjects", fmt)
+        dump_list(client, "/v1/instructors", args.out / "madgrades_instructors", fmt)
 
-    out_name = "madgrades_course_grades"
-    if TERM_FILTER:
-        out_name += f"_{TERM_FILTER}"
-    out_path = DATA_DIR / f"{out_name}.csv"
-    pd.DataFrame(grade_rows).to_csv(out_path, index=False)
-    print(f"Completed – {len(grade_rows):,} grade rows written to {out_path}")
+    # 4) per-course details
+    if args.details:
+        print("Downloading course details")
+        uuids = [c["uuid"] for c in client.paginate("/v1/courses") if isinstance(c, dict) and c.get("uuid")]
+        details_stem = args.out / "madgrades_course_details"
+        if args.fresh:
+            reset(details_stem)
+        n, path = export_per_course(uuids, lambda u: [client.get(f"/v1/courses/{u}")], details_stem, fmt,
+                                    workers=args.concurrency, desc="details")
+        print(f"Completed – {n:,} course details written to {path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,29 @@
-import requests
+"""
+Scrape UW–Madison professors and their ratings from RateMyProfessors.
+
+Usage:
+  python scrape_ratemyprofessors_uwmadison.py                  # resume / first run
+  python scrape_ratemyprofessors_uwmadison.py --incremental    # re-fetch profs whose numRatings changed
+  python scrape_ratemyprofessors_uwmadison.py --fresh -j 8 --rate 4
+
+One JSON line per professor (with "comments") is appended to the output as
+soon as that professor's ratings are fetched.  The search cursor of the last
+fully written page is checkpointed, so an interrupted walk resumes there.
+Set RMP_GRAPHQL_URL to point the scraper at a local fake server.
+"""
+from __future__ import annotations
+import os
+import sys
 import json
-import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
+
+from http_utils import RateLimiter, pooled_session
 
 SCHOOL_ID = "U2Nob29sLTE4NDE4"  # UW–Madison RMP School ID
-BASE_URL = "https://www.ratemyprofessors.com/graphql"
+BASE_URL = os.getenv("RMP_GRAPHQL_URL", "https://www.ratemyprofessors.com/graphql")
 HEADERS = {
     "Content-Type": "application/json",
     "Referer": "https://www.ratemyprofessors.com/search/professors/18418",
@@ -13,28 +33,57 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
     "Connection": "keep-alive"
 }
+OUT_FILE = Path("ratemyprofessors_uwmadison_data.jsonl")
+PAGE_SIZE = 50
 
-def fetch_professors(cursor=None):
-    query = """
-    query SearchTeachers($schoolID: ID!, $query: String, $first: Int, $after: ID) {
-      search: searchTeachers(
-        schoolID: $schoolID
-        query: $query
-        first: $first
-        after: $after
-      ) {
+SEARCH_QUERY = """
+query SearchTeachers($schoolID: ID!, $query: String, $first: Int, $after: ID) {
+  search: searchTeachers(
+    schoolID: $schoolID
+    query: $query
+    first: $first
+    after: $after
+  ) {
+    edges {
+      cursor
+      node {
+        id
+        firstName
+        lastName
+        department
+        avgRating
+        numRatings
+        wouldTakeAgainPercent
+        avgDifficulty
+        legacyId
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+RATINGS_QUERY = """
+query TeacherRatingsPageQuery($id: ID!, $first: Int, $after: ID) {
+  node(id: $id) {
+    ... on Teacher {
+      id
+      ratings(first: $first, after: $after) {
         edges {
-          cursor
           node {
             id
-            firstName
-            lastName
-            department
-            avgRating
-            numRatings
-            wouldTakeAgainPercent
-            avgDifficulty
-            legacyId
+            date
+            comment
+            clarityRating
+            difficultyRating
+            grade
+            isForOnlineClass
+            ratingTags
+            attendanceMandatory
+            wouldTakeAgain
           }
         }
         pageInfo {
@@ -43,123 +92,165 @@ def fetch_professors(cursor=None):
         }
       }
     }
-    """
-    variables = {
-        "schoolID": SCHOOL_ID,
-        "query": "",
-        "first": 50,
-        "after": cursor
-    }
-    response = requests.post(
-        BASE_URL,
-        headers=HEADERS,
-        json={"query": query, "variables": variables}
-    )
-    try:
-        return response.json()
-    except Exception:
-        print("Non-JSON response received from RMP API:")
-        print("=" * 60)
-        print(response.text)
-        print("=" * 60)
-        raise
-
-def fetch_comments(prof_id):
-    query = """
-    query TeacherRatingsPageQuery($id: ID!, $first: Int, $after: ID) {
-      node(id: $id) {
-        ... on Teacher {
-          id
-          firstName
-          lastName
-          department
-          avgRating
-          numRatings
-          wouldTakeAgainPercent
-          avgDifficulty
-          ratings(first: $first, after: $after) {
-            edges {
-              node {
-                id
-                date
-                comment
-                clarityRating
-                difficultyRating
-                grade
-                isForOnlineClass
-                ratingTags
-                attendanceMandatory
-                wouldTakeAgain
-                grade
-              }
-            }
-            pageInfo {
-              hasNextPage
-              endCursor
-            }
-          }
-        }
-      }
-    }
-    """
-    all_comments = []
-    cursor = None
-    while True:
-        variables = {
-            "id": prof_id,
-            "first": 50,
-            "after": cursor
-        }
-        response = requests.post(
-            BASE_URL,
-            headers=HEADERS,
-            json={"query": query, "variables": variables}
-        )
+  }
+}
+"""
+
+
+class GraphQLClient:
+    """Pooled, rate-limited GraphQL POSTs; safe to share between worker threads."""
+
+    def __init__(self, url: str = BASE_URL, *, pool_size: int = 4, rate: float = 2.0, timeout: float = 30):
+        self.url = url
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        # the queries are read-only, so retrying the POST is safe
+        self.session = pooled_session(pool_size, headers=HEADERS, methods=("POST",))
+
+    def query(self, query: str, variables: dict[str, Any]) -> dict:
+        self.limiter.acquire()
+        response = self.session.post(self.url, json={"query": query, "variables": variables}, timeout=self.timeout)
         try:
             resp = response.json()
-        except Exception:
-            print("Non-JSON response received while fetching comments for professor ID", prof_id)
-            print("=" * 60)
-            print(response.text)
-            print("=" * 60)
+        except ValueError:
+            print("Non-JSON response received from RMP API:", file=sys.stderr)
+            print("=" * 60, file=sys.stderr)
+            print(response.text, file=sys.stderr)
+            print("=" * 60, file=sys.stderr)
             raise
-        ratings = resp["data"]["node"]["ratings"]
-        edges = ratings["edges"]
-        for edge in edges:
-            all_comments.append(edge["node"])
-        page_info = ratings["pageInfo"]
-        if page_info["hasNextPage"]:
-            cursor = page_info["endCursor"]
-            time.sleep(0.5)
-        else:
-            break
-    return all_comments
-
-# ----------- MAIN SCRIPT ----------- #
-
-all_data = []
-cursor = None
-
-print("Fetching professor list...")
-while True:
-    result = fetch_professors(cursor)
-    print("Full response from RMP API:", result)
-    edges = result["data"]["search"]["edges"]
-    if not edges:
-        break
-    for edge in edges:
-        prof = edge["node"]
-        print(f"Fetching comments for {prof['firstName']} {prof['lastName']}...")
-        prof["comments"] = fetch_comments(prof["id"])
-        all_data.append(prof)
-        time.sleep(1)  # Be polite!
-    page_info = result["data"]["search"]["pageInfo"]
-    if page_info["hasNextPage"]:
-        cursor = page_info["endCursor"]
-    else:
-        break
-
-with open("ratemyprofessors_uwmadison_data.json", "w") as f:
-    json.dump(all_data, f, indent=2)
-
-print(f"Scraped {len(all_data)} professors with comments!")
+        if resp.get("errors"):
+            raise RuntimeError(f"GraphQL errors: {resp['errors']}")
+        return resp["data"]
+
+
+def fetch_professor_pages(client: GraphQLClient, after: str | None = None) -> Iterator[tuple[list[dict], str | None]]:
+    """Yield (professors, cursor after this page) for each search page; cursor is None on the last."""
+    cursor = after
+    while True:
+        search = client.query(SEARCH_QUERY, {"schoolID": SCHOOL_ID, "query": "", "first": PAGE_SIZE, "after": cursor})["search"]
+        profs = [edge["node"] for edge in search["edges"]]
+        page_info = search["pageInfo"]
+        cursor = page_info["endCursor"] if page_info["hasNextPage"] else None
+        if profs:
+            yield profs, cursor
+        if cursor is None or not profs:
+            return
+
+
+def fetch_comments(client: GraphQLClient, prof_id: str) -> list[dict]:
+    all_comments = []
+    cursor = None
+    while True:
+        node = client.query(RATINGS_QUERY, {"id": prof_id, "first": PAGE_SIZE, "after": cursor})["node"]
+        ratings = node["ratings"]
+        all_comments.extend(edge["node"] for edge in ratings["edges"])
+        if not ratings["pageInfo"]["hasNextPage"]:
+            return all_comments
+        cursor = ratings["pageInfo"]["endCursor"]
+
+
+def load_professors(path: Path = OUT_FILE) -> dict[str, dict]:
+    """Latest record per professor id (incremental runs append newer lines)."""
+    profs: dict[str, dict] = {}
+    if path.exists():
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    prof = json.loads(line)
+                    profs[prof["id"]] = prof
+    return profs
+
+
+def _known_ratings(path: Path) -> dict[str, int]:
+    """id -> numRatings from the output file, without keeping the comments around."""
+    known: dict[str, int] = {}
+    if path.exists():
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    prof = json.loads(line)
+                    known[prof["id"]] = prof.get("numRatings")
+    return known
+
+
+def compact(path: Path = OUT_FILE) -> int:
+    """Rewrite the output keeping only the latest line per professor."""
+    profs = load_professors(path)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for prof in profs.values():
+            f.write(json.dumps(prof, ensure_ascii=False) + "\n")
+    tmp.replace(path)
+    return len(profs)
+
+
+def scrape(
+    client: GraphQLClient,
+    out: Path = OUT_FILE,
+    *,
+    workers: int = 4,
+    incremental: bool = False,
+) -> tuple[int, int]:
+    """
+    Walk the professor list and write each professor with comments as one line.
+
+    Professors already in `out` are skipped; with incremental=True they are
+    re-fetched when numRatings differs from the stored value.
+    Returns (written, skipped).
+    """
+    ckpt_path = out.with_suffix(".checkpoint.json")
+    after = None
+    if ckpt_path.exists():
+        after = json.loads(ckpt_path.read_text(encoding="utf-8")).get("after")
+        print(f"Resuming after cursor {after}")
+    known = _known_ratings(out)
+    written = skipped = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, out.open("a", encoding="utf-8") as f:
+        for profs, next_cursor in fetch_professor_pages(client, after):
+            todo = []
+            for prof in profs:
+                if prof["id"] in known and (not incremental or known[prof["id"]] == prof["numRatings"]):
+                    skipped += 1
+                else:
+                    todo.append(prof)
+            futures = [(prof, pool.submit(fetch_comments, client, prof["id"])) for prof in todo]
+            for prof, fut in futures:
+                prof["comments"] = fut.result()
+                f.write(json.dumps(prof, ensure_ascii=False) + "\n")
+                f.flush()
+                known[prof["id"]] = prof["numRatings"]
+                written += 1
+                print(f"{prof['firstName']} {prof['lastName']}: {len(prof['comments'])} ratings")
+            # only checkpoint once every professor on this page is on disk
+            ckpt_path.write_text(json.dumps({"after": next_cursor}), encoding="utf-8")
+
+    ckpt_path.unlink(missing_ok=True)
+    return written, skipped
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(prog="scrape_ratemyprofessors_uwmadison.py", description=__doc__,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--out", type=Path, default=OUT_FILE, help="JSONL output file")
+    p.add_argument("-j", "--concurrency", type=int, default=4, help="professors fetched in parallel")
+    p.add_argument("--rate", type=float, default=2.0, help="max requests per second (0 = unlimited)")
+    p.add_argument("--incremental", action="store_true", help="re-fetch professors whose numRatings changed")
+    p.add_argument("--fresh", action="store_true", help="discard previous output and checkpoint")
+    p.add_argument("--compact", action="store_true", help="drop superseded lines when done")
+    args = p.parse_args(argv)
+
+    if args.fresh:
+        args.out.unlink(missing_ok=True)
+        args.out.with_suffix(".checkpoint.json").unlink(missing_ok=True)
+
+    client = GraphQLClient(pool_size=args.concurrency, rate=args.rate)
+    print("Fetching professor list...")
+    written, skipped = scrape(client, args.out, workers=args.concurrency, incremental=args.incremental)
+    print(f"Scraped {written} professors with comments ({skipped} unchanged, skipped)")
+    if args.compact:
+        print(f"Compacted {args.out} to {compact(args.out)} professors")
+
+
+if __name__ == "__main__":
+    main()
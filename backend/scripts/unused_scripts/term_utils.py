@@ -1,5 +1,8 @@
 # === term_utils.py ===
-"""Translate human-readable academic term to PeopleSoft 4-digit code"""
+"""Translate human-readable academic term to PeopleSoft 4-digit code
+
+The code's year is the academic year's end: Fall 2024 is 1252, Spring 2025 1254.
+"""
 import re
 import sys
 from datetime import datetime
@@ -52,6 +55,8 @@ def term_code(term: str | int | None = None, *, default_current=True) -> str:
         raise ValueError(f"Could not recognize year in '{term}'")
     if not (1900 <= year <= 2100):
         raise ValueError("Year out of supported range 1900-2100.")
+    if season == 'fall':
+        year += 1  # fall opens the next academic year
     code_val = (year - 1900) * 10 + SESSION_DIGITS[season]
     return str(code_val)
 
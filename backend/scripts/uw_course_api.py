@@ -13,6 +13,10 @@ Usage examples (normal mode):
   uw_course_api.py all -r
   uw_course_api.py all --subjects COMPSCI,MATH
   uw_course_api.py all --range COMPSCI_1000-COMPSCI_1100
+  uw_course_api.py all --shard 0/4      # one of 4 disjoint slices
+  uw_course_api.py merge                # fold shard downloads into c-data/courses
+  uw_course_api.py stats               # latency/status summary of the last run
+  uw_course_api.py export --format arrow   # per-term grade/offering tables
 
 Global flags:
   --safe                               # force “safe mode” (reduced functionality)
@@ -24,8 +28,12 @@ Developer mode:
   test                                  # run built-in test suite
 """
 from __future__ import annotations
+import os
 import sys
 import signal
+import shutil
+import zlib
+import hashlib
 import importlib.util
 import argparse
 import json
@@ -35,6 +43,8 @@ import threading
 from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable
 import requests
 
 # -------------------------------------------------------------------
@@ -49,8 +59,11 @@ CONFIG_FILE = SETTINGS_DIR / "config.json"
 LOG_DIR = ROOT / "core" / "logs"
 ETAG_CACHE = LOG_DIR / "etag_cache.json"
 LOG_FILE = LOG_DIR / "app.log"
+TELEMETRY_DIR = LOG_DIR / "telemetry"
 COURSE_NAMES = ROOT / "core" / "course_names.json"
+COURSE_CACHE = ROOT / "courses"
 DEFAULT_DIR = ROOT
+BACKEND_DIR = Path(__file__).resolve().parent.parent
 
 print(VERSION_BANNER)
 
@@ -65,12 +78,13 @@ if not ETAG_CACHE.exists():
 # -------------------------------------------------------------------
 # Config
 # -------------------------------------------------------------------
-_default_config = {"max_workers_cap": 20}
+_default_config = {"max_workers_cap": 20, "course_cache_ttl": 86400}
 def load_config() -> dict:
     if not CONFIG_FILE.exists():
         save_config(_default_config)
         return dict(_default_config)
-    return json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
+    # keys added in later versions fall back to their defaults
+    return {**_default_config, **json.loads(CONFIG_FILE.read_text(encoding="utf-8"))}
 
 def save_config(cfg: dict) -> None:
     SETTINGS_DIR.mkdir(parents=True, exist_ok=True)
@@ -148,12 +162,12 @@ session.headers.update({"User-Agent": f"uw_course_api/{VERSION}"})
 # ETag cache utilities
 # -------------------------------------------------------------------
 _etag_lock = threading.Lock()
-def load_etags() -> dict[str, str]:
+def load_etags(path: Path = ETAG_CACHE) -> dict[str, str]:
     with _etag_lock:
-        return json.loads(ETAG_CACHE.read_text(encoding="utf-8"))
-def save_etags(d: dict[str, str]) -> None:
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+def save_etags(d: dict[str, str], path: Path = ETAG_CACHE) -> None:
     with _etag_lock:
-        ETAG_CACHE.write_text(json.dumps(d, indent=2), encoding="utf-8")
+        path.write_text(json.dumps(d, indent=2), encoding="utf-8")
 
 # -------------------------------------------------------------------
 # Helpers
@@ -186,6 +200,185 @@ def fmt_dur(seconds: float) -> str:
     sec = int(seconds % 60)
     return f"{minutes}:{sec:02d}"
 
+def is_course_code(stem: str) -> bool:
+    """SUBJECT_number file stems; progress.json, etags.json etc. are not courses."""
+    subject, _, number = stem.rpartition("_")
+    return bool(subject) and number.isdigit()
+
+# -------------------------------------------------------------------
+# Sharding
+# -------------------------------------------------------------------
+def parse_shard(text: str) -> tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        i, n = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected i/N, e.g. 0/4") from None
+    if n < 1 or not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{n - 1}" if n >= 1 else "N must be >= 1")
+    return i, n
+
+def shard_of(code: str, count: int) -> int:
+    """
+    The shard that owns a course code. Keyed on the course number alone, so
+    every listing of a cross-listed course (COMPSCI/MATH/STAT 475) falls in
+    the same shard and is still fetched once; crc32 rather than hash() so the
+    split is the same on every host and Python version.
+    """
+    return zlib.crc32(code.rpartition("_")[2].encode()) % count
+
+def shard_dir(base: Path, shard: tuple[int, int]) -> Path:
+    return base / "shards" / f"{shard[0]}-of-{shard[1]}"
+
+# -------------------------------------------------------------------
+# Per-request telemetry
+# -------------------------------------------------------------------
+_attempts = threading.local()   # http_get calls made by the current task
+
+class TelemetryLog:
+    """
+    One JSON line per request of a bulk run:
+      {"t": start (unix s), "code", "status": 200|304|404|"alias"|"error",
+       "bytes", "ms": latency, "retries", "worker"}
+    Written under a lock and flushed every `flush_every` records so a killed
+    run keeps (almost) everything.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 50):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._f = path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.flush_every = flush_every
+
+    def record(self, code: str, status: int|str, nbytes: int, started: float, seconds: float, retries: int) -> None:
+        worker = threading.current_thread().name.rpartition("_")[2]
+        line = json.dumps({
+            "t": round(started, 3), "code": code, "status": status, "bytes": nbytes,
+            "ms": round(seconds * 1000, 1), "retries": retries, "worker": worker,
+        }, separators=(",",":"))
+        with self._lock:
+            self._f.write(line + "\n")
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._f.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+
+# -------------------------------------------------------------------
+# Content-addressed course storage
+# -------------------------------------------------------------------
+class CourseStore:
+    """
+    Each distinct course body is written once to <root>/blobs/<sha256>.json
+    and every code it is listed under is a hard link <root>/<code>.json to
+    that blob, so cross-listed courses (COMPSCI/MATH/STAT 475) cost one file
+    and one download, while readers still open <code>.json as before.
+
+    blobs/aliases.json maps alias code -> canonical code (first subject in
+    course_reference) so later runs can skip fetching aliases outright.
+    A new body for a course relinks every listing of it already on disk:
+    one left on the old blob would be a second, stale course to readers.
+    """
+
+    def __init__(self, root: Path, indent: int|None = 2):
+        self.root = root
+        self.blobs = root / "blobs"
+        self.indent = indent
+        self.alias_file = self.blobs / "aliases.json"
+        self.aliases: dict[str, str] = {}
+        if self.alias_file.exists():
+            self.aliases = json.loads(self.alias_file.read_text(encoding="utf-8"))
+        self._listings: dict[str, set[str]] = {}    # canonical code -> its alias codes
+        for alias, canon in self.aliases.items():
+            self._listings.setdefault(canon, set()).add(alias)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def codes_of(data: dict) -> list[str]:
+        """Every code a course is listed under, canonical (first subject) first."""
+        ref = data.get("course_reference") or {}
+        return [f"{s}_{ref.get('course_number')}" for s in ref.get("subjects") or ()]
+
+    def _group(self, canon: str) -> list[str]:
+        """Every known code of a course, canonical first. Caller holds the lock."""
+        return [canon, *sorted(self._listings.get(canon, ()))]
+
+    def canonical(self, code: str) -> str|None:
+        """A stored listing of the course this code is a cross-listing of, if any."""
+        with self._lock:
+            canon = self.aliases.get(code) or (code if code in self._listings else None)
+            group = self._group(canon) if canon else []
+        return next((c for c in group if c != code and (self.root / f"{c}.json").exists()), None)
+
+    def put(self, code: str, data: dict, wanted: set[str]|None = None) -> list[str]:
+        """
+        Store a course body under code and link its cross-listed codes
+        (only those in wanted, when given, plus every listing already
+        stored). Returns the codes linked.
+        """
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",",":")).encode()).hexdigest()
+        blob = self.blobs / f"{digest}.json"
+        if not blob.exists():
+            self.blobs.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_name(f"{digest}.{threading.get_ident()}.tmp")
+            text = json.dumps(data, indent=self.indent) if self.indent is not None else json.dumps(data, separators=(",",":"))
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, blob)
+
+        codes = self.codes_of(data)
+        group = []
+        if codes:
+            with self._lock:
+                for c in codes[1:]:
+                    self.aliases[c] = codes[0]
+                    self._listings.setdefault(codes[0], set()).add(c)
+                group = self._group(codes[0])
+        linked = [code] + [c for c in group if c != code and (
+            (c in codes and (wanted is None or c in wanted)) or (self.root / f"{c}.json").exists())]
+        for c in linked:
+            self._link(c, blob)
+        return linked
+
+    def _link(self, code: str, blob: Path) -> None:
+        dest = self.root / f"{code}.json"
+        if dest.exists() and os.path.samefile(dest, blob):
+            return
+        # link beside the target and rename over it: never write through an
+        # existing link, that would change the blob every alias shares
+        tmp = dest.with_name(f"{code}.{threading.get_ident()}.tmp")
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)  # filesystem without hard links
+        os.replace(tmp, dest)
+        logger.debug(f"Linked {dest} -> {blob.name}")
+
+    def link_alias(self, code: str) -> bool:
+        """Point an alias code at its canonical course's blob without fetching it."""
+        stored = self.canonical(code)
+        if stored is None:
+            return False
+        self._link(code, self.root / f"{stored}.json")
+        return True
+
+    def save(self) -> None:
+        """Persist the alias map and drop blobs no code links to any more."""
+        with self._lock:
+            write_json(dict(sorted(self.aliases.items())), self.alias_file, indent=2)
+            for blob in self.blobs.glob("*.json"):
+                if blob != self.alias_file and blob.stat().st_nlink == 1:
+                    blob.unlink()
+
+    def clear(self) -> None:
+        shutil.rmtree(self.blobs, ignore_errors=True)
+        self.aliases = {}
+        self._listings = {}
+
 # -------------------------------------------------------------------
 # HTTP GET with ETag & retry (no retry on 404)
 # -------------------------------------------------------------------
@@ -201,6 +394,7 @@ if not SAFE_MODE:
         if etag:
             headers["If-None-Match"] = etag
         logger.debug(f"GET {url}")
+        _attempts.n = getattr(_attempts, "n", 0) + 1
         r = session.get(url, headers=headers, timeout=10)
         if r.status_code == 404 or r.status_code == 304:
             return r
@@ -210,6 +404,7 @@ else:
     def http_get(path: str, etag: str|None = None) -> requests.Response:
         url = BASE_URL + path
         logger.debug(f"GET {url}")
+        _attempts.n = getattr(_attempts, "n", 0) + 1
         return session.get(url, timeout=10)
 
 
@@ -230,43 +425,122 @@ def cmd_subjects(args: argparse.Namespace):
 def cmd_terms(_: argparse.Namespace):
     print(json.dumps(http_get("/terms.json").json(), indent=2))
 
-def cmd_course(args: argparse.Namespace) -> None:
+def compile_field(path: str) -> Callable[[object], object]:
     """
-    Fetch a single course and report how long it took.
+    Turn a dot-path like “schedules.0.days” into a getter once, so applying it
+    to many courses doesn't re-split the path. Digit parts index lists and
+    still work as keys of dicts (term_data.1262...).
     """
-    code = args.course_code.replace("/","_").replace(" ","_").upper()
-    path = f"/course/{code}.json"
-    etags = load_etags()
-    et = etags.get(code)
+    steps = tuple((p, int(p) if p.lstrip("-").isdigit() else None) for p in path.split("."))
+    def get(obj: object) -> object:
+        for key, idx in steps:
+            try:
+                obj = obj[idx] if isinstance(obj, list) and idx is not None else obj[key]  # type: ignore[index]
+            except (KeyError, IndexError, TypeError):
+                raise LookupError(f"field '{path}' not found") from None
+        return obj
+    return get
 
+def fetch_course(code: str, etag: str|None, ttl: float, store: CourseStore) -> tuple[str, dict|None, str, float, str|None]:
+    """
+    Read-through lookup in COURSE_CACHE: a file younger than ttl seconds is
+    used as-is, an older one is revalidated with its ETag, a missing one is
+    downloaded (or linked, for a cross-listing of a stored course).
+    Returns (code, data, source, seconds, new etag).
+    """
+    dest = COURSE_CACHE / f"{code}.json"
     t0 = time.monotonic()
-    r = http_get(path, et)
-    elapsed = time.monotonic() - t0
+    if not dest.exists() and store.link_alias(code):
+        return code, json.loads(dest.read_text(encoding="utf-8")), "linked", time.monotonic() - t0, None
+    if dest.exists():
+        if time.time() - dest.stat().st_mtime < ttl:
+            return code, json.loads(dest.read_text(encoding="utf-8")), "cached", time.monotonic() - t0, None
+    else:
+        etag = None  # a 304 is useless without the file it validates
 
+    r = http_get(f"/course/{code}.json", etag)
     if r.status_code == 404:
-        logger.info(f"{code} not found (404), skipping")
-        print(f"{code}: not found (took {fmt_dur(elapsed)})")
-        return
-
+        return code, None, "not found", time.monotonic() - t0, None
     if r.status_code == 304:
-        logger.info(f"{code} not modified, skipping write")
-        print(f"{code}: not modified (took {fmt_dur(elapsed)})")
-        return
-
+        dest.touch()  # revalidated: restart its ttl
+        return code, json.loads(dest.read_text(encoding="utf-8")), "not modified", time.monotonic() - t0, None
     data = r.json()
-    outp = Path(args.out) if args.out else DEFAULT_DIR/f"{code}.json"
-    write_json(data, outp, indent=2)
+    store.put(code, data, wanted=set())
+    return code, data, "downloaded", time.monotonic() - t0, r.headers.get("ETag")
+
+def cmd_course(args: argparse.Namespace) -> None:
+    """
+    Fetch one or more courses through the local cache and report how long
+    each took. Several codes are fetched concurrently; “-” reads codes from stdin.
+    """
+    raw = args.course_code
+    if raw == ["-"]:
+        raw = sys.stdin.read().split()
+    codes = list(dict.fromkeys(c.replace("/","_").replace(" ","_").upper() for c in raw))
+    if args.out and len(codes) > 1:
+        sys.exit("--out only works with a single course code")
+    fields = [(f, compile_field(f)) for f in (args.field or [])]
+    ttl = 0 if args.refresh else (args.ttl if args.ttl is not None else _cfg.get("course_cache_ttl", 86400))
+
+    etags = load_etags()
+    store = CourseStore(COURSE_CACHE)
+    workers = max(1, min(len(codes), _cfg["max_workers_cap"]))
+    changed = False
 
-    if (E := r.headers.get("ETag")):
-        etags[code] = E
+    def one(code: str) -> tuple[str, dict|None, str, float, str|None]:
+        # one unreachable course shouldn't abort a batch of hundreds
+        try:
+            return fetch_course(code, etags.get(code), ttl, store)
+        except Exception as e:
+            logger.debug(f"{code} failed", exc_info=True)
+            return code, None, f"error: {e}", 0.0, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for code, data, source, elapsed, new_etag in pool.map(one, codes):
+            if new_etag:
+                etags[code] = new_etag
+                changed = True
+            if data is None:
+                logger.info(f"{code} {source}, skipping")
+                print(f"{code}: {source} (took {fmt_dur(elapsed)})")
+                continue
+            if fields:
+                for name, get in fields:
+                    try:
+                        val = json.dumps(get(data))
+                    except LookupError as e:
+                        val = f"<{e}>"
+                    prefix = f"{code}\t" if len(codes) > 1 else ""
+                    prefix += f"{name}\t" if len(fields) > 1 else ""
+                    print(prefix + val)
+                continue
+            if args.out:
+                write_json(data, Path(args.out), indent=2)
+            if args.stdout:
+                print(json.dumps(data, indent=2))
+            where = args.out or COURSE_CACHE / f"{code}.json"
+            print(f"{code}: {source}, {where} (took {fmt_dur(elapsed)})")
+    if changed:
         save_etags(etags)
+    store.save()
+
+# set by main() when --profile is given (backend/profiling.py)
+_profiler = None
+
+def _phase(name: str):
+    """A named profiling phase; a no-op unless --profile is on."""
+    return _profiler.phase(name) if _profiler is not None else nullcontext()
+
+def take_snapshot(courses_dir: Path, message: str) -> None:
+    """Record courses_dir as a catalog version (backend/snapshots.py) if it changed."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from snapshots import Snapshots
+
+    meta = Snapshots(ROOT / "snapshots").commit(courses_dir, message)
+    if meta:
+        print(f"Snapshot {meta['version']} ({message}): {meta['changed']} changed, {len(meta['removed'])} removed")
 
-    msg = f"Saved {code} to {outp} (took {fmt_dur(elapsed)})"
-    if args.stdout:
-        print(json.dumps(data, indent=2))
-        print(msg)
-    else:
-        print(msg)
 def cmd_all(args: argparse.Namespace) -> None:
     """
     Bulk fetch courses, resuming from progress.json unless reset or update-existing,
@@ -290,44 +564,49 @@ def cmd_all(args: argparse.Namespace) -> None:
     print(f"Starting with up to {workers} workers (cap={cap})...")
 
 
-    use_cache = (
-        COURSE_NAMES.exists()
-        and not args.reset
-        and not args.update_existing
-        and not args.subjects
-        and not args.range
-        and args.max_workers is None
-    )
-    if use_cache:
-        created = datetime.fromtimestamp(COURSE_NAMES.stat().st_mtime).isoformat()
-        print(f"Using cached course list from {created}")
-        codes = json.loads(COURSE_NAMES.read_text(encoding="utf-8"))
-    else:
-        subs_map = http_get("/subjects.json").json()
-        if args.subjects:
-            subjects = args.subjects.split(",")
-        else:
-            subjects = list(subs_map.keys())
-
-        if args.range:
-            try:
-                start, end = args.range.split("-")
-                sub_s, num_s = start.split("_")
-                sub_e, num_e = end.split("_")
-                if sub_s != sub_e:
-                    raise ValueError
-                subjects = [sub_s]
-                num_start, num_end = int(num_s), int(num_e)
-            except ValueError:
-                sys.exit("Invalid --range format; expected SUBJECT_start-SUBJECT_end")
+    with _phase("course list"):
+        use_cache = (
+            COURSE_NAMES.exists()
+            and not args.reset
+            and not args.update_existing
+            and not args.subjects
+            and not args.range
+            and args.max_workers is None
+        )
+        if use_cache:
+            created = datetime.fromtimestamp(COURSE_NAMES.stat().st_mtime).isoformat()
+            print(f"Using cached course list from {created}")
+            codes = json.loads(COURSE_NAMES.read_text(encoding="utf-8"))
         else:
-            num_start, num_end = 0, 999
-
-        codes = [
-            f"{subj}_{n}"
-            for subj in subjects
-            for n in range(num_start, (num_end if args.range else 1000))
-        ]
+            subs_map = http_get("/subjects.json").json()
+            if args.subjects:
+                subjects = args.subjects.split(",")
+            else:
+                subjects = list(subs_map.keys())
+
+            if args.range:
+                try:
+                    start, end = args.range.split("-")
+                    sub_s, num_s = start.split("_")
+                    sub_e, num_e = end.split("_")
+                    if sub_s != sub_e:
+                        raise ValueError
+                    subjects = [sub_s]
+                    num_start, num_end = int(num_s), int(num_e)
+                except ValueError:
+                    sys.exit("Invalid --range format; expected SUBJECT_start-SUBJECT_end")
+            else:
+                num_start, num_end = 0, 999
+
+            codes = [
+                f"{subj}_{n}"
+                for subj in subjects
+                for n in range(num_start, (num_end if args.range else 1000))
+            ]
+
+    if args.shard:
+        codes = [c for c in codes if shard_of(c, args.shard[1]) == args.shard[0]]
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(codes)} codes")
 
     total = len(codes)
     t_start = time.monotonic()
@@ -339,14 +618,26 @@ def cmd_all(args: argparse.Namespace) -> None:
         out_root = ROOT / "courses" / "filtered" / filt
     else:
         out_root = ROOT / "courses"
+    # a shard keeps its own files and ETags so concurrent shards never share
+    # a file; `merge` folds them into the catalog afterwards
+    if args.shard:
+        out_root = shard_dir(out_root, args.shard)
     out_root.mkdir(parents=True, exist_ok=True)
     prog_file = out_root / "progress.json"
+    etag_file = out_root / "etags.json" if args.shard else ETAG_CACHE
+    store = CourseStore(out_root, indent)
+
 
+    # a full run rewrites the catalog in place: keep the current state as a version first
+    snapshot = not (args.subjects or args.range or args.shard or args.no_snapshot) and (args.reset or args.update_existing)
+    if snapshot:
+        take_snapshot(out_root, "before all " + ("--reset" if args.reset else "--update-existing"))
 
     if args.reset:
 
         for p in out_root.glob("*.json"):
             p.unlink()
+        store.clear()
 
         if prog_file.exists():
             prog_file.unlink()
@@ -367,7 +658,7 @@ def cmd_all(args: argparse.Namespace) -> None:
     if args.update_existing:
         api_ts = http_get("/update.json").json()["updated_on"]
         api_dt = datetime.fromisoformat(api_ts.replace("Z", "+00:00"))
-        existing = [p.stem for p in out_root.glob("*.json")]
+        existing = [p.stem for p in out_root.glob("*.json") if is_course_code(p.stem)]
         stale = []
         for code in existing:
             m = datetime.fromtimestamp(
@@ -383,23 +674,38 @@ def cmd_all(args: argparse.Namespace) -> None:
     last_attempted: str | None = None
     last_saved:     str | None = None
     saved_count = 0
+    alias_count = 0
+    wanted = set(codes)
 
-    def task(code: str) -> tuple[str, int, float]:
+    telemetry = TelemetryLog(TELEMETRY_DIR / f"all-{datetime.now():%Y%m%d-%H%M%S}.jsonl")
+    print(f"Request log: {telemetry.path}")
+
+    def task(code: str) -> tuple[str, int, float, bool]:
+        started = time.time()
         t0 = time.monotonic()
-        etags = load_etags()
+        # a cross-listing of a course already stored is linked, not fetched
+        if store.link_alias(code):
+            telemetry.record(code, "alias", 0, started, time.monotonic() - t0, 0)
+            return code, 0, time.monotonic() - t0, True
+        etags = load_etags(etag_file)
         et = etags.get(code)
-        r = http_get(f"/course/{code}.json", et)
+        _attempts.n = 0
+        try:
+            r = http_get(f"/course/{code}.json", et)
+        except Exception:
+            telemetry.record(code, "error", 0, started, time.monotonic() - t0, max(_attempts.n - 1, 0))
+            raise
         took = time.monotonic() - t0
+        telemetry.record(code, r.status_code, len(r.content), started, took, _attempts.n - 1)
 
         if r.status_code in (404, 304):
-            return code, 0, took
+            return code, 0, took, False
 
-        data = r.json()
-        write_json(data, out_root / f"{code}.json", indent)
+        store.put(code, r.json(), wanted)
         if (etag := r.headers.get("ETag")):
             etags[code] = etag
-            save_etags(etags)
-        return code, len(r.content), took
+            save_etags(etags, etag_file)
+        return code, len(r.content), took, False
 
 
     live_ctx = None
@@ -412,10 +718,11 @@ def cmd_all(args: argparse.Namespace) -> None:
 
 
     try:
-        with ThreadPoolExecutor(max_workers=workers) as pool:
-            for i, (code, got, took) in enumerate(pool.map(task, codes), start=1):
+        with _phase("download"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worker") as pool:
+            for i, (code, got, took, aliased) in enumerate(pool.map(task, codes), start=1):
                 last_attempted = code
-                if got > 0:
+                alias_count += aliased
+                if got > 0 or aliased:
                     last_saved = code
                     saved_count += 1
   
@@ -455,20 +762,232 @@ def cmd_all(args: argparse.Namespace) -> None:
     finally:
         if live_ctx:
             live_ctx.__exit__(None, None, None)
+        store.save()
+        telemetry.close()
 
 
     print(
-        f"Done: {saved_count}/{total} courses saved, "
+        f"Done: {saved_count}/{total} courses saved ({alias_count} cross-listings linked), "
         f"{human_bytes(total_bytes)} downloaded in {fmt_dur(time.monotonic() - t_start)}"
     )
+    if snapshot:
+        take_snapshot(out_root, "after all " + ("--reset" if args.reset else "--update-existing"))
 
   
-    if not (args.subjects or args.range or args.update_existing) and saved_count == total:
+    if args.shard:
+        # also marks the shard as finished for `merge`
+        names = sorted(p.stem for p in out_root.glob("*.json") if is_course_code(p.stem))
+        write_json(names, out_root / "course_names.json", indent=2)
+        print(f"Shard done; fold it into {ROOT / 'courses'} with `merge`")
+    elif not (args.subjects or args.range or args.update_existing) and saved_count == total:
         names = sorted(p.stem for p in (ROOT/"courses").glob("*.json"))
         write_json(names, COURSE_NAMES, indent=2)
         print(f"Wrote complete course list ({len(names)}) to {COURSE_NAMES}")
 
 
+def cmd_merge(args: argparse.Namespace) -> None:
+    """
+    Fold shard (or filtered) download directories into the catalog without
+    downloading anything: course files go through the blob store (so
+    cross-listings stay hard links), a code found in several sources takes
+    the newest file, each shard's ETags join the ETag cache, and a complete
+    i-of-N shard set also writes the course name list.
+    """
+    base = ROOT / "courses"
+    sources = [Path(s) for s in args.sources] or sorted((base / "shards").glob("*-of-*"))
+    if not sources:
+        sys.exit(f"No shard directories under {base / 'shards'}; run `all --shard i/N` first")
+    for src in sources:
+        if not src.is_dir():
+            sys.exit(f"Not a directory: {src}")
+    out_root = Path(args.out) if args.out else base
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    picked: dict[str, tuple[Path, Path, float]] = {}   # code -> (source, file, mtime)
+    for src in sources:
+        for p in src.glob("*.json"):
+            if not is_course_code(p.stem):
+                continue
+            mtime = p.stat().st_mtime
+            if p.stem not in picked or mtime > picked[p.stem][2]:
+                picked[p.stem] = (src, p, mtime)
+    print(f"{len(picked)} courses in {len(sources)} source(s)")
+
+    canonical = out_root.resolve() == base.resolve()
+    if canonical and not args.no_snapshot:
+        take_snapshot(out_root, "before merge")
+
+    store = CourseStore(out_root, 2 if args.pretty else None)
+    wanted = set(picked)
+    parsed: dict[tuple[int, int], dict] = {}   # linked cross-listings are read once
+    added = updated = 0
+    t0 = time.monotonic()
+    try:
+        for code, (_, path, _) in sorted(picked.items()):
+            st = path.stat()
+            data = parsed.get((st.st_dev, st.st_ino))
+            if data is None:
+                data = parsed[(st.st_dev, st.st_ino)] = json.loads(path.read_text(encoding="utf-8"))
+            dest = out_root / f"{code}.json"
+            before = dest.stat().st_ino if dest.exists() else None
+            store.put(code, data, wanted)
+            if before is None:
+                added += 1
+            elif dest.stat().st_ino != before:
+                updated += 1
+    finally:
+        store.save()
+
+    etags = load_etags()
+    merged_etags = 0
+    for src in sources:
+        shard_etags = load_etags(src / "etags.json")
+        for code, etag in shard_etags.items():
+            if code in picked and picked[code][0] == src:
+                etags[code] = etag
+                merged_etags += 1
+    save_etags(etags)
+    print(f"Merged in {fmt_dur(time.monotonic() - t0)}: {added} added, {updated} updated, "
+          f"{len(picked) - added - updated} unchanged; {merged_etags} ETags")
+
+    # the name list only makes sense for the whole catalog: every shard of one split, each finished
+    splits: dict[int, dict[int, Path]] = {}
+    for src in sources:
+        i, _, n = src.name.partition("-of-")
+        if i.isdigit() and n.isdigit():
+            splits.setdefault(int(n), {})[int(i)] = src
+    for n, shards in sorted(splits.items()):
+        finished = [i for i, src in shards.items() if (src / "course_names.json").exists()]
+        if canonical and len(finished) == n:
+            names = sorted(p.stem for p in out_root.glob("*.json") if is_course_code(p.stem))
+            write_json(names, COURSE_NAMES, indent=2)
+            print(f"Shards 0..{n - 1} complete: wrote course list ({len(names)}) to {COURSE_NAMES}")
+        else:
+            missing = sorted(set(range(n)) - set(finished))
+            print(f"Split of {n}: shard(s) {', '.join(map(str, missing)) or '-'} missing or unfinished; "
+                  f"course list not written")
+
+    if canonical and not args.no_snapshot:
+        take_snapshot(out_root, "after merge")
+    if args.clean:
+        for src in sources:
+            shutil.rmtree(src)
+        print(f"Removed {len(sources)} merged source(s)")
+
+
+def cmd_ingest(args: argparse.Namespace) -> None:
+    """
+    Parse and index the downloaded courses with the backend's ingest (same
+    code path app.py uses at startup) and report timing.
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from ingest import ingest
+
+    src = Path(args.dir) if args.dir else ROOT / "courses"
+
+    def show(done: int, total: int) -> None:
+        print(f"\r{done}/{total} files", end="", flush=True)
+
+    result = ingest(src, progress=show)
+    print()
+    print(result.summary())
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    """
+    Flatten term_data into long-format grade and offering tables
+    (backend/columnar.py), streamed in row groups.
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    try:
+        from columnar import export, print_result
+    except ImportError as e:
+        if e.name and e.name.startswith("pyarrow"):
+            sys.exit("export needs pyarrow: pip install pyarrow")
+        raise
+
+    src = Path(args.dir) if args.dir else ROOT / "courses"
+    out = Path(args.out) if args.out else ROOT / "exports"
+    print_result(export(src, out, args.format, max(1, args.row_group)))
+
+
+def _latency_key(ms: float) -> float:
+    # 0.1 ms resolution below 10 ms, 1 ms above: bounded histogram size
+    return round(ms, 1) if ms < 10 else float(int(ms))
+
+def _percentiles(hist: dict[float, int], qs: tuple[float, ...]) -> list[float]:
+    total = sum(hist.values())
+    out = []
+    keys = sorted(hist)
+    i = acc = 0
+    for q in qs:
+        target = q * total
+        while i < len(keys) and acc + hist[keys[i]] < target:
+            acc += hist[keys[i]]
+            i += 1
+        out.append(keys[min(i, len(keys) - 1)] if keys else 0.0)
+    return out
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    """
+    Summarize request logs written by `all` in one streaming pass: latency
+    percentiles (overall and per status), status mix, and requests, bytes and
+    retries per time interval. Memory is bounded by histogram buckets and
+    intervals, not by the number of requests.
+    """
+    files = [Path(f) for f in args.files] or sorted(TELEMETRY_DIR.glob("all-*.jsonl"))[-1:]
+    if not files:
+        sys.exit(f"No request logs in {TELEMETRY_DIR}; run `all` first")
+    qs = (0.5, 0.95, 0.99)
+    hist: dict[float, int] = {}
+    by_status: dict[str, dict[float, int]] = {}
+    buckets: dict[int, list[int]] = {}   # interval -> [requests, bytes, retries, errors]
+    n = nbytes = retries = 0
+    first = last = None
+    for f in files:
+        with f.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted run
+                n += 1
+                nbytes += e["bytes"]
+                retries += e["retries"]
+                first = e["t"] if first is None else min(first, e["t"])
+                last = e["t"] if last is None else max(last, e["t"])
+                k = _latency_key(e["ms"])
+                hist[k] = hist.get(k, 0) + 1
+                sh = by_status.setdefault(str(e["status"]), {})
+                sh[k] = sh.get(k, 0) + 1
+                b = buckets.setdefault(int(e["t"] // args.interval), [0, 0, 0, 0])
+                b[0] += 1
+                b[1] += e["bytes"]
+                b[2] += e["retries"]
+                b[3] += e["status"] == "error"
+    if not n:
+        sys.exit("Request log is empty")
+
+    span = max((last or 0) - (first or 0), 1e-9)
+    p50, p95, p99 = _percentiles(hist, qs)
+    print(f"{n} requests from {', '.join(map(str, files))}")
+    print(f"Span {fmt_dur(span)}, {n / span:.1f} req/s, {human_bytes(nbytes)} ({human_bytes(nbytes / span)}/s), {retries} retries")
+    print(f"Latency ms: p50={p50} p95={p95} p99={p99}")
+    print()
+    print(f"{'status':<8}{'count':>9}{'share':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for status, sh in sorted(by_status.items(), key=lambda kv: -sum(kv[1].values())):
+        c = sum(sh.values())
+        print(f"{status:<8}{c:>9}{c / n:>8.1%}" + "".join(f"{v:>9}" for v in _percentiles(sh, qs)))
+    print()
+    print(f"{'interval':<10}{'req/s':>9}{'bytes/s':>12}{'retries':>9}{'errors':>8}")
+    start = int(first // args.interval)
+    for k in sorted(buckets):
+        req, b, r, err = buckets[k]
+        offset = fmt_dur((k - start) * args.interval) if k > start else "0:00"
+        print(f"+{offset:<9}{req / args.interval:>9.1f}{human_bytes(b / args.interval) + '/s':>12}{r:>9}{err:>8}")
+
 
 def cmd_config(args: argparse.Namespace):
     cfg = load_config()
@@ -606,6 +1125,8 @@ def build_parser(dev_mode: bool) -> argparse.ArgumentParser:
     p.add_argument("--safe", action="store_true", help="force safe mode")
     p.add_argument("--verbose", action="store_true", help="enable debug logging")
     p.add_argument("-d","--dev", action="store_true", help="developer mode")
+    p.add_argument("--profile", choices=["mem","cpu"],
+                   help="profile memory (tracemalloc) or CPU (cProfile + sampling) per phase")
     subs = p.add_subparsers(dest="cmd")
 
     subs.add_parser("update", help="show last-updated").set_defaults(func=cmd_update)
@@ -616,11 +1137,13 @@ def build_parser(dev_mode: bool) -> argparse.ArgumentParser:
 
     subs.add_parser("terms", help="list terms").set_defaults(func=cmd_terms)
 
-    cr = subs.add_parser("course", help="fetch one course")
-    cr.add_argument("course_code")
-    cr.add_argument("-f","--field", help="nested field path")
+    cr = subs.add_parser("course", help="fetch courses (cached)")
+    cr.add_argument("course_code", nargs="+", help="one or more codes, or - to read from stdin")
+    cr.add_argument("-f","--field", action="append", help="nested field path (repeatable)")
     cr.add_argument("--stdout", action="store_true")
     cr.add_argument("--out", help="output file")
+    cr.add_argument("--ttl", type=int, help="seconds a cached file is trusted without revalidating")
+    cr.add_argument("--refresh", action="store_true", help="always revalidate with the server")
     cr.set_defaults(func=cmd_course)
 
     ap = subs.add_parser("all", help="fetch all or filtered courses")
@@ -631,8 +1154,34 @@ def build_parser(dev_mode: bool) -> argparse.ArgumentParser:
     ap.add_argument("-m","--max-workers", type=int, help="parallel downloads")
     ap.add_argument("--subjects", help="comma-separated subjects")
     ap.add_argument("--range", help="SUBJECT_start-SUBJECT_end")
+    ap.add_argument("--no-snapshot", action="store_true", help="don't version the catalog around -r/-u runs")
+    ap.add_argument("--shard", type=parse_shard, metavar="I/N", help="download only slice I of N (0-based)")
     ap.set_defaults(func=cmd_all)
 
+    mg = subs.add_parser("merge", help="fold shard downloads into c-data/courses")
+    mg.add_argument("sources", nargs="*", help="shard/filtered directories (default: courses/shards/*)")
+    mg.add_argument("--out", help="target courses directory (default c-data/courses)")
+    mg.add_argument("-p","--pretty", action="store_true")
+    mg.add_argument("--clean", action="store_true", help="delete the sources after merging")
+    mg.add_argument("--no-snapshot", action="store_true", help="don't version the catalog around the merge")
+    mg.set_defaults(func=cmd_merge)
+
+    ig = subs.add_parser("ingest", help="parse and index downloaded courses")
+    ig.add_argument("--dir", help="courses directory (default c-data/courses)")
+    ig.set_defaults(func=cmd_ingest)
+
+    ex = subs.add_parser("export", help="export per-term grades/offerings as Parquet or Arrow")
+    ex.add_argument("--format", choices=["parquet","arrow"], default="parquet")
+    ex.add_argument("--dir", help="courses directory (default c-data/courses)")
+    ex.add_argument("--out", help="output directory (default c-data/exports)")
+    ex.add_argument("--row-group", type=int, default=65536, help="rows per row group (default 65536)")
+    ex.set_defaults(func=cmd_export)
+
+    st = subs.add_parser("stats", help="summarize request logs from `all`")
+    st.add_argument("files", nargs="*", help="telemetry JSONL files (default: latest run)")
+    st.add_argument("-i","--interval", type=float, default=60, help="seconds per throughput row (default 60)")
+    st.set_defaults(func=cmd_stats)
+
     if dev_mode:
         cfgp = subs.add_parser("config", help="get or set config")
         cfgp.add_argument("action", choices=["get","set"])
@@ -653,14 +1202,24 @@ def main() -> None:
         sys.exit(0)
     if args.verbose:
         logger.setLevel(logging.DEBUG)
+    global _profiler
+    if args.profile:
+        if str(BACKEND_DIR) not in sys.path:
+            sys.path.insert(0, str(BACKEND_DIR))
+        from profiling import Profiler
+        _profiler = Profiler(args.profile, ROOT / "profiles", label=args.cmd).start()
     try:
-        args.func(args)
+        with _phase(args.cmd):
+            args.func(args)
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
         sys.exit(1)
     except Exception as e:
         logger.exception("Unhandled error")
         sys.exit(f"ERROR: {e}")
+    finally:
+        if _profiler is not None:
+            print(_profiler.finish())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+snapshots.py – versioned catalog snapshots stored as deltas
+
+A snapshot is a manifest {course code: content hash}.  Course records live
+once each in objects/<hash>.json.gz (sha256 of the canonical JSON, the same
+digest the downloader's blob store uses), and a version only stores the codes
+whose hash changed since the previous version plus the codes removed.  Every
+KEYFRAME-th version stores the full manifest, so rebuilding any version reads
+at most KEYFRAME small files, and "what changed between A and B" is a
+comparison of two manifests that never loads a course record.
+
+Usage:
+  python snapshots.py commit -m "after all --update-existing"
+  python snapshots.py list
+  python snapshots.py diff 3 7 [--fields]
+  python snapshots.py show 3 COMPSCI_577
+  python snapshots.py checkout 3 --out /tmp/catalog-v3
+"""
+from __future__ import annotations
+import gzip
+import json
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from catalog import COURSES_DIR, course_files, is_course
+
+SNAPSHOT_DIR = COURSES_DIR.parent / "snapshots"
+KEYFRAME = 10
+
+
+def content_hash(record: dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class Snapshots:
+    def __init__(self, root: Path = SNAPSHOT_DIR):
+        self.root = root
+        self.objects = root / "objects"
+        self.versions = root / "versions"
+        self._stat_file = root / "statcache.json"
+        self.manifest = lru_cache(maxsize=16)(self._manifest)
+
+    # ---------------------------------------------------------------
+    # Versions
+    # ---------------------------------------------------------------
+    def list(self) -> list[int]:
+        if not self.versions.exists():
+            return []
+        return sorted(int(p.stem) for p in self.versions.glob("*.json"))
+
+    def latest(self) -> int | None:
+        versions = self.list()
+        return versions[-1] if versions else None
+
+    def meta(self, version: int) -> dict:
+        path = self.versions / f"{version}.json"
+        if not path.exists():
+            raise KeyError(version)
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _manifest(self, version: int) -> dict[str, str]:
+        """code -> hash at version: nearest keyframe plus the deltas after it."""
+        chain = []
+        v: int | None = version
+        while v is not None:
+            m = self.meta(v)
+            chain.append(m)
+            v = m["base"]
+        manifest: dict[str, str] = {}
+        for m in reversed(chain):
+            manifest.update(m["changes"])
+            for code in m["removed"]:
+                manifest.pop(code, None)
+        return manifest
+
+    # ---------------------------------------------------------------
+    # Objects
+    # ---------------------------------------------------------------
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.json.gz"
+
+    def _store(self, digest: str, record: dict) -> None:
+        path = self._object_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(gzip.compress(json.dumps(record, separators=(",", ":")).encode(), 6))
+        tmp.replace(path)
+
+    def load(self, digest: str) -> dict:
+        return json.loads(gzip.decompress(self._object_path(digest).read_bytes()))
+
+    def record(self, version: int, code: str) -> dict | None:
+        digest = self.manifest(version).get(code)
+        return self.load(digest) if digest else None
+
+    def catalog(self, version: int) -> Iterator[tuple[list[str], dict]]:
+        """(codes, record) per distinct course at version; each object is read once."""
+        by_hash: dict[str, list[str]] = {}
+        for code, digest in sorted(self.manifest(version).items()):
+            by_hash.setdefault(digest, []).append(code)
+        for digest, codes in by_hash.items():
+            yield codes, self.load(digest)
+
+    # ---------------------------------------------------------------
+    # Commit
+    # ---------------------------------------------------------------
+    def _scan(self, courses_dir: Path) -> dict[str, tuple[str, Path, dict | None]]:
+        """
+        code -> (hash, file, record if it had to be parsed).  Hashes are
+        cached by (inode, mtime, size) so an unchanged file is not re-read,
+        and linked cross-listings are hashed once.
+        """
+        cache: dict[str, list] = {}
+        if self._stat_file.exists():
+            cache = json.loads(self._stat_file.read_text(encoding="utf-8"))
+        fresh: dict[str, list] = {}
+        by_inode: dict[tuple[int, int], str | None] = {}
+        out: dict[str, tuple[str, Path, dict | None]] = {}
+        for p in course_files(courses_dir):
+            st = p.stat()
+            key = [st.st_ino, st.st_mtime_ns, st.st_size]
+            inode = (st.st_dev, st.st_ino)
+            record = None
+            if inode in by_inode:
+                digest = by_inode[inode]
+            elif (hit := cache.get(str(p))) and hit[:3] == key:
+                digest = hit[3]
+            else:
+                record = json.loads(p.read_text(encoding="utf-8"))
+                digest = content_hash(record) if is_course(record) else None
+            by_inode[inode] = digest
+            fresh[str(p)] = key + [digest]
+            if digest:
+                out[p.stem] = (digest, p, record)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._stat_file.write_text(json.dumps(fresh), encoding="utf-8")
+        return out
+
+    def commit(self, courses_dir: Path = COURSES_DIR, message: str = "") -> dict | None:
+        """Record the courses directory as a new version; None if nothing changed."""
+        current = self._scan(courses_dir)
+        latest = self.latest()
+        previous = self.manifest(latest) if latest is not None else {}
+        changes = {code: h for code, (h, _, _) in current.items() if previous.get(code) != h}
+        removed = sorted(set(previous) - set(current))
+        if latest is not None and not changes and not removed:
+            return None
+
+        for code, digest in changes.items():
+            if not self._object_path(digest).exists():
+                _, path, record = current[code]
+                self._store(digest, record if record is not None else json.loads(path.read_text(encoding="utf-8")))
+
+        version = (latest or 0) + 1
+        keyframe = latest is None or (version - 1) % KEYFRAME == 0
+        meta = {
+            "version": version,
+            "base": None if keyframe else latest,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "message": message,
+            "courses": len(current),
+            "changed": len(changes),
+            "removed": removed,
+            "changes": {code: h for code, (h, _, _) in sorted(current.items())} if keyframe else dict(sorted(changes.items())),
+        }
+        self.versions.mkdir(parents=True, exist_ok=True)
+        (self.versions / f"{version}.json").write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+        return meta
+
+    # ---------------------------------------------------------------
+    # Diff
+    # ---------------------------------------------------------------
+    def diff(self, a: int, b: int, fields: bool = False) -> dict:
+        """
+        Codes added, removed and changed from version a to b, from the
+        manifests alone; fields=True also names the top-level keys that differ
+        in each changed record (loading only those records).
+        """
+        ma, mb = self.manifest(a), self.manifest(b)
+        changed = sorted(c for c in ma.keys() & mb.keys() if ma[c] != mb[c])
+        result: dict = {
+            "from": a,
+            "to": b,
+            "added": sorted(mb.keys() - ma.keys()),
+            "removed": sorted(ma.keys() - mb.keys()),
+            "changed": changed,
+        }
+        if fields:
+            detail = {}
+            for code in changed:
+                ra, rb = self.load(ma[code]), self.load(mb[code])
+                detail[code] = sorted(k for k in ra.keys() | rb.keys() if ra.get(k) != rb.get(k))
+            result["fields"] = detail
+        return result
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="snapshots.py", description="Versioned catalog snapshots")
+    p.add_argument("--root", type=Path, default=SNAPSHOT_DIR, help="snapshot store")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("commit", help="snapshot the courses directory")
+    c.add_argument("--dir", type=Path, default=COURSES_DIR, help="courses directory")
+    c.add_argument("-m", "--message", default="")
+    sub.add_parser("list", help="list versions")
+    d = sub.add_parser("diff", help="what changed between two versions")
+    d.add_argument("a", type=int)
+    d.add_argument("b", type=int)
+    d.add_argument("--fields", action="store_true", help="also list changed top-level fields")
+    s = sub.add_parser("show", help="print one course at a version")
+    s.add_argument("version", type=int)
+    s.add_argument("code")
+    o = sub.add_parser("checkout", help="write a version out as a courses directory")
+    o.add_argument("version", type=int)
+    o.add_argument("--out", type=Path, required=True)
+    args = p.parse_args()
+
+    snaps = Snapshots(args.root)
+    if args.cmd == "commit":
+        meta = snaps.commit(args.dir, args.message)
+        if meta is None:
+            print("No changes since the latest snapshot")
+        else:
+            print(f"Snapshot {meta['version']}: {meta['courses']} courses, "
+                  f"{meta['changed']} changed, {len(meta['removed'])} removed")
+    elif args.cmd == "list":
+        for v in snaps.list():
+            m = snaps.meta(v)
+            kind = "full" if m["base"] is None else f"delta of {m['base']}"
+            print(f"{v:>4}  {m['created']}  {m['courses']:>6} courses  {m['changed']:>5} changed  ({kind})  {m['message']}")
+    elif args.cmd == "diff":
+        print(json.dumps(snaps.diff(args.a, args.b, args.fields), indent=2))
+    elif args.cmd == "show":
+        record = snaps.record(args.version, args.code.upper())
+        if record is None:
+            raise SystemExit(f"{args.code} not in version {args.version}")
+        print(json.dumps(record, indent=2))
+    elif args.cmd == "checkout":
+        args.out.mkdir(parents=True, exist_ok=True)
+        n = 0
+        for codes, record in snaps.catalog(args.version):
+            text = json.dumps(record, indent=2)
+            for code in codes:
+                (args.out / f"{code}.json").write_text(text, encoding="utf-8")
+            n += 1
+        print(f"Wrote {n} courses of version {args.version} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
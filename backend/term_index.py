@@ -0,0 +1,246 @@
+"""
+term_index.py – term → course posting lists and per-course offering stats
+
+term_data keys are PeopleSoft codes, (year - 1900) * 10 + session digit, the
+same encoding scripts/unused_scripts/term_utils.py produces.  The year is the
+one the academic year ends in, so Fall 2024 is 1252 and Spring 2025 is 1254:
+codes sort in calendar order.  Each code is
+decoded once while the index is built so lookups like "what ran in Fall 2024"
+or "how often is this taught in spring" are plain dict reads.
+"""
+from __future__ import annotations
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+SEASONS = {2: "fall", 4: "spring", 6: "summer", 8: "winter"}
+SESSION_DIGITS = {
+    "fall": 2,
+    "spring": 4,
+    "summer": 6,
+    "summr": 6,      # enrollment_data.last_taught_term spells it "2025 Summr"
+    "winter": 8,
+    "jterm": 8,
+    "j-term": 8,
+}
+TERM_PATTERN = re.compile(
+    r"(?P<year>\d{4})|(?P<season>spring|summer|summr|fall|winter|jterm|j-term)",
+    re.IGNORECASE,
+)
+
+# -------------------------------------------------------------------
+# Term codes
+# -------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def decode_term(code: str) -> tuple[int, str]:
+    """'1252' -> (2024, 'fall'); '1254' -> (2025, 'spring')"""
+    n = int(code)
+    season = SEASONS.get(n % 10)
+    if season is None:
+        raise ValueError(f"Invalid session digit {n % 10} in code {code}.")
+    year = 1900 + n // 10
+    return (year - 1 if season == "fall" else year), season
+
+def term_label(code: str) -> str:
+    year, season = decode_term(code)
+    return f"{season.capitalize()} {year}"
+
+def parse_term(value: str) -> str:
+    """Accept a 4-digit code or text such as 'Fall 2024', 'fall-2024', '2025 Summr'."""
+    value = value.strip()
+    if value.isdigit() and len(value) == 4:
+        decode_term(value)
+        return value
+    year = season = None
+    for m in TERM_PATTERN.finditer(value):
+        if m.group("year") and year is None:
+            year = int(m.group("year"))
+        elif m.group("season") and season is None:
+            season = m.group("season").lower()
+    if season is None or year is None:
+        raise ValueError(f"Could not recognize term '{value}'")
+    digit = SESSION_DIGITS[season]
+    if digit == SESSION_DIGITS["fall"]:
+        year += 1       # fall opens the next academic year
+    return str((year - 1900) * 10 + digit)
+
+def _typical_seasons(text: str | None) -> list[str]:
+    """'Fall, Spring' -> ['fall', 'spring']; 'Occasionally' -> []"""
+    if not text:
+        return []
+    found = {m.group("season").lower() for m in TERM_PATTERN.finditer(text) if m.group("season")}
+    return [s for s in ("fall", "spring", "summer", "winter") if s in found]
+
+# -------------------------------------------------------------------
+# Index
+# -------------------------------------------------------------------
+def _course_terms(record: dict) -> tuple[list[str], dict | None]:
+    """(term codes with grade or enrollment data, latest enrollment_data) of a record."""
+    terms = []
+    latest_enrollment = None
+    for code, entry in sorted((record.get("term_data") or {}).items()):
+        if not entry or not (entry.get("grade_data") or entry.get("enrollment_data")):
+            continue
+        terms.append(code)
+        if entry.get("enrollment_data"):
+            latest_enrollment = entry["enrollment_data"]
+    return terms, latest_enrollment
+
+
+def _enrollment_fields(enrollment: dict) -> tuple[str | None, list[str]]:
+    try:
+        last_taught = parse_term(enrollment.get("last_taught_term") or "")
+    except ValueError:
+        last_taught = None
+    return last_taught, _typical_seasons(enrollment.get("typically_offered"))
+
+
+class TermIndex:
+    """
+    Built with add() per course, then finalize().  A finalized index is
+    updated with apply(), which returns a new index.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, list[str]] = {}
+        self.offerings: dict[str, dict] = {}
+        self._course_terms: dict[str, list[str]] = {}
+        self._enrollment: dict[str, dict] = {}
+
+    @classmethod
+    def build(cls, courses: dict[str, dict]) -> "TermIndex":
+        idx = cls()
+        for cid, record in courses.items():
+            idx.add(cid, record)
+        return idx.finalize()
+
+    def add(self, cid: str, record: dict) -> None:
+        terms, latest_enrollment = _course_terms(record)
+        for code in terms:
+            self.postings.setdefault(code, []).append(cid)
+        self._course_terms[cid] = terms
+        if latest_enrollment:
+            self._enrollment[cid] = latest_enrollment
+
+    def finalize(self) -> "TermIndex":
+        for cids in self.postings.values():
+            cids.sort()
+        self.postings = dict(sorted(self.postings.items()))
+
+        table = self._season_table()
+        self.offerings = {}
+        for cid, terms in self._course_terms.items():
+            fields = _enrollment_fields(self._enrollment.get(cid, {}))
+            self.offerings[cid] = self._offering(cid, terms, fields, table)
+        self._course_terms.clear()
+        self._enrollment.clear()
+        return self
+
+    def _season_table(self) -> tuple[list[str], list[str], dict[str, list[int]]]:
+        # per season, how many catalog terms fall at or after each position,
+        # so a course's denominator is one subtraction instead of a scan
+        all_terms = list(self.postings)
+        seasons = sorted({decode_term(t)[1] for t in all_terms}, key=list(SEASONS.values()).index)
+        remaining = {s: [0] * (len(all_terms) + 1) for s in seasons}
+        for i in range(len(all_terms) - 1, -1, -1):
+            season = decode_term(all_terms[i])[1]
+            for s in seasons:
+                remaining[s][i] = remaining[s][i + 1] + (s == season)
+        return all_terms, seasons, remaining
+
+    @staticmethod
+    def _offering(cid: str, terms: list[str], fields: tuple[str | None, list[str]], table: tuple) -> dict:
+        all_terms, seasons, remaining = table
+        counts = dict.fromkeys(seasons, 0)
+        for t in terms:
+            counts[decode_term(t)[1]] += 1
+        start = bisect_left(all_terms, terms[0]) if terms else len(all_terms)
+        by_season = {}
+        for s in seasons:
+            possible = remaining[s][start]
+            by_season[s] = {
+                "offered": counts[s],
+                "possible": possible,
+                "probability": round(counts[s] / possible, 3) if possible else 0.0,
+            }
+        return {
+            "course": cid,
+            "terms_offered": len(terms),
+            "first_term": terms[0] if terms else None,
+            "last_term": terms[-1] if terms else None,
+            "last_taught_term": fields[0],
+            "typically_offered": fields[1],
+            "seasons": by_season,
+        }
+
+    def apply(self, changes: dict[str, dict | None]) -> "TermIndex":
+        """
+        A new finalized index with the given courses replaced (None: removed).
+        Only the touched posting lists are copied and only the changed
+        courses' offerings recomputed, unless the set of terms itself changed,
+        which moves every course's per-season denominators.
+        """
+        new = TermIndex()
+        new.postings = dict(self.postings)
+        new.offerings = dict(self.offerings)
+        copied: set[str] = set()
+
+        def postings(term: str) -> list[str]:
+            if term not in copied:
+                new.postings[term] = list(new.postings.get(term, ()))
+                copied.add(term)
+            return new.postings[term]
+
+        fields: dict[str, tuple[str | None, list[str]]] = {}
+        terms_of: dict[str, list[str]] = {}
+        for cid, record in changes.items():
+            old = new.offerings.pop(cid, None)
+            if old and old["first_term"]:
+                for term in self.postings:
+                    if old["first_term"] <= term <= old["last_term"]:
+                        lst = self.postings[term]
+                        i = bisect_left(lst, cid)
+                        if i < len(lst) and lst[i] == cid:
+                            postings(term).remove(cid)
+            if record is None:
+                continue
+            terms, enrollment = _course_terms(record)
+            for term in terms:
+                insort(postings(term), cid)
+            terms_of[cid] = terms
+            fields[cid] = _enrollment_fields(enrollment or {})
+        for term in copied:
+            if not new.postings[term]:
+                del new.postings[term]
+
+        if new.postings.keys() != self.postings.keys():
+            # a term appeared or vanished: every course's denominators move
+            new.postings = dict(sorted(new.postings.items()))
+            unchanged: dict[str, list[str]] = {}
+            for cid, off in new.offerings.items():
+                unchanged[cid] = []
+                fields[cid] = (off["last_taught_term"], off["typically_offered"])
+            for term, cids in new.postings.items():
+                for cid in cids:
+                    if cid in unchanged:
+                        unchanged[cid].append(term)
+            terms_of.update(unchanged)
+        table = new._season_table()
+        for cid in terms_of:
+            new.offerings[cid] = self._offering(cid, terms_of[cid], fields[cid], table)
+        return new
+
+    # ---------------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------------
+    def terms(self) -> list[dict]:
+        return [
+            {"term": code, "name": term_label(code), "courses": len(cids)}
+            for code, cids in self.postings.items()
+        ]
+
+    def courses_in(self, term: str) -> list[str]:
+        return self.postings.get(term, [])
+
+    def offering(self, cid: str) -> dict | None:
+        return self.offerings.get(cid)
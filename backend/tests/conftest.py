@@ -0,0 +1,45 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scripts" / "unused_scripts"))
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    """The downloaded catalog in scripts/c-data/courses, ingested once per run."""
+    from ingest import ingest
+    return ingest()
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """app.py, imported once with the course watcher off."""
+    os.environ.setdefault("COURSES_WATCH", "0")
+    import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """scripts/uw_course_api.py, imported from a scratch directory."""
+    # the CLI creates c-data/ (logs, settings) relative to the working directory on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("cli"))
+    try:
+        spec = importlib.util.spec_from_file_location("uw_course_api", BACKEND_DIR / "scripts" / "uw_course_api.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
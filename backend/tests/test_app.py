@@ -0,0 +1,29 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from catalog import COURSES_DIR
+
+
+@pytest.fixture
+def cross_listed(app_module, tmp_path, monkeypatch):
+    """A catalog where COMPSCI 300 is also listed as MATH 300, one file linked under both codes."""
+    from live import LiveCatalog
+    record = json.loads((COURSES_DIR / "COMPSCI_300.json").read_text(encoding="utf-8"))
+    record["course_reference"]["subjects"] = ["COMPSCI", "MATH"]
+    (tmp_path / "COMPSCI_300.json").write_text(json.dumps(record), encoding="utf-8")
+    os.link(tmp_path / "COMPSCI_300.json", tmp_path / "MATH_300.json")
+    shutil.copy(COURSES_DIR / "COMPSCI_400.json", tmp_path)
+    monkeypatch.setattr(app_module, "live", LiveCatalog(tmp_path))
+
+
+def test_offerings_by_cross_listed_code(client, cross_listed):
+    canonical = client.get("/api/courses/COMPSCI_300/offerings")
+    assert canonical.status_code == 200
+    for code in ("MATH_300", "math_300", "MATH 300"):
+        alias = client.get(f"/api/courses/{code}/offerings")
+        assert alias.status_code == 200, code
+        assert alias.get_json() == canonical.get_json()
+    assert client.get("/api/courses/MATH_999/offerings").status_code == 404
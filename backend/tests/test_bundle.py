@@ -0,0 +1,53 @@
+import json
+import shutil
+
+import pytest
+
+import bundle
+from catalog import COURSES_DIR
+
+
+@pytest.fixture
+def courses(tmp_path):
+    src = tmp_path / "courses"
+    src.mkdir()
+    for stem in ("COMPSCI_300", "COMPSCI_400", "MATH_221"):
+        shutil.copy(COURSES_DIR / f"{stem}.json", src)
+    return src
+
+
+def _retitle(courses, stem, title):
+    path = courses / f"{stem}.json"
+    record = json.loads(path.read_text(encoding="utf-8"))
+    record["course_title"] = title
+    path.write_text(json.dumps(record), encoding="utf-8")
+
+
+def test_superseded_shards_stay_for_the_grace_period(courses, tmp_path):
+    out = tmp_path / "bundle"
+    first = bundle.build(courses, out)
+    _retitle(courses, "COMPSCI_300", "Programming II (renamed)")
+    second = bundle.build(courses, out)
+
+    assert second["written"] == ["COMPSCI"]
+    old = {first["subjects"]["COMPSCI"]["file"], first["index"]["file"]}
+    assert set(second["retired"]) == old
+    assert all((out / f).exists() for f in old)     # a tab holding the first manifest can still load them
+    assert json.loads((out / "manifest.json").read_text())["retired"] == second["retired"]
+
+    third = bundle.build(courses, out, grace_hours=0)
+    assert sorted(third["deleted"]) == sorted(old) and third["retired"] == {}
+    assert not any((out / f).exists() for f in old)
+
+
+def test_force_retires_files_it_does_not_know(courses, tmp_path):
+    out = tmp_path / "bundle"
+    bundle.build(courses, out)
+    (out / "COMPSCI.0123456789abcdef.json.gz").write_bytes(b"left by an older build")
+
+    forced = bundle.build(courses, out, force=True)
+    assert list(forced["retired"]) == ["COMPSCI.0123456789abcdef.json.gz"]
+    assert bundle.build(courses, out, grace_hours=0)["deleted"] == ["COMPSCI.0123456789abcdef.json.gz"]
+    files = {p.name for p in out.glob("*.json.gz")}
+    manifest = json.loads((out / "manifest.json").read_text())
+    assert files == {s["file"] for s in manifest["subjects"].values()} | {manifest["index"]["file"]}
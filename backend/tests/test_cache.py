@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from cache import COALESCED, HIT, MISS, ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _const(value):
+    return lambda: value
+
+
+def test_equal_inputs_share_an_entry_however_ordered():
+    cache = ResultCache()
+    assert cache.get("q", {"a": 1, "s": {"x", "y"}}, _const(1)) == (1, MISS)
+    assert cache.get("q", {"s": {"y", "x"}, "a": 1}, _const(2)) == (1, HIT)
+    assert cache.get("other", {"a": 1, "s": {"x", "y"}}, _const(3)) == (3, MISS)
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    out = []
+    leader = threading.Thread(target=lambda: out.append(cache.get("q", 1, compute)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: out.append(cache.get("q", 1, compute))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(status for _, status in out) == [COALESCED] * 4 + [MISS]
+    assert {value for value, _ in out} == {"answer"}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache()
+    with pytest.raises(ZeroDivisionError):
+        cache.get("q", 1, lambda: 1 / 0)
+    assert cache.get("q", 1, _const("ok")) == ("ok", MISS)
+    assert cache.stats()["errors"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2)
+    cache.get("q", "a", _const("a"))
+    cache.get("q", "b", _const("b"))
+    cache.get("q", "a", _const("-"))          # a is now the most recent
+    cache.get("q", "c", _const("c"))
+    assert cache.get("q", "a", _const("-")) == ("a", HIT)
+    assert cache.get("q", "b", _const("b2")) == ("b2", MISS)
+    assert cache.stats()["evictions"] == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.get("q", 1, _const("old"))
+    clock.now = 9.9
+    assert cache.get("q", 1, _const("new")) == ("old", HIT)
+    clock.now = 10.0
+    assert cache.get("q", 1, _const("new")) == ("new", MISS)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_new_catalog_version_drops_every_entry():
+    cache = ResultCache()
+    cache.get("q", 1, _const("v1"), version=1)
+    assert cache.get("q", 1, _const("v2"), version=2) == ("v2", MISS)
+    assert cache.stats()["invalidations"] == 1
+    # a late request still on version 1 neither reads nor drops version 2's entries
+    assert cache.get("q", 1, _const("late"), version=1) == ("late", MISS)
+    assert cache.get("q", 1, _const("-"), version=2) == ("v2", HIT)
+
+
+def test_result_finished_after_a_reload_is_not_stored():
+    cache = ResultCache()
+
+    def compute():
+        cache.get("other", 0, _const(None), version=2)   # the catalog moves on meanwhile
+        return "stale"
+
+    assert cache.get("q", 1, compute, version=1) == ("stale", MISS)
+    assert cache.get("q", 1, _const("fresh"), version=2) == ("fresh", MISS)
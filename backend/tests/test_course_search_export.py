@@ -0,0 +1,69 @@
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("webdriver_manager")
+if shutil.which("chromedriver") is None:
+    pytest.skip("needs Chrome and chromedriver on PATH", allow_module_level=True)
+
+import course_search_export as cse
+from madgrades_export import Checkpoint, export_per_course
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+class _Quiet(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_Quiet, directory=str(FIXTURES)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/course_search.html"
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def driver():
+    drv = cse.new_driver(shutil.which("chromedriver"))
+    yield drv
+    drv.quit()
+
+
+def test_subject_codes(driver, base_url):
+    assert cse.get_subject_codes(driver, "1262", base_url, timeout=5) == ["266", "555", "600", "999"]
+
+
+def test_scrape_subject_follows_scroll_and_expands_cards(driver, base_url):
+    rows = cse.scrape_subject(driver, "1262", "266", base_url, timeout=5, idle=1)
+    assert [(r["subject"], r["catalog_number"], r["section"]) for r in rows] == [
+        ("COMP SCI", "300", "LEC 001"), ("COMP SCI", "300", "LEC 002"), ("COMP SCI", "354", "LEC 001"),
+        ("COMP SCI", "400", "LEC 001"), ("COMP SCI", "577", "LEC 001"),
+    ]
+    assert rows[0]["title"] == "Programming II"
+
+
+def test_empty_subject_returns_no_rows(driver, base_url):
+    assert cse.scrape_subject(driver, "1262", "555", base_url, timeout=5, idle=1) == []
+
+
+def test_slow_subject_is_not_checkpointed(driver, base_url, tmp_path):
+    with pytest.raises(RuntimeError):
+        cse.scrape_subject(driver, "1262", "999", base_url, timeout=1, idle=1)
+
+    def scrape(code):
+        return cse.scrape_subject(driver, "1262", code, base_url, timeout=1, idle=1)
+
+    stem = tmp_path / "course_search_1262"
+    n, _ = export_per_course(["555", "600", "999"], scrape, stem, "csv", workers=1)
+    assert n == 1
+    ckpt = Checkpoint(stem.with_suffix(".checkpoint"))
+    ckpt.close()
+    assert ckpt.done == {"555", "600"}
@@ -0,0 +1,39 @@
+import os
+
+from catalog import unique_course_files
+
+
+def _course(title):
+    return {"course_reference": {"subjects": ["COMPSCI", "MATH", "STAT"], "course_number": 475},
+            "course_title": title}
+
+
+def _inodes(root, *codes):
+    return {os.stat(root / f"{c}.json").st_ino for c in codes}
+
+
+def test_refetch_relinks_every_stored_listing(api, tmp_path):
+    store = api.CourseStore(tmp_path)
+    store.put("COMPSCI_475", _course("old"))
+    assert len(_inodes(tmp_path, "COMPSCI_475", "MATH_475", "STAT_475")) == 1
+
+    # a fetch of one code (wanted=set(), as fetch_course does) must move the others too
+    linked = store.put("COMPSCI_475", _course("new"), wanted=set())
+    assert sorted(linked) == ["COMPSCI_475", "MATH_475", "STAT_475"]
+    assert len(_inodes(tmp_path, "COMPSCI_475", "MATH_475", "STAT_475")) == 1
+    store.save()
+    assert [codes for codes, _ in unique_course_files(tmp_path)] == [["COMPSCI_475", "MATH_475", "STAT_475"]]
+    assert len(list((tmp_path / "blobs").glob("*.json"))) == 2     # the new body and aliases.json
+
+
+def test_alias_links_to_a_non_canonical_listing(api, tmp_path):
+    store = api.CourseStore(tmp_path)
+    store.put("MATH_475", _course("x"), wanted=set())
+    assert not (tmp_path / "COMPSCI_475.json").exists()
+    assert store.link_alias("STAT_475")
+    assert _inodes(tmp_path, "STAT_475") == _inodes(tmp_path, "MATH_475")
+
+    # the alias map survives a restart
+    store.save()
+    again = api.CourseStore(tmp_path)
+    assert again.canonical("COMPSCI_475") in ("MATH_475", "STAT_475")
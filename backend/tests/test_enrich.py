@@ -0,0 +1,24 @@
+from enrich import enrich, name_key
+
+
+def _course(number, instructors):
+    return {"course_reference": {"subjects": ["COMP SCI"], "course_number": number},
+            "term_data": {"1252": {"enrollment_data": {"instructors": instructors}}}}
+
+
+def _prof(first, last, rating, difficulty, n):
+    return {name_key(f"{first} {last}"): {"name": f"{first} {last}", "avgRating": rating,
+                                           "avgDifficulty": difficulty, "numRatings": n}}
+
+
+def test_difficulty_comes_from_rmp_ratings():
+    courses = {"COMPSCI_300": _course(300, ["Jane Doe", "John Roe"]), "COMPSCI_400": _course(400, ["Ann Poe"])}
+    grades = {("COMPSCI", 300): {"aCount": 8, "bCount": 2}, ("COMPSCI", 400): {"bCount": 5, "cCount": 5}}
+    profs = {**_prof("Jane", "Doe", 4.0, 2.0, 30), **_prof("John", "Roe", 3.0, 4.0, 10),
+             **_prof("Ann", "Poe", 2.0, None, 5)}
+    out = enrich(courses, grades, profs)
+
+    assert out["COMPSCI_300"]["rmp"]["difficulty"] == 2.5        # (2.0 * 30 + 4.0 * 10) / 40
+    assert out["COMPSCI_400"]["rmp"]["difficulty"] is None       # no ratings give a difficulty
+    assert [out[c]["madGrades"]["gpaRank"] for c in courses] == [0.0, 10.0]
+    assert "difficulty" not in out["COMPSCI_300"]["madGrades"]
@@ -0,0 +1,38 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from loadtest import Traffic, run
+
+SERVICE = 0.05     # seconds per request, one at a time: at most 20 requests/s
+
+
+class _Slow(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(SERVICE)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def slow_server():
+    server = HTTPServer(("127.0.0.1", 0), _Slow)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_open_loop_counts_queueing_behind_a_slow_server(slow_server):
+    # 40 requests/s offered to a server that answers 20/s: the backlog grows all
+    # run, so later requests wait far longer than one service time
+    recorder, _ = run(Traffic(slow_server, seed=1), {"lookup": 1}, concurrency=4, duration=1.5, rate=40)
+    ms = sorted(recorder.samples["lookup"])
+    assert not recorder.errors
+    assert ms[-1] > 10 * SERVICE * 1000
@@ -0,0 +1,81 @@
+import importlib.util
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+COURSES = [{"id": i, "uuid": f"u{i}", "name": f"Course {i}"} for i in range(1, 41)]
+
+
+class _MadGrades(BaseHTTPRequestHandler):
+    """/courses and /course_grades as madgrades_export.py calls them."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/courses":
+            page, per_page = int(query.get("page", 1)), int(query.get("per_page", 500))
+            body = COURSES[(page - 1) * per_page:page * per_page]
+        elif url.path == "/course_grades":
+            cid = int(query["course_id"])
+            # the early courses have no A counts at all; later ones do
+            body = [{"term": 1254, "total": cid, "aCount": cid if cid > 20 else None},
+                    {"term": 1252, "total": 2, "aCount": None, "fCount": 1}]
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def mg(tmp_path_factory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MadGrades)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with pytest.MonkeyPatch.context() as mp:
+        # API_BASE is read from MG_API_BASE on import
+        mp.setenv("MG_API_BASE", f"http://127.0.0.1:{server.server_port}")
+        mp.setenv("MG_TOKEN", "test")
+        path = BACKEND_DIR / "scripts" / "unused_scripts" / "madgrades_export.py"
+        spec = importlib.util.spec_from_file_location("madgrades_export_mock", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    server.shutdown()
+
+
+def test_parquet_schema_survives_null_first_row_groups(mg, tmp_path):
+    sink = mg.ParquetSink(tmp_path / "grades.parquet", mg.GRADE_COLUMNS, row_group=2)
+    sink.write([{"course_id": "1", "term": 1254, "total": 3, "aCount": None}])
+    sink.write([{"course_id": "2", "term": 1254, "total": 3, "aCount": 2, "unknown": "x"}])
+    sink.write([{"course_id": "3", "term": 1252, "total": 1, "aCount": 1}])
+    sink.close()
+    table = pq.read_table(sink.path)
+    assert table.schema.field("aCount").type == "int64"
+    assert table.column("aCount").to_pylist() == [None, 2, 1]
+    assert "unknown" not in table.column_names
+
+
+def test_export_against_local_mock(mg, tmp_path):
+    mg.main(["--format", "parquet", "--out", str(tmp_path), "--rate", "0", "-j", "4"])
+    parts = sorted(tmp_path.glob("madgrades_course_grades.part*.parquet"))
+    assert len(parts) == 1
+    rows = pq.read_table(parts[0]).to_pylist()
+    assert len(rows) == 2 * len(COURSES)
+    assert {r["course_id"] for r in rows} == {str(c["id"]) for c in COURSES}
+    assert sum(r["aCount"] or 0 for r in rows) == sum(range(21, 41))
+    checkpoint = (tmp_path / "madgrades_course_grades.checkpoint").read_text().split()
+    assert len(checkpoint) == len(COURSES)
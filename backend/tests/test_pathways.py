@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from pathways import Pathways
+from prereqs import PrereqGraph
+from requirements import RequirementsEngine
+
+
+@pytest.fixture(scope="module")
+def solved(catalog):
+    graph = PrereqGraph(catalog.courses)
+    credits = RequirementsEngine(catalog.courses, graph).credits
+    return catalog.courses, graph, credits, Pathways(graph, credits)
+
+
+def test_chain_prefers_catalog_courses_over_missing_ones(solved):
+    # COMPSCI 577 needs (240 or 475) and (367 or 400); only 400 is in the catalog
+    _, graph, _, pathways = solved
+    assert "COMPSCI_367" not in graph.ast and "COMPSCI_400" in graph.ast
+    report = pathways.eligibility("COMPSCI_577")
+    assert report["chain"] == ["COMPSCI_200", "COMPSCI_300", "COMPSCI_400"]
+    assert report["chain_credits"] > 0
+    assert report["conditional"]            # 240 / 475 are only reachable outside the catalog
+    assert all(c in graph.ast for c in report["chain"])
+
+
+def test_completed_courses_shorten_the_chain(solved):
+    _, _, _, pathways = solved
+    report = pathways.query("COMPSCI_577", {"COMPSCI_300"})
+    assert report["chain"] == ["COMPSCI_400"]
+    assert report["terms_before"] == 1
+
+
+def test_solution_does_not_depend_on_visit_order(solved):
+    _, graph, credits, pathways = solved
+    order = list(pathways.order)
+    random.Random(7).shuffle(order)
+    values = pathways._solve(order, {}, None, set())
+    assert values == pathways.values
+
+
+def test_apply_matches_a_full_solve(solved):
+    courses, graph, credits, pathways = solved
+    changed = dict(courses)
+    del changed["COMPSCI_400"]
+    new_graph, recompiled = graph.apply(changed, {"COMPSCI_400"})
+    updated = pathways.apply(new_graph, recompiled, credits)
+    assert updated.values == Pathways(new_graph, credits).values
+    assert updated.eligibility("COMPSCI_577")["chain"] == []   # only the text / missing-course escapes are left
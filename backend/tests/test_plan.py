@@ -0,0 +1,57 @@
+import pytest
+
+from plan import PlanError, PlanValidator
+
+
+@pytest.fixture
+def plans(catalog):
+    return PlanValidator(catalog.courses, catalog.term_index)
+
+
+def _statuses(report):
+    return {c["course"]: c["status"] for t in report["terms"] for c in t["courses"]}
+
+
+def test_terms_are_checked_in_calendar_order(plans):
+    # Spring 2025 comes before Fall 2025, so COMPSCI 300 is taken in time
+    report = plans.validate({"planned": {"Fall 2025": ["COMPSCI 400"], "Spring 2025": ["COMPSCI 300"]}})
+    assert [t["term"] for t in report["terms"]] == ["Spring 2025", "Fall 2025"]
+    assert _statuses(report)["COMPSCI_400"] == "ok"
+
+
+def test_move_edit_rechecks_dependents(plans):
+    plan = plans.validate({"planned": {"Spring 2025": ["COMPSCI 300"], "Fall 2025": ["COMPSCI 400"]}})
+    report = plans.validate({"plan_id": plan["plan_id"],
+                             "edits": [{"course": "COMPSCI 300", "from": "Spring 2025", "to": "Fall 2025"}]})
+    assert _statuses(report)["COMPSCI_400"] != "ok"
+
+
+@pytest.mark.parametrize("edit", [
+    {"op": "move", "course": "COMPSCI 300", "to": "Fall 2025"},
+    {"op": "remove", "course": "COMPSCI 300"},
+    {"op": "add", "course": "COMPSCI 300", "to": 1252},
+    {"op": "swap", "course": "COMPSCI 300"},
+    "COMPSCI 300",
+])
+def test_malformed_edits_are_plan_errors(plans, edit):
+    plan = plans.validate({"planned": {"Spring 2025": ["COMPSCI 300"], "Fall 2025": []}})
+    with pytest.raises(PlanError):
+        plans.validate({"plan_id": plan["plan_id"], "edits": [edit]})
+
+
+def test_failed_batch_leaves_the_plan_unchanged(plans):
+    plan = plans.validate({"planned": {"Spring 2025": ["COMPSCI 300"], "Fall 2025": []}})
+    edits = [
+        {"course": "COMPSCI 300", "from": "Spring 2025", "to": "Fall 2025"},
+        {"course": "COMPSCI 400", "from": "Spring 2025", "to": "Fall 2025"},   # not planned
+    ]
+    with pytest.raises(PlanError):
+        plans.validate({"plan_id": plan["plan_id"], "edits": edits})
+    report = plans._plans[plan["plan_id"]].report()
+    assert [t["courses"][0]["course"] if t["courses"] else None for t in report["terms"]] == ["COMPSCI_300", None]
+    assert report["version"] == plan["version"]
+
+
+def test_invalid_max_credits_is_a_plan_error(plans):
+    with pytest.raises(PlanError):
+        plans.validate({"planned": {"Fall 2025": ["COMPSCI 300"]}, "max_credits": "lots"})
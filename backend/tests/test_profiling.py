@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from profiling import Profiler
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    p = Profiler("mem", tmp_path).start()
+    yield p
+    p.finish()
+
+
+def _in_thread(fn):
+    t = threading.Thread(target=fn)
+    t.start()
+    t.join()
+
+
+def test_worker_phases_keep_the_outer_peak(profiler):
+    outer = profiler.begin("download")
+
+    def worker():
+        with profiler.phase("parse"):
+            blob = bytearray(5 * 2**20)
+            del blob
+        with profiler.phase("store"):      # reset_peak() here used to wipe download's peak
+            pass
+
+    _in_thread(worker)
+    profiler.end(outer)
+    assert profiler.phases["parse"].peak >= 5 * 2**20
+    assert profiler.phases["download"].peak >= profiler.phases["parse"].peak
+
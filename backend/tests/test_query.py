@@ -0,0 +1,68 @@
+import pytest
+
+from catalog import credit_range
+from enrich import gpa
+from query import QueryEngine
+
+SUBJECTS = {"COMPSCI", "MATH", "STAT"}
+LEVELS = {300, 400, 500}
+
+
+@pytest.fixture(scope="module")
+def engine(catalog):
+    return QueryEngine(catalog.courses, catalog.term_index)
+
+
+def _gpa(record):
+    enriched = ((record.get("enrichment") or {}).get("madGrades") or {}).get("avgGPA")
+    if enriched is not None:
+        return enriched
+    return gpa(record["cumulative_grade_data"]) if record.get("cumulative_grade_data") else None
+
+
+def _brute_force(courses, level=True):
+    """ids of subject in SUBJECTS, level in LEVELS, 3-4 credits possible, GPA >= 3.0."""
+    out = {}
+    for cid, record in courses.items():
+        ref = record["course_reference"]
+        credits = credit_range(record)
+        g = _gpa(record)
+        if (SUBJECTS.intersection(ref["subjects"])
+                and (not level or ref["course_number"] // 100 * 100 in LEVELS)
+                and credits and credits[0] <= 4 and credits[1] >= 3
+                and g is not None and g >= 3.0):
+            out[cid] = record
+    return out
+
+
+def _check(result, courses):
+    expected = _brute_force(courses)
+    assert result["total"] == len(expected) > 0
+    assert {r["id"] for r in result["results"]} == set(expected)
+    gpas = [r["gpa"] for r in result["results"]]
+    assert gpas == sorted(gpas, reverse=True)
+    # a facet's counts ignore its own selection
+    levels = {}
+    for record in _brute_force(courses, level=False).values():
+        key = str(record["course_reference"]["course_number"] // 100 * 100)
+        levels[key] = levels.get(key, 0) + 1
+    assert result["facets"]["level"] == levels
+
+
+def test_faceted_query_matches_brute_force(engine, catalog):
+    result = engine.query(
+        filters={"subject": sorted(SUBJECTS), "level": [str(lv) for lv in LEVELS], "credits": ["3-4"]},
+        ranges={"gpa": "3.0-"}, sort="-gpa", limit=len(catalog.courses), facet_counts=["level"],
+    )
+    _check(result, catalog.courses)
+
+
+def test_query_endpoint_matches_brute_force(client, app_module):
+    courses = app_module.live.current.courses
+    response = client.get("/api/courses/query?subject=compsci,MATH&subject=STAT&level=300,400,500"
+                          "&credits=3-4&gpa=3.0-&sort=-gpa&limit=200&facets=level")
+    assert response.status_code == 200
+    result = response.get_json()
+    assert len(_brute_force(courses)) <= 200
+    _check(result, courses)
+    assert client.get("/api/courses/query?sort=-color").status_code == 400
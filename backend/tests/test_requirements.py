@@ -0,0 +1,48 @@
+import pytest
+
+from requirements import RequirementError, RequirementsEngine
+
+
+@pytest.fixture(scope="module")
+def engine(catalog):
+    return RequirementsEngine(catalog.courses)
+
+
+def _spec(*groups, **fields):
+    return {"name": "test", "groups": list(groups), **fields}
+
+
+def test_sample_set_compiles(engine):
+    result = engine.progress("compsci_bs", ["COMP SCI 200", "COMP SCI 300"])
+    basic = result["groups"][0]
+    assert basic["completed"] == 2 and not basic["satisfied"]
+
+
+@pytest.mark.parametrize("spec", [
+    _spec({"type": "n_of", "n": "two", "courses": ["MATH 221", "MATH 222"]}),
+    _spec({"type": "n_of", "n": 0, "courses": ["MATH 221"]}),
+    _spec("MATH 221"),
+    _spec({"type": "n_of", "courses": "MATH 221"}),
+    _spec({"type": "n_of", "courses": ["MATH 221"], "exclude": [221]}),
+    _spec({"type": "credits", "credits": "12", "subjects": ["COMP SCI"]}),
+    _spec({"type": "credits", "credits": 12, "subjects": "COMP SCI"}),
+    _spec({"type": "credits", "credits": 12, "min_level": "400"}),
+    _spec({"type": "n_of", "courses": ["MATH 221"]}, total_credits="120"),
+    {"name": "test", "groups": {"type": "n_of", "courses": ["MATH 221"]}},
+])
+def test_malformed_specs_are_requirement_errors(engine, spec):
+    with pytest.raises(RequirementError):
+        engine.progress(spec, ["MATH 221"])
+
+
+def test_n_of_honors_exclude(engine):
+    spec = _spec({"type": "n_of", "courses": ["MATH 221", "MATH 222", "MATH 217"], "exclude": ["MATH 217"]})
+    group = engine.progress(spec, ["MATH 217", "MATH 221"])["groups"][0]
+    assert group["required"] == 2
+    assert [c["code"] for c in group["courses"]] == ["MATH_221", "MATH_222"]
+    assert not group["satisfied"]
+
+
+def test_n_of_with_only_excluded_courses_is_rejected(engine):
+    with pytest.raises(RequirementError):
+        engine.compiled(_spec({"type": "n_of", "courses": ["MATH 221"], "exclude": ["MATH 221"]}))
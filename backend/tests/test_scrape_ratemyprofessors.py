@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+PROFS = [{"id": f"VGVhY2hlci0{i}", "firstName": f"First{i}", "lastName": f"Last{i}", "department": "Computer Science",
+          "avgRating": 4.0, "numRatings": i % 7 * 20, "wouldTakeAgainPercent": 80, "avgDifficulty": 3.0, "legacyId": i}
+         for i in range(120)]
+RATINGS = {p["id"]: [{"id": f"{p['id']}-r{j}", "comment": f"comment {j}", "difficultyRating": j % 5 + 1}
+                     for j in range(p["numRatings"])] for p in PROFS}
+
+
+def _page(items, variables):
+    start = int(variables.get("after") or 0)
+    end = start + variables["first"]
+    return {"edges": [{"cursor": str(start + i + 1), "node": item} for i, item in enumerate(items[start:end])],
+            "pageInfo": {"hasNextPage": end < len(items), "endCursor": str(end)}}
+
+
+class _FakeRmp(BaseHTTPRequestHandler):
+    """Canned answers to the scraper's two GraphQL queries, paginated with offset cursors."""
+    calls: list[tuple[str, dict]] = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        variables = body["variables"]
+        if "searchTeachers" in body["query"]:
+            self.calls.append(("search", variables))
+            data = {"search": _page(PROFS, variables)}
+        else:
+            self.calls.append(("ratings", variables))
+            data = {"node": {"id": variables["id"], "ratings": _page(RATINGS[variables["id"]], variables)}}
+        out = json.dumps({"data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def rmp():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeRmp)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with pytest.MonkeyPatch.context() as mp:
+        # BASE_URL is read from RMP_GRAPHQL_URL on import
+        mp.setenv("RMP_GRAPHQL_URL", f"http://127.0.0.1:{server.server_port}/graphql")
+        path = BACKEND_DIR / "scripts" / "unused_scripts" / "scrape_ratemyprofessors_uwmadison.py"
+        spec = importlib.util.spec_from_file_location("scrape_rmp_fake", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    server.shutdown()
+
+
+def test_walks_every_page_and_writes_one_row_per_professor(rmp, tmp_path):
+    out = tmp_path / "rmp.jsonl"
+    _FakeRmp.calls.clear()
+    rmp.main(["--out", str(out), "--rate", "0", "-j", "4"])
+
+    searches = [v for kind, v in _FakeRmp.calls if kind == "search"]
+    assert [v["after"] for v in searches] == [None, "50", "100"]
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["id"] for r in rows] == [p["id"] for p in PROFS]
+    for row in rows:
+        assert [c["id"] for c in row["comments"]] == [r["id"] for r in RATINGS[row["id"]]]
+        assert row["avgDifficulty"] == 3.0
+    # 120 ratings need three pages for the professors that have them
+    busiest = PROFS[6]["id"]
+    assert [v["after"] for kind, v in _FakeRmp.calls if kind == "ratings" and v["id"] == busiest] == [None, "50", "100"]
+    assert not out.with_suffix(".checkpoint.json").exists()
+
+
+def test_incremental_run_refetches_only_changed_professors(rmp, tmp_path, monkeypatch):
+    out = tmp_path / "rmp.jsonl"
+    rmp.main(["--out", str(out), "--rate", "0"])
+    original = PROFS[3]
+    PROFS[3] = dict(original, numRatings=original["numRatings"] + 1)
+    monkeypatch.setitem(RATINGS, original["id"], RATINGS[original["id"]] + [{"id": "new", "comment": "new"}])
+    try:
+        written, skipped = rmp.scrape(rmp.GraphQLClient(rate=0), out, incremental=True)
+    finally:
+        PROFS[3] = original
+    assert (written, skipped) == (1, len(PROFS) - 1)
+    latest = rmp.load_professors(out)[original["id"]]
+    assert latest["comments"][-1]["id"] == "new"
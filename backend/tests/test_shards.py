@@ -0,0 +1,87 @@
+import argparse
+import json
+
+import pytest
+
+from catalog import course_files, unique_course_files
+
+SPLITS = (1, 2, 3, 4, 7)
+
+
+def _candidates():
+    # what `all` walks without a cached name list: every number for every subject
+    subjects = sorted({p.stem.rpartition("_")[0] for p in course_files()})
+    return [f"{s}_{n}" for s in subjects for n in range(1000)]
+
+
+@pytest.mark.parametrize("count", SPLITS)
+def test_shards_partition_the_course_codes(api, count):
+    codes = _candidates()
+    shards = [{c for c in codes if api.shard_of(c, count) == i} for i in range(count)]
+    assert sum(map(len, shards)) == len(codes)              # disjoint
+    assert set().union(*shards) == set(codes)               # and covering
+    for number in ("300", "475", "999"):
+        # every listing of one course number falls in the same shard
+        assert len({api.shard_of(f"{s}_{number}", count) for s in ("COMPSCI", "MATH", "STAT")}) == 1
+
+
+@pytest.mark.parametrize("text, shard", [("0/1", (0, 1)), ("3/4", (3, 4))])
+def test_parse_shard(api, text, shard):
+    assert api.parse_shard(text) == shard
+
+
+@pytest.mark.parametrize("text", ["4/4", "-1/4", "0/0", "1", "a/b"])
+def test_parse_shard_rejects(api, text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        api.parse_shard(text)
+
+
+def _sample():
+    """A slice of the real catalog plus a cross-listed course, as code -> body."""
+    courses = {}
+    for codes, path in unique_course_files()[::40]:
+        courses[codes[0]] = json.loads(path.read_text(encoding="utf-8"))
+    courses["COMPSCI_475"] = {"course_reference": {"subjects": ["COMPSCI", "MATH", "STAT"], "course_number": 475},
+                              "course_title": "Introduction to Combinatorics"}
+    return courses
+
+
+def _snapshot(root):
+    return {tuple(codes): json.loads(path.read_text(encoding="utf-8")) for codes, path in unique_course_files(root)}
+
+
+def test_merge_rebuilds_the_store(api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / api.LOG_DIR).mkdir(parents=True)
+    courses = _sample()
+    listings = {c for data in courses.values() for c in api.CourseStore.codes_of(data)}
+    count = 3
+
+    direct = api.CourseStore(tmp_path / "direct")
+    for code, data in courses.items():
+        direct.put(code, data, listings)
+    direct.save()
+
+    # what `all --shard i/3` leaves behind: each shard's files, ETags and finished marker
+    base = api.ROOT / "courses"
+    for i in range(count):
+        out = api.shard_dir(base, (i, count))
+        out.mkdir(parents=True)
+        store = api.CourseStore(out)
+        mine = {c: d for c, d in courses.items() if api.shard_of(c, count) == i}
+        wanted = {c for c in listings if api.shard_of(c, count) == i}
+        for code, data in mine.items():
+            store.put(code, data, wanted)
+        store.save()
+        api.save_etags({c: f'"{c}"' for c in mine}, out / "etags.json")
+        names = sorted(p.stem for p in out.glob("*.json") if api.is_course_code(p.stem))
+        api.write_json(names, out / "course_names.json")
+
+    api.cmd_merge(argparse.Namespace(sources=[], out=None, pretty=False, clean=True, no_snapshot=True))
+
+    assert _snapshot(base) == _snapshot(tmp_path / "direct")
+    assert ["COMPSCI_475", "MATH_475", "STAT_475"] in [codes for codes, _ in unique_course_files(base)]
+    assert api.load_etags() == {c: f'"{c}"' for c in courses}
+    names = json.loads(api.COURSE_NAMES.read_text(encoding="utf-8"))
+    assert names == sorted(p.stem for p in base.glob("*.json") if api.is_course_code(p.stem))
+    assert not list((base / "shards").iterdir())              # --clean removed the sources
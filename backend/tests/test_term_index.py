@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from catalog import COURSES_DIR
+from term_index import TermIndex, decode_term, parse_term, term_label
+from term_utils import term_code
+
+
+@pytest.mark.parametrize("code, label", [
+    ("1252", "Fall 2024"),
+    ("1254", "Spring 2025"),
+    ("1256", "Summer 2025"),
+    ("1262", "Fall 2025"),
+    ("1074", "Spring 2007"),
+    ("1082", "Fall 2007"),
+])
+def test_code_and_label_round_trip(code, label):
+    assert term_label(code) == label
+    assert parse_term(label) == code
+    assert term_code(label) == code
+
+
+def test_parse_term_variants():
+    assert parse_term("fall-2024") == "1252"
+    assert parse_term("2025 Summr") == "1256"
+    assert parse_term("1254") == "1254"
+    assert decode_term("1252") == (2024, "fall")
+    with pytest.raises(ValueError):
+        parse_term("Autumn 2024")
+
+
+def test_codes_sort_in_calendar_order():
+    labels = ["Spring 2024", "Summer 2024", "Fall 2024", "Spring 2025", "Fall 2025"]
+    assert sorted(labels, key=parse_term) == labels
+
+
+def test_last_taught_term_matches_grade_terms_of_a_real_record():
+    # AAE 267's Fall 2025 listing says it was last taught Fall 2024, the
+    # latest term it has grades for
+    record = json.loads((COURSES_DIR / "AAE_267.json").read_text(encoding="utf-8"))
+    graded = sorted(t for t, e in record["term_data"].items() if e and e.get("grade_data"))
+    offering = TermIndex.build({"AAE_267": record}).offering("AAE_267")
+    assert offering["last_taught_term"] == graded[-1] == "1252"
+    assert term_label(offering["last_term"]) == "Fall 2025"
+
+
+def test_terms_listing_is_chronological():
+    idx = TermIndex.build({
+        "X_1": {"term_data": {"1082": {"grade_data": {"total": 1}}, "1074": {"grade_data": {"total": 1}}}},
+    })
+    assert [t["name"] for t in idx.terms()] == ["Spring 2007", "Fall 2007"]
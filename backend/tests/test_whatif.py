@@ -0,0 +1,37 @@
+import pytest
+
+from prereqs import PrereqGraph
+from whatif import WhatIf, WhatIfClosed
+
+SCENARIOS = [{"planned": {"Fall 2025": ["COMPSCI 400"]}}] * 2
+
+
+@pytest.fixture(scope="module")
+def versions(catalog):
+    """Two catalog versions; the newer one has dropped COMPSCI 400."""
+    old = catalog.courses
+    new = {cid: record for cid, record in old.items() if cid != "COMPSCI_400"}
+    return (WhatIf(old, PrereqGraph(old), catalog.term_index, workers=1),
+            WhatIf(new, PrereqGraph(new), catalog.term_index, workers=1))
+
+
+def _status(result):
+    return result["report"]["terms"][0]["courses"][0]["status"]
+
+
+def test_interleaved_in_process_runs_keep_their_version(versions):
+    old, new = (w.run(SCENARIOS) for w in versions)
+    assert _status(next(old)) != "unknown_course"
+    assert _status(next(new)) == "unknown_course"
+    assert _status(next(old)) != "unknown_course"
+    assert _status(next(new)) == "unknown_course"
+
+
+def test_closed_whatif_refuses_to_run(catalog):
+    whatif = WhatIf(catalog.courses, PrereqGraph(catalog.courses), catalog.term_index, workers=2, chunk_size=1)
+    started = whatif.run(SCENARIOS)
+    whatif.close()
+    assert len(list(started)) == len(SCENARIOS)    # runs already started finish
+    with pytest.raises(WhatIfClosed):
+        whatif.run(SCENARIOS)
+    assert whatif._pool is None
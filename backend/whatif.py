@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+whatif.py – evaluate many alternative plans side by side
+
+Each scenario is a plan payload as accepted by /api/plan/validate
+(completed, planned, max_credits) plus optional "id"/"name" and
+"requirements" (a requirement set id or inline spec, see requirements.py).
+Scenarios are spread over a process pool whose workers are started with one
+read-only snapshot of the catalog and prerequisite graph (inherited for free
+when the platform forks), and results are yielded as each chunk finishes.
+
+A batch may also be given as {"base": {...}, "variants": [{...}, ...]}: every
+variant is the base plan with the variant's keys replacing the base's.
+
+Usage:
+  python whatif.py scenarios.json                  # all cores, NDJSON to stdout
+  python whatif.py scenarios.json -w 4 -r compsci_bs
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+from plan import PlanError, PlanState
+from prereqs import PrereqGraph
+from requirements import RequirementError, RequirementsEngine
+from term_index import TermIndex
+
+DEFAULT_CHUNK = 8
+
+# per-process snapshot of a pool worker, set by _init; in-process runs use
+# their WhatIf's own snapshot, so states of different versions don't share one
+_snapshot: dict = {}
+
+
+class WhatIfClosed(RuntimeError):
+    """run() on a WhatIf whose catalog state was replaced and closed."""
+
+
+def _build(courses: dict[str, dict], graph: PrereqGraph, terms: TermIndex | None) -> dict:
+    requirements = RequirementsEngine(courses, graph)
+    return {"graph": graph, "credits": requirements.credits, "terms": terms, "requirements": requirements}
+
+
+def _init(courses: dict[str, dict], graph: PrereqGraph, terms: TermIndex | None) -> None:
+    _snapshot.update(_build(courses, graph, terms))
+
+
+def expand(batch: object) -> list[dict]:
+    """A list of scenarios, or {"base", "variants"} expanded into one."""
+    if isinstance(batch, dict) and "variants" in batch:
+        base = batch.get("base") or {}
+        return [{**base, **v} for v in batch["variants"]]
+    if isinstance(batch, dict) and "scenarios" in batch:
+        return expand(batch["scenarios"])
+    if isinstance(batch, list) and all(isinstance(s, dict) for s in batch):
+        return batch
+    raise PlanError("Expected a list of scenarios or {\"base\", \"variants\"}")
+
+
+def _history(scenario: dict) -> list:
+    """Completed plus planned courses, as the requirements engine's history."""
+    history = []
+    for key in ("completed", "planned", "terms"):
+        value = scenario.get(key)
+        groups = value.values() if isinstance(value, dict) else (value or [])
+        for g in groups:
+            courses = g.get("courses") if isinstance(g, dict) and "term" in g else g
+            history.extend(courses if isinstance(courses, list) else [courses])
+    return history
+
+
+def evaluate(s: dict, index: int, scenario: dict, requirements: str | dict | None = None) -> dict:
+    """Plan report plus requirement progress for one scenario, in snapshot s."""
+    result: dict = {"index": index, "id": scenario.get("id", index), "name": scenario.get("name")}
+    try:
+        report = PlanState.from_payload(scenario, s["graph"], s["credits"], s["terms"]).report()
+        reqs = scenario.get("requirements", requirements)
+        progress = s["requirements"].progress(reqs, _history(scenario)) if reqs else None
+    except (PlanError, RequirementError) as e:
+        return {**result, "error": str(e)}
+    except KeyError as e:
+        return {**result, "error": f"unknown requirement set {e}"}
+    terms = [t for t in report["terms"] if t["courses"]]
+    result.update(
+        valid=report["valid"],
+        violations=len(report["violations"]),
+        terms=len(terms),
+        last_term=terms[-1]["term"] if terms else None,
+        total_credits=report["total_credits"],
+        max_term_credits=max((t["credits"]["min"] for t in terms), default=0),
+        report=report,
+    )
+    if progress is not None:
+        progress.pop("cached", None)
+        result["progress"] = progress
+    return result
+
+
+def _evaluate_chunk(items: list[tuple[int, dict]], requirements: str | dict | None) -> list[dict]:
+    return [evaluate(_snapshot, i, s, requirements) for i, s in items]
+
+
+class WhatIf:
+    """
+    Owns the worker pool.  The pool is started on first use and reused, so
+    workers build their snapshot once, not once per batch.  Once closed it
+    refuses new runs (WhatIfClosed) instead of starting a pool nobody would
+    shut down; runs already started finish.
+    """
+
+    def __init__(self, courses: dict[str, dict], graph: PrereqGraph, terms: TermIndex | None = None,
+                 workers: int | None = None, chunk_size: int = DEFAULT_CHUNK):
+        self.courses = courses
+        self.graph = graph
+        self.terms = terms
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self._pool: ProcessPoolExecutor | None = None
+        self._local: dict | None = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init,
+                                             initargs=(self.courses, self.graph, self.terms))
+        return self._pool
+
+    def run(self, scenarios: list[dict], requirements: str | dict | None = None) -> Iterator[dict]:
+        """
+        Results for every scenario, yielded in completion order (each carries
+        its index).  Raises WhatIfClosed right away, not on first iteration.
+        """
+        items = list(enumerate(scenarios))
+        with self._lock:
+            if self._closed:
+                raise WhatIfClosed("this catalog version has been replaced")
+            if self.workers == 1 or len(items) <= self.chunk_size:
+                if self._local is None:
+                    self._local = _build(self.courses, self.graph, self.terms)
+                return (evaluate(self._local, i, s, requirements) for i, s in items)
+            # submitted under the lock, so close() waits for these chunks
+            pool = self._ensure()
+            futures = [pool.submit(_evaluate_chunk, items[k:k + self.chunk_size], requirements)
+                       for k in range(0, len(items), self.chunk_size)]
+        return (r for fut in as_completed(futures) for r in fut.result())
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(prog="whatif.py", description="Evaluate many plan scenarios in parallel")
+    p.add_argument("scenarios", help="JSON file with a scenario list or {base, variants}; - for stdin")
+    p.add_argument("-r", "--requirements", help="requirement set id for scenarios that don't name one")
+    p.add_argument("-w", "--workers", type=int, help="processes (default: all cores)")
+    p.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK, help="scenarios per task")
+    args = p.parse_args()
+
+    from ingest import ingest
+    text = sys.stdin.read() if args.scenarios == "-" else open(args.scenarios, encoding="utf-8").read()
+    try:
+        scenarios = expand(json.loads(text))
+    except PlanError as e:
+        sys.exit(str(e))
+
+    loaded = ingest()
+    print(loaded.summary(), file=sys.stderr)
+    t0 = time.monotonic()
+    whatif = WhatIf(loaded.courses, PrereqGraph(loaded.courses), loaded.term_index, args.workers, args.chunk_size)
+    rows = []
+    try:
+        for result in whatif.run(scenarios, args.requirements):
+            print(json.dumps(result, separators=(",", ":")), flush=True)
+            rows.append(result)
+    finally:
+        whatif.close()
+
+    seconds = time.monotonic() - t0
+    print(f"\n{len(rows)} scenarios in {seconds:.2f} s ({len(rows) / seconds:.1f}/s, {whatif.workers} workers)",
+          file=sys.stderr)
+    for r in sorted(rows, key=lambda r: r["index"]):
+        label = r["name"] or r["id"]
+        if "error" in r:
+            print(f"  {label}: error: {r['error']}", file=sys.stderr)
+            continue
+        done = ""
+        if "progress" in r:
+            done = f", degree {'complete' if r['progress']['satisfied'] else 'incomplete'}"
+        print(f"  {label}: {'valid' if r['valid'] else str(r['violations']) + ' violations'}, "
+              f"{r['terms']} terms to {r['last_term']}, {r['total_credits']['min']} credits{done}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { CheckCircle, Circle, Calendar, TrendingUp, BookOpen, Award, AlertCircle, Target, Clock, Users } from 'lucide-react';
 import Navigation from '../roadmap/NavBar';
 
@@ -19,7 +19,16 @@ const ProgressPage = () => {
     currentSemester: "Fall 2024"
   };
 
-  const graduationRequirements = [
+  // Mock course history; progress per requirement group is computed by the backend
+  const courseHistory = [
+    { code: "MATH 221", grade: "A-" }, { code: "MATH 222", grade: "B+" },
+    { code: "COMP SCI 200", grade: "A" }, { code: "COMP SCI 300", grade: "A" },
+    { code: "COMP SCI 400", grade: "B+" }, { code: "COMP SCI 577", grade: "B+" },
+    { code: "COMP SCI 537", grade: "B+" }, { code: "COMP SCI 540", grade: "A" },
+    { code: "STAT 240", grade: "A-" }, { code: "ENGL 100", grade: "A" }
+  ];
+
+  const mockRequirements = [
     {
       category: "Core Requirements",
       totalCredits: 45,
@@ -82,6 +91,32 @@ const ProgressPage = () => {
     }
   ];
 
+  const [graduationRequirements, setGraduationRequirements] = useState(mockRequirements);
+
+  useEffect(() => {
+    fetch('http://127.0.0.1:5000/api/progress', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ requirements: 'compsci_bs', history: courseHistory })
+    })
+      .then(res => res.json())
+      .then(data => {
+        if (!data.groups) return;
+        setGraduationRequirements(data.groups.map(group => ({
+          category: group.name,
+          totalCredits: group.credits_required,
+          completedCredits: group.credits_completed,
+          courses: group.courses.map(course => ({
+            name: course.title ? `${course.code.replace('_', ' ')} – ${course.title}` : course.code.replace('_', ' '),
+            credits: course.credits,
+            completed: course.completed,
+            grade: course.grade
+          }))
+        })));
+      })
+      .catch(err => console.error('Error fetching degree progress:', err));
+  }, []);
+
   const semesterProgress = [
     { semester: "Fall 2022", gpa: 3.2, credits: 15, cumulativeGPA: 3.2 },
     { semester: "Spring 2023", gpa: 3.6, credits: 16, cumulativeGPA: 3.4 },
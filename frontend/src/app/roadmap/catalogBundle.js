@@ -0,0 +1,100 @@
+// Static catalog bundle written by backend/bundle.py into public/catalog:
+// manifest.json names one gzip-compressed shard per subject plus a prefix
+// search index. Shard names carry a content hash, so only the manifest is
+// revalidated; everything else can be cached forever.
+
+const BASE = '/catalog';
+
+let manifestPromise = null;
+let indexPromise = null;
+const subjectPromises = new Map();
+
+// Static hosts that send Content-Encoding: gzip hand us plain JSON; others
+// send the .gz bytes as-is and the browser's DecompressionStream unpacks them.
+async function readJson(res) {
+  const bytes = new Uint8Array(await res.arrayBuffer());
+  if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return JSON.parse(await new Response(stream).text());
+  }
+  return JSON.parse(new TextDecoder().decode(bytes));
+}
+
+async function loadFile(file) {
+  const res = await fetch(`${BASE}/${encodeURIComponent(file)}`);
+  if (!res.ok) throw new Error(`${file}: ${res.status}`);
+  return readJson(res);
+}
+
+export function loadManifest() {
+  manifestPromise ??= fetch(`${BASE}/manifest.json`, { cache: 'no-cache' }).then(res => {
+    if (!res.ok) throw new Error(`manifest.json: ${res.status}`);
+    return res.json();
+  });
+  return manifestPromise;
+}
+
+// Course cards of one subject (same shape as the roadmap's mapCourse()); [] for unknown subjects.
+export function loadSubject(subject) {
+  if (!subjectPromises.has(subject)) {
+    subjectPromises.set(subject, loadManifest().then(m => {
+      const entry = m.subjects[subject];
+      return entry ? loadFile(entry.file) : [];
+    }));
+  }
+  return subjectPromises.get(subject);
+}
+
+export function loadIndex() {
+  indexPromise ??= loadManifest().then(m => loadFile(m.index.file));
+  return indexPromise;
+}
+
+// First position in a list of [key, ...] rows sorted by key whose key is >= prefix.
+function lowerBound(rows, prefix) {
+  let lo = 0;
+  let hi = rows.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (rows[mid][0] < prefix) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function wordHits(index, prefix) {
+  const hits = new Set();
+  for (let i = lowerBound(index.words, prefix); i < index.words.length && index.words[i][0].startsWith(prefix); i++) {
+    for (const id of index.words[i][1]) hits.add(id);
+  }
+  return hits;
+}
+
+// Courses whose code starts with the query ("comp sci 57", "compsci57") or
+// whose title has a word starting with every query word ("intro algo").
+// Returns [{ code, name, subject }] where subject is the shard to load.
+export function searchIndex(index, query, limit = 50) {
+  const q = query.toLowerCase().trim();
+  if (!q) return [];
+  const ids = new Set();
+  const key = q.replace(/\s+/g, '');
+  for (let i = lowerBound(index.codes, key); i < index.codes.length && index.codes[i][0].startsWith(key) && ids.size < limit; i++) {
+    ids.add(i);
+  }
+  const words = q.split(/[^a-z0-9]+/).filter(Boolean);
+  if (words.length && ids.size < limit) {
+    let common = wordHits(index, words[0]);
+    for (const w of words.slice(1)) {
+      const next = wordHits(index, w);
+      common = new Set([...common].filter(id => next.has(id)));
+    }
+    for (const id of [...common].sort((a, b) => a - b)) {
+      if (ids.size >= limit) break;
+      ids.add(id);
+    }
+  }
+  return [...ids].map(i => {
+    const [, code, name, subject] = index.codes[i];
+    return { code, name, subject: index.subjects[subject] };
+  });
+}
@@ -9,6 +9,7 @@ import { X } from 'lucide-react';
 import { Search, Plus, Check, Clock, Star, TrendingUp, BookOpen, Users, Calendar, ChevronDown, ChevronUp, ChevronLeft, ChevronRight } from 'lucide-react';
 // Import custom Navigation component from separate file
 import Navigation from './NavBar';
+import { loadIndex, loadManifest, loadSubject, searchIndex } from './catalogBundle';
 
 // Mock data for completed courses - organized by semester
 // Each course object contains: code, name, credits, grade, semester, requirement type
@@ -19,8 +20,8 @@ import Navigation from './NavBar';
 // Contains available courses with detailed information including:
 // - Basic info (code, name, credits, requirement)
 // - Course description
-// - MadGrades data (GPA and difficulty ratings)
-// - Rate My Professor data (rating and top professor)
+// - MadGrades data (GPA and its rank across the catalog)
+// - Rate My Professor data (rating, difficulty and top professor)
 // - Prerequisites list
  // Replace hardcoded courseDatabase with fetched data
 
@@ -36,12 +37,28 @@ export default function RoadmapPage() {
 });
 
     const [courseDatabase, setCourseDatabase] = useState([]);
+    // true once the static bundle (public/catalog) answered; search then loads subjects on demand
+    const [bundled, setBundled] = useState(false);
+
+// Add cards, skipping codes already loaded (subjects can arrive more than once)
+const addCourses = cards => setCourseDatabase(prev => {
+  const seen = new Set(prev.map(c => c.code));
+  // bundle cards carry null credits when the catalog lists none; mapCourse() falls back to 3 too
+  const fresh = cards.filter(c => !seen.has(c.code)).map(c => ({ ...c, credits: c.credits ?? 3 }));
+  return fresh.length ? prev.concat(fresh) : prev;
+});
+
 useEffect(() => {
-  fetch('http://127.0.0.1:5000/api/courses')
-    .then(res => res.json())
-    .then(data => {
-      // Map backend data to expected frontend format
-      const mappedCourses = data.map(raw => ({
+  // Prefer the static bundle built by backend/bundle.py: only the subjects the
+  // page starts with are fetched, the rest as searches need them. Without a
+  // bundle, courses arrive from the API as NDJSON; cards render after the
+  // first batch instead of waiting for the whole catalog to download and parse.
+  const controller = new AbortController();
+  const BATCH = 500;
+  const START_SUBJECTS = ['COMPSCI', 'MATH', 'STAT'];
+
+  // Map backend data to expected frontend format
+  const mapCourse = raw => ({
         code: raw.course_reference
           ? `${raw.course_reference.subjects[0]} ${raw.course_reference.course_number}`
           : '',
@@ -54,28 +71,89 @@ useEffect(() => {
 
         requirement: '', // You can add logic to set this if you want
 
-        prerequisites: raw.prerequisites?.course_references
-          ? raw.prerequisites.course_references.map(pr => 
-              pr.subjects ? `${pr.subjects[0]} ${pr.course_number}` : ''
-            )
-          : [],
+        // text_references: leaves like "COMP SCI 367" resolved by the backend at ingest
+        prerequisites: [
+          ...(raw.prerequisites?.course_references ?? []),
+          ...(raw.prerequisites?.text_references ?? [])
+        ].map(pr =>
+          pr.subjects ? `${pr.subjects[0]} ${pr.course_number}` : ''
+        ),
 
+        // precomputed by backend/enrich.py, null when not enriched yet
         madGrades: {
-          avgGPA: null, // Fill with your logic if you want
-          difficulty: null // Fill with your logic if you want
+          avgGPA: raw.enrichment?.madGrades?.avgGPA ?? null,
+          gpaRank: raw.enrichment?.madGrades?.gpaRank ?? null
         },
 
         rmp: {
-          rating: null,
-          professor: null
+          rating: raw.enrichment?.rmp?.rating ?? null,
+          difficulty: raw.enrichment?.rmp?.difficulty ?? null,
+          professor: raw.enrichment?.rmp?.professor ?? null
         }
-      }));
-      setCourseDatabase(mappedCourses);
-    });
+      });
+
+  const streamFromApi = async () => {
+    const res = await fetch('http://127.0.0.1:5000/api/courses?format=ndjson', { signal: controller.signal });
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let batch = [];
+    const flush = () => {
+      const ready = batch;
+      batch = [];
+      setCourseDatabase(prev => prev.concat(ready));
+    };
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines) {
+        if (line) batch.push(mapCourse(JSON.parse(line)));
+      }
+      if (batch.length >= BATCH) flush();
+    }
+    if (buffered) batch.push(mapCourse(JSON.parse(buffered)));
+    if (batch.length) flush();
+  };
+
+  (async () => {
+    try {
+      await loadManifest();
+    } catch {
+      return streamFromApi();
+    }
+    if (controller.signal.aborted) return;
+    setBundled(true);
+    for (const cards of await Promise.all(START_SUBJECTS.map(loadSubject))) {
+      if (!controller.signal.aborted) addCourses(cards);
+    }
+  })().catch(err => {
+    if (err.name !== 'AbortError') console.error('Error fetching courses:', err);
+  });
+
+  return () => controller.abort();
 }, []);
 
   // State variables using useState hook
   const [searchTerm, setSearchTerm] = useState(''); // Stores the search input text
+
+  // With the static bundle, look the search up in the prefix index and load
+  // the subjects of the matches so the filter below can find them
+  useEffect(() => {
+    if (!bundled || !searchTerm.trim()) return;
+    let cancelled = false;
+    (async () => {
+      const hits = searchIndex(await loadIndex(), searchTerm);
+      const subjects = [...new Set(hits.map(h => h.subject))];
+      for (const cards of await Promise.all(subjects.map(loadSubject))) {
+        if (!cancelled) addCourses(cards);
+      }
+    })().catch(err => console.error('Error searching catalog bundle:', err));
+    return () => { cancelled = true; };
+  }, [bundled, searchTerm]);
+
   const [selectedCourse, setSelectedCourse] = useState(null); // Stores currently selected course for modal
   const [showCourseSearch, setShowCourseSearch] = useState(false); // Controls visibility of course search panel
   const [showSemesterModal, setShowSemesterModal] = useState(false); // Controls visibility of semester selection modal
@@ -344,7 +422,7 @@ const priorityCourses = getPriorityCourses(
                   MadGrades Stats
                 </h5>
                 <p className="text-sm text-gray-300">Avg GPA: <span className="text-white font-medium">{course.madGrades?.avgGPA}</span></p>
-                <p className="text-sm text-gray-300">Difficulty: <span className="text-white font-medium">{course.madGrades?.difficulty}/10</span></p>
+                <p className="text-sm text-gray-300">GPA rank: <span className="text-white font-medium">{course.madGrades?.gpaRank}/10</span></p>
               </div>
               
               {/* Rate My Professor statistics */}
@@ -354,6 +432,7 @@ const priorityCourses = getPriorityCourses(
                   Rate My Professor
                 </h5>
                 <p className="text-sm text-gray-300">Rating: <span className="text-white font-medium">{course.rmp?.rating}/5</span></p>
+                <p className="text-sm text-gray-300">Difficulty: <span className="text-white font-medium">{course.rmp?.difficulty}/5</span></p>
                 <p className="text-sm text-gray-300">Top Prof: <span className="text-white font-medium">{course.rmp?.professor}</span></p>
               </div>
             </div>